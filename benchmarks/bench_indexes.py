@@ -0,0 +1,131 @@
+"""Benchmark the verses/books/chapters indexes against the unindexed schema.
+
+Builds a throwaway database with every translation in TRANSLATIONS registered
+and bootstrapped, fills most verses with text (leaving a few placeholders),
+then times the loader's hot queries and prints their query plans twice: once
+with the secondary indexes dropped and once with them created.
+
+Usage:
+    python benchmarks/bench_indexes.py [--remaining 0.05] [--repeat 2]
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import init  # noqa: E402
+
+# Queries issued thousands of times per load, with a parameter factory for each.
+QUERIES = {
+    'update verse': (
+        "UPDATE verses SET text = text WHERE chapter_id = ? AND verse_number = ?",
+        lambda chapter_ids: (random.choice(chapter_ids), random.randint(1, 20))
+    ),
+    'verses of chapter': (
+        "SELECT verse_number FROM verses WHERE chapter_id = ?",
+        lambda chapter_ids: (random.choice(chapter_ids),)
+    ),
+    'chapters with placeholders': (
+        f"""SELECT c.chapter_id FROM chapters c JOIN books b ON c.book_id = b.book_id
+            WHERE b.translation_id = ? AND EXISTS (
+                SELECT 1 FROM verses v WHERE v.chapter_id = c.chapter_id AND v.text = '{init.PLACEHOLDER}')""",
+        lambda chapter_ids: (random.randint(1, len(init.TRANSLATIONS)),)
+    ),
+    'missing verses': (
+        f"""SELECT b.name, c.chapter_number, v.verse_number FROM books b
+            JOIN chapters c ON c.book_id = b.book_id
+            JOIN verses v ON v.chapter_id = c.chapter_id
+            WHERE b.translation_id = ? AND v.text = '{init.PLACEHOLDER}'""",
+        lambda chapter_ids: (random.randint(1, len(init.TRANSLATIONS)),)
+    )
+}
+
+# How many times each query runs per timing round (kept low enough that the
+# unindexed round, which scans the whole verses table, finishes in seconds).
+ITERATIONS = {
+    'update verse': 200,
+    'verses of chapter': 200,
+    'chapters with placeholders': 1,
+    'missing verses': 3
+}
+
+def build_database(path: str, remaining: float) -> None:
+    init.DB_NAME = path
+    for translation in init.TRANSLATIONS:
+        init.prepare_translation(translation)
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE verses SET text = 'In the beginning', word_count = 3 WHERE text = ?",
+                     (init.PLACEHOLDER,))
+        verse_ids = [row[0] for row in conn.execute("SELECT verse_id FROM verses")]
+        placeholders = random.sample(verse_ids, int(len(verse_ids) * remaining))
+        conn.executemany("UPDATE verses SET text = ? WHERE verse_id = ?",
+                         [(init.PLACEHOLDER, verse_id) for verse_id in placeholders])
+        conn.commit()
+
+def run_queries(conn: sqlite3.Connection, repeat: int) -> dict:
+    chapter_ids = [row[0] for row in conn.execute("SELECT chapter_id FROM chapters")]
+    timings = {}
+    for name, (sql, make_params) in QUERIES.items():
+        best = float('inf')
+        for _ in range(repeat):
+            params = [make_params(chapter_ids) for _ in range(ITERATIONS[name])]
+            start = time.perf_counter()
+            for args in params:
+                conn.execute(sql, args).fetchall()
+            best = min(best, time.perf_counter() - start)
+        conn.rollback()
+        timings[name] = best / ITERATIONS[name]
+    return timings
+
+def print_plans(conn: sqlite3.Connection) -> None:
+    for name, (sql, _) in QUERIES.items():
+        params = tuple(1 for _ in range(sql.count('?')))
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        print(f"  {name}:")
+        for row in plan:
+            print(f"    {row[-1]}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark verse table indexes')
+    parser.add_argument('--remaining', type=float, default=0.05,
+                        help='Fraction of verses left as placeholders (default: 0.05)')
+    parser.add_argument('--repeat', type=int, default=2, help='Timing rounds per query (best is reported)')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    random.seed(1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        build_database(path, args.remaining)
+        conn = sqlite3.connect(path)
+        verse_count = conn.execute("SELECT COUNT(*) FROM verses").fetchone()[0]
+        print(f"{len(init.TRANSLATIONS)} translations, {verse_count} verses, "
+              f"{args.remaining:.0%} placeholders\n")
+
+        for name in init.INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.execute("ANALYZE")
+        print("Without indexes:")
+        print_plans(conn)
+        before = run_queries(conn, args.repeat)
+
+        init.create_indexes(conn.cursor())
+        conn.execute("ANALYZE")
+        conn.commit()
+        print("\nWith indexes:")
+        print_plans(conn)
+        after = run_queries(conn, args.repeat)
+        conn.close()
+
+    print(f"\n{'query':<28}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for name in QUERIES:
+        print(f"{name:<28}{before[name] * 1000:>14.3f}{after[name] * 1000:>14.3f}"
+              f"{before[name] / after[name]:>9.0f}x")
+
+if __name__ == '__main__':
+    main()
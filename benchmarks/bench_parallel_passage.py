@@ -0,0 +1,69 @@
+"""Benchmark side-by-side passage lookups against separate per-translation lookups.
+
+Builds a throwaway database with every translation in TRANSLATIONS
+bootstrapped and filled with dummy text (or uses --db), then times, with the
+passage caches bypassed, get_parallel_passage's single pivoted query against
+one get_passage query per translation for a mix of short and long references.
+
+Usage:
+    python benchmarks/bench_parallel_passage.py [--db bible.db] [--iterations 200]
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import init  # noqa: E402
+
+REFERENCES = ['John 3:16', 'Mark 9:42-50', 'Psalm 23', 'Romans 8', 'Matthew 5-7']
+
+def build_database(path: str) -> None:
+    init.DB_NAME = path
+    for translation in init.TRANSLATIONS:
+        init.prepare_translation(translation)
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE verses SET text = 'In the beginning', word_count = 3 WHERE text = ?",
+                     (init.PLACEHOLDER,))
+        conn.commit()
+
+def time_lookup(lookup, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        lookup()
+    return (time.perf_counter() - start) / iterations
+
+def run(translations: tuple, iterations: int) -> None:
+    # __wrapped__ skips the LRU caches so every call reaches SQLite
+    separate = init.load_passage.__wrapped__
+    parallel = init.load_parallel_passage.__wrapped__
+    print(f"{'reference':<16}{'rows':>6}{'separate (ms)':>16}{'parallel (ms)':>16}{'speedup':>10}")
+    for text in REFERENCES:
+        reference = init.parse_reference(text)
+        rows = len(parallel(reference, translations).verses)
+        before = time_lookup(lambda: [separate(reference, t) for t in translations], iterations)
+        after = time_lookup(lambda: parallel(reference, translations), iterations)
+        print(f"{text:<16}{rows:>6}{before * 1000:>16.3f}{after * 1000:>16.3f}{before / after:>9.1f}x")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark parallel passage lookups')
+    parser.add_argument('--db', help='Existing database to query instead of a generated one')
+    parser.add_argument('--iterations', type=int, default=200, help='Lookups per reference (default: 200)')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    translations = tuple(init.TRANSLATIONS)
+
+    if args.db:
+        init.DB_NAME = args.db
+        run(translations, args.iterations)
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        build_database(os.path.join(directory, 'bench.db'))
+        run(translations, args.iterations)
+        init.close_connection()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""End-to-end throughput benchmark for the loader against the fake API server.
+
+Starts benchmarks/fake_api_server.py in-process, points TRANSLATIONS at it,
+and runs process_translation for each selected translation into a throwaway
+database. Reports requests/sec, verses/sec, time spent writing to SQLite and
+total wall-clock time, giving a reproducible baseline for pipeline changes.
+
+Rate limits are lifted by default so the run measures the pipeline itself;
+pass --respect-rate-limits to keep RATE_LIMITS as configured (and
+--period-scale to compress their windows). --together adds a run loading all
+selected translations at once under the shared scheduler used by --all, to
+compare against the sum of the separate runs.
+
+Usage:
+    python benchmarks/bench_pipeline.py [-t ESV KJV NIV] [--workers 4] [--latency 0.05]
+                                        [--error-rate 0.0] [--throttle-rate 0.0]
+                                        [--together] [--respect-rate-limits --period-scale 60]
+                                        [--keys 1] [--rejected-keys 0]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import init  # noqa: E402
+from fake_api_server import FakeApiServer  # noqa: E402
+
+class WriteTimer:
+    """Accumulates time spent in the loader's database write stages."""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def wrap(self, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+        return timed
+
+def run_translation(translation: str, server: FakeApiServer, workers: int, directory: str,
+                    keys: list) -> dict:
+    """Load one translation, or several "+"-joined ones under the shared scheduler."""
+    init.DB_NAME = os.path.join(directory, f"{translation}.db")
+    init.RATE_LIMITERS.clear()
+    requests_before = server.stats['requests']
+
+    timer = WriteTimer()
+    write_planned_request = init.write_planned_request
+    flush = init.VerseWriter.flush
+    init.write_planned_request = timer.wrap(write_planned_request)
+    init.VerseWriter.flush = timer.wrap(flush)
+    try:
+        start = time.perf_counter()
+        init.process_translations({code: keys for code in translation.split('+')}, workers)
+        elapsed = time.perf_counter() - start
+    finally:
+        init.write_planned_request = write_planned_request
+        init.VerseWriter.flush = flush
+
+    conn = init.get_connection()
+    verses = conn.execute(f"SELECT COUNT(*) FROM verses WHERE text != '{init.PLACEHOLDER}' "
+                          "AND text NOT LIKE 'omitted in %'").fetchone()[0]
+    remaining = conn.execute(f"SELECT COUNT(*) FROM verses WHERE text = '{init.PLACEHOLDER}'").fetchone()[0]
+    init.close_connection()
+    requests = server.stats['requests'] - requests_before
+    return {
+        'translation': translation,
+        'requests': requests,
+        'verses': verses,
+        'remaining': remaining,
+        'write_seconds': timer.seconds,
+        'seconds': elapsed
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='End-to-end loader benchmark against a fake API')
+    parser.add_argument('-t', '--translations', nargs='+', default=list(init.TRANSLATIONS.keys()),
+                        choices=list(init.TRANSLATIONS.keys()))
+    parser.add_argument('-w', '--workers', type=int, default=init.DEFAULT_WORKERS)
+    parser.add_argument('--latency', type=float, default=0.05, help='Mean fake API latency (seconds)')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=1.0)
+    parser.add_argument('--respect-rate-limits', action='store_true',
+                        help='Keep RATE_LIMITS instead of lifting them for the run')
+    parser.add_argument('--keys', type=int, default=1, help='API keys in each translation\'s key pool (default: 1)')
+    parser.add_argument('--rejected-keys', type=int, default=0,
+                        help='How many of those keys the fake API rejects with HTTP 401')
+    parser.add_argument('--together', action='store_true',
+                        help='Also load all selected translations at once, as --all does')
+    parser.add_argument('--period-scale', type=float, default=1.0,
+                        help='Shrink rate limit windows by this factor so --respect-rate-limits runs finish quickly')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    if not args.respect_rate_limits:
+        for limits in init.RATE_LIMITS.values():
+            for period in limits:
+                limits[period] = 10 ** 9
+    for period in init.RATE_LIMIT_PERIODS:
+        init.RATE_LIMIT_PERIODS[period] /= args.period_scale
+
+    keys = [f"benchmark-key-{n}" for n in range(1, args.keys + 1)]
+    server = FakeApiServer(latency=args.latency, error_rate=args.error_rate,
+                           throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+                           rejected_keys=keys[:args.rejected_keys]).start()
+    server.point_translations_at()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            init.configure_response_cache(os.path.join(directory, 'cache'), enabled=False)
+            for translation in args.translations:
+                results.append(run_translation(translation, server, args.workers, directory, keys))
+            if args.together and len(args.translations) > 1:
+                results.append(run_translation('+'.join(args.translations), server, args.workers, directory, keys))
+    finally:
+        server.stop()
+
+    print(f"workers={args.workers} keys={args.keys} latency={args.latency}s error_rate={args.error_rate} "
+          f"throttle_rate={args.throttle_rate}")
+    print(f"{'translation':<14}{'requests':>10}{'verses':>10}{'left':>7}{'req/s':>9}{'verses/s':>11}"
+          f"{'db write s':>12}{'wall s':>9}")
+    for r in results:
+        print(f"{r['translation']:<14}{r['requests']:>10}{r['verses']:>10}{r['remaining']:>7}"
+              f"{r['requests'] / r['seconds']:>9.1f}{r['verses'] / r['seconds']:>11.0f}"
+              f"{r['write_seconds']:>12.2f}{r['seconds']:>9.2f}")
+
+if __name__ == '__main__':
+    main()
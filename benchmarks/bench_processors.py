@@ -0,0 +1,79 @@
+"""Throughput benchmark for the registered response processors.
+
+Runs every processor in RESPONSE_PROCESSORS over synthetic payloads of
+several sizes built with the fake API server's body generators, plus any
+recorded responses found in a response cache directory, and reports
+payloads/sec, verses/sec and MB/s so parser throughput can be tracked over
+time. The same payloads back the pytest-benchmark suite in
+test_bench_processors.py, which is the one to use for saved, comparable runs;
+this script is a quick table without extra dependencies.
+
+Usage:
+    python benchmarks/bench_processors.py [--cache-dir response_cache] [--rounds 5]
+    pytest benchmarks/test_bench_processors.py
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import init  # noqa: E402
+from fake_api_server import BODIES  # noqa: E402
+
+# Synthetic payload shapes: (label, reference) per translation. ESV requests
+# span chapters; KJV and NIV are fetched a chapter at a time.
+SYNTHETIC = {
+    'ESV': [('1 verse', 'John 3:16-16'), ('1 chapter', 'Genesis 24:1-67'),
+            ('500 verses', 'Genesis 1:1-20:4')],
+    'KJV': [('1 verse', 'John 3:16-16'), ('1 chapter', 'Genesis 24:1-67')],
+    'NIV': [('1 verse', 'John 3:16-16'), ('1 chapter', 'Genesis 24:1-67')],
+}
+
+def synthetic_payloads(translation: str) -> list:
+    payloads = []
+    for label, reference in SYNTHETIC.get(translation, []):
+        request = init.request_from_reference(translation, reference)
+        payloads.append((label, BODIES[translation](request, reference)))
+    return payloads
+
+def recorded_payloads(translation: str, cache_dir: str) -> list:
+    cache = init.ResponseCache(cache_dir)
+    bodies = [json.loads(entry['body']) for entry in cache.entries(translation)]
+    return [(f"recorded x{len(bodies)}", bodies)] if bodies else []
+
+def measure(processor, translation: str, bodies: list, rounds: int) -> tuple:
+    """Best-of-rounds seconds to process all bodies, and the verse count."""
+    verses = sum(len(processor(body, translation)['texts']) for body in bodies)
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for body in bodies:
+            processor(body, translation)
+        best = min(best, time.perf_counter() - start)
+    return best, verses
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark response processors')
+    parser.add_argument('--cache-dir', default=init.RESPONSE_CACHE_DIR,
+                        help='Response cache to take recorded payloads from (default: %(default)s)')
+    parser.add_argument('--rounds', type=int, default=5, help='Timing rounds per payload (best is reported)')
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='Copies of each synthetic payload processed per round (default: 200)')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'translation':<12}{'payload':<18}{'payloads/s':>12}{'verses/s':>12}{'MB/s':>9}")
+    for translation, processor in init.RESPONSE_PROCESSORS.items():
+        cases = [(label, [body] * args.repeat) for label, body in synthetic_payloads(translation)]
+        cases += recorded_payloads(translation, args.cache_dir)
+        for label, bodies in cases:
+            seconds, verses = measure(processor, translation, bodies, args.rounds)
+            size = sum(len(json.dumps(body)) for body in bodies)
+            print(f"{translation:<12}{label:<18}{len(bodies) / seconds:>12.0f}"
+                  f"{verses / seconds:>12.0f}{size / seconds / 1e6:>9.1f}")
+
+if __name__ == '__main__':
+    main()
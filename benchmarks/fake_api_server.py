@@ -0,0 +1,245 @@
+"""Local stand-in for the ESV, KJV and NIV passage APIs.
+
+Serves synthetic verses generated from bible_structure in the response shapes
+expected by process_esv_response, process_kjv_response and
+process_niv_response, with configurable latency, error rate and HTTP 429
+behaviour. Omitted verses from TRANSLATION_DATA are left out of responses,
+as the real APIs do. Responses carry an ETag and honour If-None-Match with
+HTTP 304; revise() changes a chapter's text to exercise refresh mode.
+
+Run standalone:
+    python benchmarks/fake_api_server.py --port 8765 --latency 0.05
+
+or from Python (see bench_pipeline.py):
+    server = FakeApiServer(latency=0.05).start()
+    server.point_translations_at()
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import init  # noqa: E402
+
+# URL path served for each translation, and the query parameter carrying the reference.
+ROUTES = {
+    '/v3/passage/text/': ('ESV', 'q'),
+    '/kjv/text': ('KJV', 'reference'),
+    '/niv/passages': ('NIV', 'passage')
+}
+
+WORDS = ['and', 'the', 'LORD', 'said', 'unto', 'them', 'behold', 'light', 'upon', 'earth',
+         'heaven', 'people', 'spirit', 'grace', 'peace', 'word', 'land', 'water', 'day', 'night']
+
+def synthetic_text(book_name: str, chapter: int, verse: int, revisions: dict = None) -> str:
+    """Deterministic pseudo-verse of 8-40 words for a reference.
+
+    The first verse of a chapter listed in `revisions` gets the chapter's
+    revision number appended, as if the publisher had edited it.
+    """
+    rng = random.Random(f"{book_name}|{chapter}|{verse}")
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 40))]
+    text = f"{book_name} {chapter}:{verse} " + ' '.join(words) + '.'
+    revision = (revisions or {}).get((book_name, chapter))
+    if revision and verse == 1:
+        text += f" (revision {revision})"
+    return text
+
+def book_number(book_name: str) -> int:
+    return list(init.bible_structure).index(book_name) + 1
+
+def esv_body(request: init.PlannedRequest, reference: str, revisions: dict = None) -> dict:
+    book_id = book_number(request.book_name) * 1000000
+    lines = [f"[{verse}] {synthetic_text(request.book_name, chapter, verse, revisions)}"
+             for chapter, verse in request.slots]
+    return {
+        'query': reference,
+        'canonical': reference,
+        'parsed': [[book_id + request.start_chapter * 1000 + request.start_verse,
+                    book_id + request.end_chapter * 1000 + request.end_verse]],
+        'passage_meta': [{
+            'canonical': reference,
+            'chapter_start': [book_id + request.start_chapter * 1000 + 1,
+                              book_id + request.start_chapter * 1000 + init.bible_structure[request.book_name][request.start_chapter - 1]],
+            'chapter_end': [book_id + request.end_chapter * 1000 + 1,
+                            book_id + request.end_chapter * 1000 + init.bible_structure[request.book_name][request.end_chapter - 1]]
+        }],
+        'passages': [f"{reference}\n\n  " + '\n\n  '.join(lines) + " (ESV)"]
+    }
+
+def kjv_body(request: init.PlannedRequest, reference: str, revisions: dict = None) -> dict:
+    book_id = book_number(request.book_name) * 1000000
+    return {
+        'reference': reference,
+        'book': {'name': request.book_name, 'id': book_number(request.book_name)},
+        'chapter': {'number': request.start_chapter},
+        'verses': [{'number': verse, 'text': synthetic_text(request.book_name, chapter, verse, revisions),
+                    'id': book_id + chapter * 1000 + verse}
+                   for chapter, verse in request.slots]
+    }
+
+def niv_body(request: init.PlannedRequest, reference: str, revisions: dict = None) -> dict:
+    return {
+        'metadata': {'passage': reference, 'version': 'NIV', 'copyright': 'Synthetic text'},
+        'verses': [{'number': verse,
+                    'content': f"<p>{synthetic_text(request.book_name, chapter, verse, revisions)}</p>"}
+                   for chapter, verse in request.slots]
+    }
+
+BODIES = {'ESV': esv_body, 'KJV': kjv_body, 'NIV': niv_body}
+
+class FakeApiServer:
+    """Threaded HTTP server answering passage requests for every translation.
+
+    Args:
+        port: Port to listen on (0 picks a free port)
+        latency: Mean added latency per request, in seconds (jittered +/-50%)
+        error_rate: Fraction of requests answered with HTTP 500
+        throttle_rate: Fraction of requests answered with HTTP 429
+        retry_after: Retry-After seconds sent with 429 responses (None omits the header)
+        rejected_keys: API keys answered with HTTP 401
+        conditional: Send ETags and answer a matching If-None-Match with HTTP 304
+    """
+
+    def __init__(self, port: int = 0, latency: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = 1.0, rejected_keys=(),
+                 conditional: bool = True):
+        self.latency = latency
+        self.conditional = conditional
+        self.revisions = {}
+        self.rejected_keys = set(rejected_keys)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.stats = {'requests': 0, 'ok': 0, 'not_modified': 0, 'errors': 0, 'throttled': 0, 'rejected': 0,
+                      'bytes': 0}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def revise(self, book_name: str, chapter: int) -> None:
+        """Change the text of a chapter's first verse, bumping its revision number."""
+        with self._lock:
+            self.revisions[(book_name, chapter)] = self.revisions.get((book_name, chapter), 0) + 1
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += amount
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status: int, body: dict, headers: dict = None) -> None:
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+                server.count('bytes', len(payload))
+
+            def do_GET(self):
+                server.count('requests')
+                if server.latency:
+                    time.sleep(server.latency * random.uniform(0.5, 1.5))
+                url = urlparse(self.path)
+                route = ROUTES.get(url.path)
+                if route is None:
+                    self.send_json(404, {'detail': 'Not found'})
+                    return
+                translation, param = route
+                query = parse_qs(url.query)
+                api_key = (self.headers.get('Authorization') or '').split(' ')[-1] or query.get('apiKey', [''])[0]
+                if api_key in server.rejected_keys:
+                    server.count('rejected')
+                    self.send_json(401, {'detail': 'Invalid token.'})
+                    return
+                roll = random.random()
+                if roll < server.throttle_rate:
+                    server.count('throttled')
+                    headers = {} if server.retry_after is None else {'Retry-After': str(server.retry_after)}
+                    self.send_json(429, {'detail': 'Request was throttled.'}, headers)
+                    return
+                if roll < server.throttle_rate + server.error_rate:
+                    server.count('errors')
+                    self.send_json(500, {'detail': 'Internal server error'})
+                    return
+                reference = query.get(param, [''])[0]
+                request = init.request_from_reference(translation, reference)
+                if request is None:
+                    self.send_json(400, {'detail': f'Unrecognized reference {reference!r}'})
+                    return
+                body = BODIES[translation](request, reference, server.revisions)
+                if not server.conditional:
+                    server.count('ok')
+                    self.send_json(200, body)
+                    return
+                etag = '"' + hashlib.sha256(json.dumps(body).encode('utf-8')).hexdigest()[:16] + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    server.count('not_modified')
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                server.count('ok')
+                self.send_json(200, body, {'ETag': etag})
+
+        return Handler
+
+    def start(self) -> 'FakeApiServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def point_translations_at(self) -> None:
+        """Rewrite the api_endpoint of every translation in init.TRANSLATIONS to this server."""
+        for path, (translation, _) in ROUTES.items():
+            init.TRANSLATIONS[translation]['api_endpoint'] = self.base_url + path
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Local stand-in for the Bible passage APIs')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Mean added latency per request (seconds)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 429')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds for 429 responses')
+    parser.add_argument('--rejected-key', action='append', default=[], help='API key to answer with HTTP 401 (repeatable)')
+    parser.add_argument('--no-etag', action='store_true', help='Do not send ETags or answer conditional requests')
+    args = parser.parse_args()
+
+    server = FakeApiServer(args.port, args.latency, args.error_rate, args.throttle_rate, args.retry_after,
+                           args.rejected_key, conditional=not args.no_etag)
+    print(f"Serving fake Bible APIs on {server.base_url}")
+    for path, (translation, _) in ROUTES.items():
+        print(f"  {translation}: {server.base_url}{path}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == '__main__':
+    main()
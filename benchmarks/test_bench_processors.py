@@ -0,0 +1,57 @@
+"""pytest-benchmark suite for the registered response processors.
+
+Times every processor in RESPONSE_PROCESSORS over the synthetic payloads
+from bench_processors.py and over recorded responses from a response cache
+directory (BENCH_RESPONSE_CACHE, default RESPONSE_CACHE_DIR; skipped when it
+holds none for a translation), so parser throughput can be compared across
+runs with pytest-benchmark's --benchmark-save / --benchmark-compare.
+
+Usage:
+    pytest benchmarks/test_bench_processors.py [--benchmark-save=processors]
+"""
+import logging
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import init  # noqa: E402
+from bench_processors import synthetic_payloads, recorded_payloads  # noqa: E402
+
+CACHE_DIR = os.environ.get('BENCH_RESPONSE_CACHE', init.RESPONSE_CACHE_DIR)
+
+SYNTHETIC_CASES = [
+    pytest.param(translation, body, id=f"{translation}-{label.replace(' ', '_')}")
+    for translation in init.RESPONSE_PROCESSORS
+    for label, body in synthetic_payloads(translation)
+]
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    # Processors warn about odd payloads; logging would dominate the timings.
+    logging.disable(logging.WARNING)
+    yield
+    logging.disable(logging.NOTSET)
+
+def process_all(processor, bodies: list, translation: str) -> int:
+    return sum(len(processor(body, translation)['texts']) for body in bodies)
+
+@pytest.mark.parametrize('translation, body', SYNTHETIC_CASES)
+def test_synthetic_payload(benchmark, translation, body):
+    processor = init.RESPONSE_PROCESSORS[translation]
+    result = benchmark(processor, body, translation)
+    assert result['texts']
+    benchmark.extra_info['verses'] = len(result['texts'])
+
+@pytest.mark.parametrize('translation', list(init.RESPONSE_PROCESSORS))
+def test_recorded_payloads(benchmark, translation):
+    cases = recorded_payloads(translation, CACHE_DIR)
+    if not cases:
+        pytest.skip(f"no recorded {translation} responses in {CACHE_DIR}")
+    _, bodies = cases[0]
+    verses = benchmark(process_all, init.RESPONSE_PROCESSORS[translation], bodies, translation)
+    assert verses
+    benchmark.extra_info.update(payloads=len(bodies), verses=verses)
@@ -4,8 +4,40 @@ import time
 import logging
 import re
 import json
+import lzma
 import argparse
-from typing import List, Optional, Dict, Any, Union
+import bz2
+import csv
+import os
+import pstats
+import glob
+import gzip
+import hashlib
+import math
+import random
+import email.utils
+import array
+import collections
+import atexit
+import threading
+import concurrent.futures
+import cProfile
+import contextlib
+import functools
+import http.server
+import mmap
+import struct
+import sys
+import zlib
+import xml.sax
+import xml.sax.handler
+from typing import List, Optional, Dict, Any, Union, Tuple, NamedTuple, Iterator
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional: only needed for Parquet export
+    pyarrow = None
 
 # Setup logging configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
@@ -13,6 +45,19 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(mes
 # Constants for maintainability.
 DB_NAME = 'bible.db'
 PLACEHOLDER = '###'
+DEFAULT_WORKERS = 4
+# Number of verse updates applied per executemany by the write-back stage.
+WRITE_BATCH_SIZE = 500
+# Loader checkpoint interval: commit after this many requests or seconds, whichever comes first.
+COMMIT_EVERY_REQUESTS = 25
+COMMIT_EVERY_SECONDS = 60
+# Longest rate-limit wait (seconds) a fetch worker absorbs itself before the
+# whole pass pauses for the quota to refill.
+MAX_WORKER_WAIT = 60
+
+# Serializes use of the loader's shared SQLite connection between the fetch
+# workers (rate-limit tracking) and the single verse writer.
+DB_LOCK = threading.RLock()
 
 # Rate limits per translation
 RATE_LIMITS = {
@@ -37,6 +82,8 @@ TRANSLATIONS = {
         'name': 'English Standard Version',
         'api_endpoint': 'https://api.esv.org/v3/passage/text/',
         'auth_header': 'Token',  # Will be combined with the API key
+        'multi_chapter': True,  # Accepts references such as "Genesis 1-3"
+        'max_verses_per_request': 500,
         'params': {
             "include-footnotes": "false",
             "include-headings": "false",
@@ -48,6 +95,8 @@ TRANSLATIONS = {
         'name': 'King James Version',
         'api_endpoint': 'https://api.example.com/kjv/text',
         'auth_header': 'ApiKey',
+        'multi_chapter': False,
+        'max_verses_per_request': 500,
         'params': {
             "format": "json",
             "include_verses": "true",
@@ -58,6 +107,8 @@ TRANSLATIONS = {
         'name': 'New International Version',
         'api_endpoint': 'https://api.example.com/niv/passages',
         'auth_header': 'Bearer',
+        'multi_chapter': False,
+        'max_verses_per_request': 500,
         'params': {
             "format": "json",
             "show_notes": "false",
@@ -296,16 +347,313 @@ TRANSLATION_DATA = {
 }
 
 
+# Versification: every verse in bible_structure gets a canonical integer ID of
+# the form BBCCCVVV (book number, chapter, verse), e.g. John 3:16 -> 43003016,
+# and a dense ordinal (0 .. VERSIFICATION.size - 1) in canonical order. IDs
+# sort in reading order, so ranges, alignment across translations and
+# omission checks are integer comparisons and bit tests.
+BOOK_NAMES = list(bible_structure)
+BOOK_NUMBERS = {book: number for number, book in enumerate(BOOK_NAMES, start=1)}
+
+def canonical_verse_id(book: str, chapter: int, verse: int) -> int:
+    """Return the BBCCCVVV canonical ID of a verse (the book must be in bible_structure)."""
+    return BOOK_NUMBERS[book] * 1000000 + chapter * 1000 + verse
+
+def split_canonical_id(canonical_id: int) -> Tuple[str, int, int]:
+    """Inverse of canonical_verse_id: (book, chapter, verse)."""
+    book_number, rest = divmod(canonical_id, 1000000)
+    chapter, verse = divmod(rest, 1000)
+    return BOOK_NAMES[book_number - 1], chapter, verse
+
+
+class Versification:
+    """Dense ordinal numbering of the verses in a structure.
+
+    `canonical_ids[ordinal]` is the canonical ID of each verse and
+    `chapter_offsets[book_number * 1000 + chapter]` the ordinal of the
+    chapter's first verse, so both directions are O(1).
+    """
+
+    def __init__(self, structure: Dict[str, List[int]]):
+        self.chapter_offsets = {}
+        self.chapter_sizes = {}
+        self.canonical_ids = array.array('l')
+        for book, chapters in structure.items():
+            for chapter, verse_count in enumerate(chapters, start=1):
+                key = BOOK_NUMBERS[book] * 1000 + chapter
+                self.chapter_offsets[key] = len(self.canonical_ids)
+                self.chapter_sizes[key] = verse_count
+                base = key * 1000
+                self.canonical_ids.extend(range(base + 1, base + verse_count + 1))
+        self.size = len(self.canonical_ids)
+
+    def ordinal(self, canonical_id: int) -> Optional[int]:
+        """Return the ordinal of a canonical ID, or None if the verse is not in the structure."""
+        key, verse = divmod(canonical_id, 1000)
+        if not 1 <= verse <= self.chapter_sizes.get(key, 0):
+            return None
+        return self.chapter_offsets[key] + verse - 1
+
+    def bitset(self, canonical_ids) -> bytearray:
+        """Build a bitset over ordinals with the bits of the given verses set."""
+        bits = bytearray((self.size + 7) // 8)
+        for canonical_id in canonical_ids:
+            ordinal = self.ordinal(canonical_id)
+            if ordinal is not None:
+                bits[ordinal >> 3] |= 1 << (ordinal & 7)
+        return bits
+
+    @staticmethod
+    def test(bits: bytearray, ordinal: int) -> bool:
+        return bool(bits[ordinal >> 3] & (1 << (ordinal & 7)))
+
+VERSIFICATION = Versification(bible_structure)
+
+def omitted_canonical_ids(translation: str) -> List[int]:
+    """Canonical IDs of the verses listed in TRANSLATION_DATA['omitted_verses']."""
+    omitted_verses = TRANSLATION_DATA.get(translation, {}).get('omitted_verses', {})
+    return [canonical_verse_id(book, chapter, verse)
+            for book, chapters in omitted_verses.items() if book in BOOK_NUMBERS
+            for chapter, verses in chapters.items()
+            for verse in verses]
+
+# Per-translation bitsets over VERSIFICATION ordinals; a set bit means omitted.
+OMITTED_BITSETS = {translation: VERSIFICATION.bitset(omitted_canonical_ids(translation))
+                   for translation in TRANSLATION_DATA}
+
+def is_omitted_id(canonical_id: int, translation: str) -> bool:
+    """Check by canonical ID whether a verse is omitted in the specified translation."""
+    bits = OMITTED_BITSETS.get(translation)
+    if bits is None:
+        return False
+    ordinal = VERSIFICATION.ordinal(canonical_id)
+    return ordinal is not None and Versification.test(bits, ordinal)
+
 def is_omitted(book: str, chapter: int, verse: int, translation: str) -> bool:
     """Check if a verse is omitted in the specified translation."""
-    if translation not in TRANSLATION_DATA:
+    if book not in BOOK_NUMBERS:
         return False
-    omitted_verses = TRANSLATION_DATA[translation].get('omitted_verses', {})
-    return verse in omitted_verses.get(book, {}).get(chapter, [])
+    return is_omitted_id(canonical_verse_id(book, chapter, verse), translation)
+
+# Common abbreviations that are not simply a prefix of the book name. Keys
+# are in the normalized form produced by normalize_book_name().
+BOOK_ABBREVIATIONS = {
+    'ex': 'Exodus', 'exo': 'Exodus', 'dt': 'Deuteronomy', 'jdg': 'Judges', 'jg': 'Judges',
+    'ps': 'Psalms', 'psa': 'Psalms', 'psalm': 'Psalms', 'pss': 'Psalms',
+    'prv': 'Proverbs', 'ecc': 'Ecclesiastes', 'qoh': 'Ecclesiastes',
+    'song': 'Song of Solomon', 'sos': 'Song of Solomon', 'songofsongs': 'Song of Solomon',
+    'canticles': 'Song of Solomon', 'ezk': 'Ezekiel', 'jnh': 'Jonah', 'zeph': 'Zephaniah',
+    'hag': 'Haggai', 'mt': 'Matthew', 'mk': 'Mark', 'mrk': 'Mark', 'lk': 'Luke',
+    'jn': 'John', 'jhn': 'John', 'rm': 'Romans', 'php': 'Philippians', 'phil': 'Philippians',
+    'phm': 'Philemon', 'phlm': 'Philemon', 'philem': 'Philemon', 'jas': 'James', 'jm': 'James',
+    'jud': 'Jude', 'jde': 'Jude', 'rev': 'Revelation', 'revelations': 'Revelation',
+    'apocalypse': 'Revelation',
+    '1sam': '1 Samuel', '2sam': '2 Samuel', '1kgs': '1 Kings', '2kgs': '2 Kings',
+    '1chr': '1 Chronicles', '2chr': '2 Chronicles', '1thess': '1 Thessalonians',
+    '2thess': '2 Thessalonians', '1tim': '1 Timothy', '2tim': '2 Timothy', '1pet': '1 Peter',
+    '2pet': '2 Peter', '1pt': '1 Peter', '2pt': '2 Peter', '1jn': '1 John', '2jn': '2 John',
+    '3jn': '3 John',
+}
+
+# Spelled-out and roman-numeral prefixes of numbered books ("First John", "II Kings").
+BOOK_NUMBER_PREFIXES = {'first': '1', 'second': '2', 'third': '3', 'i': '1', 'ii': '2', 'iii': '3'}
+
+def normalize_book_name(name: str) -> str:
+    """Reduce a book name or abbreviation to lowercase letters and digits ("1 Cor." -> "1cor")."""
+    words = re.sub(r'[^\w\s]', ' ', name).lower().split()
+    if len(words) > 1 and words[0] in BOOK_NUMBER_PREFIXES:
+        words[0] = BOOK_NUMBER_PREFIXES[words[0]]
+    return ''.join(words)
+
+def build_book_aliases() -> Dict[str, str]:
+    """Map every normalized name, abbreviation and unambiguous prefix to its book."""
+    aliases = dict(BOOK_ABBREVIATIONS)
+    names = {normalize_book_name(book): book for book in bible_structure}
+    prefixes = {}
+    for normalized, book in names.items():
+        # Numbered books need at least one letter after the number ("1c" but not "1")
+        minimum = 3 if normalized[0].isdigit() else 2
+        for length in range(minimum, len(normalized) + 1):
+            prefixes.setdefault(normalized[:length], set()).add(book)
+    for prefix, books in prefixes.items():
+        if len(books) == 1:
+            aliases.setdefault(prefix, next(iter(books)))
+    aliases.update(names)
+    return aliases
+
+BOOK_ALIASES = build_book_aliases()
+
+class Reference(NamedTuple):
+    """A validated verse range within one book; chapter and verse numbers are inclusive."""
+    book_name: str
+    start_chapter: int
+    start_verse: int
+    end_chapter: int
+    end_verse: int
+
+    @property
+    def start_id(self) -> int:
+        return canonical_verse_id(self.book_name, self.start_chapter, self.start_verse)
+
+    @property
+    def end_id(self) -> int:
+        return canonical_verse_id(self.book_name, self.end_chapter, self.end_verse)
+
+    def __str__(self) -> str:
+        if (self.start_chapter, self.start_verse) == (self.end_chapter, self.end_verse):
+            return f"{self.book_name} {self.start_chapter}:{self.start_verse}"
+        return format_reference(self.book_name, self.start_chapter, self.start_verse,
+                                self.end_verse, self.end_chapter)
+
+REFERENCE_PATTERN = re.compile(
+    r'^\s*(?P<book>(?:[1-3]|i{1,3}|first|second|third)?\s*[^\d\s][^\d]*?)\.?\s*'
+    r'(?:(?P<chapter>\d+)(?::(?P<verse>\d+))?'
+    r'(?:\s*[-–—]\s*(?P<end>\d+)(?::(?P<end_verse>\d+))?)?)?\s*$',
+    re.IGNORECASE)
+
+@functools.lru_cache(maxsize=4096)
+def parse_reference(reference: str) -> Reference:
+    """Parse a reference such as "John 3:16-18", "Ps 23" or "Gen 1:26-2:3".
+
+    Book names may be abbreviated. A bare chapter ("Ps 23") or chapter range
+    ("Ps 23-24") covers whole chapters, a bare book covers the whole book, and
+    in single-chapter books a lone number is a verse ("Jude 3").
+
+    Args:
+        reference: Human-readable reference
+
+    Returns:
+        The reference resolved against bible_structure
+
+    Raises:
+        ValueError: If the book is unknown or the range falls outside the book
+    """
+    match = REFERENCE_PATTERN.match(reference)
+    if not match:
+        raise ValueError(f"Cannot parse reference {reference!r}")
+    book_name = BOOK_ALIASES.get(normalize_book_name(match.group('book')))
+    if book_name is None:
+        raise ValueError(f"Unknown book in reference {reference!r}")
+    chapters = bible_structure[book_name]
+
+    chapter, verse, end, end_verse = (int(value) if value else None
+                                      for value in match.group('chapter', 'verse', 'end', 'end_verse'))
+    if chapter is None:
+        start, stop = (1, 1), (len(chapters), chapters[-1])
+    elif len(chapters) == 1 and verse is None and end_verse is None:
+        start, stop = (1, chapter), (1, end or chapter)
+    elif verse is None:
+        if end_verse is not None:
+            raise ValueError(f"Cannot parse reference {reference!r}")
+        last = end or chapter
+        if last > len(chapters):
+            raise ValueError(f"{book_name} has only {len(chapters)} chapters: {reference!r}")
+        start, stop = (chapter, 1), (last, chapters[last - 1])
+    elif end is None:
+        start = stop = (chapter, verse)
+    elif end_verse is None:
+        start, stop = (chapter, verse), (chapter, end)
+    else:
+        start, stop = (chapter, verse), (end, end_verse)
+
+    for chapter_number, verse_number in (start, stop):
+        if not 1 <= chapter_number <= len(chapters):
+            raise ValueError(f"{book_name} has only {len(chapters)} chapters: {reference!r}")
+        if not 1 <= verse_number <= chapters[chapter_number - 1]:
+            raise ValueError(f"{book_name} {chapter_number} has only "
+                             f"{chapters[chapter_number - 1]} verses: {reference!r}")
+    if stop < start:
+        raise ValueError(f"Reference range ends before it starts: {reference!r}")
+    return Reference(book_name, *start, *stop)
+
+
+# PRAGMAs applied to every connection opened by open_connection(). WAL lets
+# read-only connections query the database while a load is writing to it.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # Negative values are KiB, i.e. 64 MiB
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000
+}
+
+# Prepared statements kept per connection; the loader reuses a small set of SQL strings.
+STATEMENT_CACHE_SIZE = 512
+
+_connection = None
+_connection_path = None
+_connection_lock = threading.Lock()
+
+def open_connection(read_only: bool = False, db_name: Optional[str] = None) -> sqlite3.Connection:
+    """Open a new tuned connection to the Bible database.
+
+    Read-only connections are opened with mode=ro and query_only, so any
+    number of them can run alongside the single writer connection.
+    """
+    path = db_name or DB_NAME
+    if read_only:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma, value in SQLITE_PRAGMAS.items():
+        if read_only and pragma == 'journal_mode':
+            continue
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+def get_connection() -> sqlite3.Connection:
+    """Return the shared writer connection, opening it on first use.
+
+    The connection is reused by every function in this module so its
+    prepared-statement cache and page cache stay warm. It is reopened if
+    DB_NAME has been changed since it was opened.
+    """
+    global _connection, _connection_path
+    with _connection_lock:
+        if _connection is None or _connection_path != DB_NAME:
+            if _connection is not None:
+                _connection.close()
+            _connection = open_connection()
+            _connection_path = DB_NAME
+        return _connection
+
+def close_connection() -> None:
+    """Close the shared writer connection (also run at interpreter exit)."""
+    global _connection, _connection_path
+    with _connection_lock:
+        if _connection is not None:
+            _connection.close()
+            _connection = None
+            _connection_path = None
+
+atexit.register(close_connection)
+
+_read_connections = threading.local()
+
+def get_read_connection() -> sqlite3.Connection:
+    """Return this thread's read-only connection, opening it on first use.
+
+    Read paths (search, lookups) use these so they never contend with the
+    loader's writer connection.
+    """
+    conn = getattr(_read_connections, 'conn', None)
+    if conn is None or getattr(_read_connections, 'path', None) != DB_NAME:
+        if conn is not None:
+            conn.close()
+            clear_passage_caches()
+        conn = open_connection(read_only=True)
+        _read_connections.conn = conn
+        _read_connections.path = DB_NAME
+        _read_connections.data_version = None
+    return conn
 
 
 def create_database() -> None:
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS translations (
@@ -343,6 +691,7 @@ def create_database() -> None:
                 text TEXT,
                 word_count INTEGER,
                 metadata JSON,
+                canonical_id INTEGER,
                 FOREIGN KEY (chapter_id) REFERENCES chapters(chapter_id)
             )
         ''')
@@ -359,9 +708,171 @@ def create_database() -> None:
                 UNIQUE(translation_id)
             )
         ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS api_key_usage (
+                id INTEGER PRIMARY KEY,
+                translation_id INTEGER NOT NULL,
+                key_id TEXT NOT NULL,
+                request_count INTEGER DEFAULT 0,
+                last_request_hour INTEGER DEFAULT 0,
+                last_request_day INTEGER DEFAULT 0,
+                last_request_minute INTEGER DEFAULT 0,
+                minute_request_count INTEGER DEFAULT 0,
+                minute_tokens REAL,
+                hourly_tokens REAL,
+                daily_tokens REAL,
+                tokens_updated_at REAL,
+                blocked_until REAL,
+                request_windows TEXT,
+                FOREIGN KEY (translation_id) REFERENCES translations(translation_id),
+                UNIQUE(translation_id, key_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS load_progress (
+                progress_id INTEGER PRIMARY KEY,
+                translation_id INTEGER NOT NULL,
+                book_name TEXT NOT NULL,
+                start_chapter INTEGER NOT NULL,
+                start_verse INTEGER NOT NULL,
+                end_chapter INTEGER NOT NULL,
+                end_verse INTEGER NOT NULL,
+                verses_written INTEGER NOT NULL,
+                completed_at REAL NOT NULL,
+                FOREIGN KEY (translation_id) REFERENCES translations(translation_id)
+            )
+        ''')
+        migrate_api_tracking(cursor)
+        migrate_verses(cursor)
+        create_indexes(cursor)
+        create_search_index(cursor)
         conn.commit()
     logging.info("Database and tables created successfully.")
 
+# Secondary indexes, created (or added to existing databases) by create_database.
+# The placeholder index is partial, so queries must compare against the literal
+# PLACEHOLDER value rather than a bound parameter for SQLite to use it.
+INDEXES = {
+    'idx_verses_chapter_verse': 'CREATE UNIQUE INDEX IF NOT EXISTS idx_verses_chapter_verse ON verses(chapter_id, verse_number)',
+    'idx_verses_placeholder': f"CREATE INDEX IF NOT EXISTS idx_verses_placeholder ON verses(chapter_id, verse_number) WHERE text = '{PLACEHOLDER}'",
+    'idx_verses_canonical': 'CREATE INDEX IF NOT EXISTS idx_verses_canonical ON verses(canonical_id)',
+    'idx_books_translation': 'CREATE INDEX IF NOT EXISTS idx_books_translation ON books(translation_id)',
+    'idx_chapters_book': 'CREATE INDEX IF NOT EXISTS idx_chapters_book ON chapters(book_id, chapter_number)',
+    'idx_load_progress_translation': 'CREATE INDEX IF NOT EXISTS idx_load_progress_translation ON load_progress(translation_id)'
+}
+
+def stage_book_numbers(cursor: sqlite3.Cursor) -> None:
+    """Load BOOK_NUMBERS into a temp table so SQL can compute canonical IDs."""
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS book_numbers (book_name TEXT PRIMARY KEY, book_number INTEGER)")
+    cursor.execute("DELETE FROM book_numbers")
+    cursor.executemany("INSERT INTO book_numbers (book_name, book_number) VALUES (?, ?)", BOOK_NUMBERS.items())
+
+def migrate_verses(cursor: sqlite3.Cursor) -> None:
+    """Add the canonical_id column to older databases and fill it where missing."""
+    cursor.execute("PRAGMA table_info(verses)")
+    if 'canonical_id' not in {col[1] for col in cursor.fetchall()}:
+        cursor.execute('ALTER TABLE verses ADD COLUMN canonical_id INTEGER')
+        logging.info("Added canonical_id column to verses table")
+    stage_book_numbers(cursor)
+    cursor.execute("""
+        UPDATE verses SET canonical_id = (
+            SELECT n.book_number * 1000000 + c.chapter_number * 1000 + verses.verse_number
+            FROM chapters c
+            JOIN books b ON b.book_id = c.book_id
+            JOIN book_numbers n ON n.book_name = b.name
+            WHERE c.chapter_id = verses.chapter_id
+        )
+        WHERE canonical_id IS NULL
+    """)
+    if cursor.rowcount > 0:
+        logging.info(f"Assigned canonical IDs to {cursor.rowcount} verses.")
+
+def create_indexes(cursor: sqlite3.Cursor) -> None:
+    """Create the secondary indexes, migrating older databases that lack them."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    existing = {row[0] for row in cursor.fetchall()}
+    if 'idx_verses_chapter_verse' not in existing:
+        # Older databases may hold duplicate verse rows; keep one per verse,
+        # preferring a fetched row over a placeholder, so the unique index can be built.
+        cursor.execute("""
+            DELETE FROM verses WHERE verse_id IN (
+                SELECT verse_id FROM (
+                    SELECT verse_id, ROW_NUMBER() OVER (
+                        PARTITION BY chapter_id, verse_number
+                        ORDER BY text = ?, verse_id
+                    ) AS duplicate_rank
+                    FROM verses
+                ) WHERE duplicate_rank > 1
+            )
+        """, (PLACEHOLDER,))
+        if cursor.rowcount > 0:
+            logging.warning(f"Removed {cursor.rowcount} duplicate verse rows before indexing.")
+    for name, statement in INDEXES.items():
+        if name not in existing:
+            cursor.execute(statement)
+            logging.info(f"Created index {name}.")
+
+# Verse text worth indexing for search: not a placeholder and not an omission marker.
+SEARCHABLE_TEXT_SQL = f"{{alias}}.text IS NOT NULL AND {{alias}}.text != '{PLACEHOLDER}' AND {{alias}}.text NOT LIKE 'omitted in %'"
+
+# Triggers keeping verses_fts (an external-content FTS5 index over verses.text) in sync.
+SEARCH_TRIGGERS = {
+    'verses_fts_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS verses_fts_insert AFTER INSERT ON verses
+        WHEN {SEARCHABLE_TEXT_SQL.format(alias='new')}
+        BEGIN
+            INSERT INTO verses_fts (rowid, text) VALUES (new.verse_id, new.text);
+        END
+    """,
+    'verses_fts_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS verses_fts_delete AFTER DELETE ON verses
+        WHEN {SEARCHABLE_TEXT_SQL.format(alias='old')}
+        BEGIN
+            INSERT INTO verses_fts (verses_fts, rowid, text) VALUES ('delete', old.verse_id, old.text);
+        END
+    """,
+    'verses_fts_update_old': f"""
+        CREATE TRIGGER IF NOT EXISTS verses_fts_update_old AFTER UPDATE OF text ON verses
+        WHEN {SEARCHABLE_TEXT_SQL.format(alias='old')}
+        BEGIN
+            INSERT INTO verses_fts (verses_fts, rowid, text) VALUES ('delete', old.verse_id, old.text);
+        END
+    """,
+    'verses_fts_update_new': f"""
+        CREATE TRIGGER IF NOT EXISTS verses_fts_update_new AFTER UPDATE OF text ON verses
+        WHEN {SEARCHABLE_TEXT_SQL.format(alias='new')}
+        BEGIN
+            INSERT INTO verses_fts (rowid, text) VALUES (new.verse_id, new.text);
+        END
+    """
+}
+
+def create_search_index(cursor: sqlite3.Cursor) -> None:
+    """Create the FTS5 verse index and its triggers, indexing any existing text.
+
+    Skipped with a warning when the SQLite library lacks FTS5, in which case
+    search() is unavailable but loading works as before.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE name = 'verses_fts'")
+    if cursor.fetchone() is None:
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE verses_fts USING fts5(
+                    text, content = 'verses', content_rowid = 'verse_id',
+                    tokenize = 'porter unicode61 remove_diacritics 2'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logging.warning(f"Full-text search unavailable (FTS5 not supported by this SQLite build): {e}")
+            return
+        cursor.execute(f"""
+            INSERT INTO verses_fts (rowid, text)
+            SELECT verse_id, text FROM verses v WHERE {SEARCHABLE_TEXT_SQL.format(alias='v')}
+        """)
+        logging.info(f"Created full-text search index ({cursor.rowcount} verses indexed).")
+    for statement in SEARCH_TRIGGERS.values():
+        cursor.execute(statement)
+
 def register_translation(translation: str) -> Optional[int]:
     """Register a single translation in the database and return its ID.
     
@@ -375,7 +886,7 @@ def register_translation(translation: str) -> Optional[int]:
         logging.error(f"Translation {translation} is not defined in TRANSLATIONS.")
         return None
         
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_connection() as conn:
         cursor = conn.cursor()
         
         # Check if translation already exists
@@ -395,7 +906,13 @@ def register_translation(translation: str) -> Optional[int]:
         return translation_id
 
 def populate_books_and_chapters() -> None:
-    with sqlite3.connect(DB_NAME) as conn:
+    """Insert any missing books and chapters for every registered translation.
+
+    Rows are built in memory from TRANSLATION_DATA and loaded with one
+    executemany for books and one set-based INSERT ... SELECT for chapters,
+    which only adds the chapters that are not there yet.
+    """
+    with get_connection() as conn:
         cursor = conn.cursor()
         
         # Make sure translations are populated first
@@ -409,12 +926,6 @@ def populate_books_and_chapters() -> None:
         translations = cursor.fetchall()
         
         for translation_id, translation_code in translations:
-            # Check if books for this translation are already populated
-            cursor.execute("SELECT COUNT(*) FROM books WHERE translation_id = ?", (translation_id,))
-            if cursor.fetchone()[0] > 0:
-                logging.info(f"Books for {translation_code} already populated. Skipping.")
-                continue
-            
             # Get translation-specific structure
             if translation_code not in TRANSLATION_DATA:
                 logging.warning(f"No structure data for {translation_code}. Skipping.")
@@ -424,26 +935,54 @@ def populate_books_and_chapters() -> None:
             if not book_structure:
                 logging.warning(f"Empty structure for {translation_code}. Skipping.")
                 continue
+
+            # Check if books and chapters for this translation are already populated
+            cursor.execute("""
+                SELECT COUNT(*) FROM chapters c
+                JOIN books b ON c.book_id = b.book_id
+                WHERE b.translation_id = ?
+            """, (translation_id,))
+            if cursor.fetchone()[0] == sum(len(chapters) for chapters in book_structure.values()):
+                logging.info(f"Books for {translation_code} already populated. Skipping.")
+                continue
                 
             # Populate books and chapters for this translation
-            for book, chapters in book_structure.items():
-                cursor.execute(
-                    "INSERT INTO books (translation_id, name) VALUES (?, ?)", 
-                    (translation_id, book)
+            cursor.executemany(
+                "INSERT OR IGNORE INTO books (translation_id, name) VALUES (?, ?)",
+                [(translation_id, book) for book in book_structure]
+            )
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS structure_chapters (book_name TEXT, chapter_number INTEGER, verse_count INTEGER)")
+            cursor.execute("DELETE FROM structure_chapters")
+            cursor.executemany(
+                "INSERT INTO structure_chapters (book_name, chapter_number, verse_count) VALUES (?, ?, ?)",
+                [(book, idx, verse_count)
+                 for book, chapters in book_structure.items()
+                 for idx, verse_count in enumerate(chapters, start=1)]
+            )
+            cursor.execute("""
+                INSERT INTO chapters (book_id, chapter_number, verse_count)
+                SELECT b.book_id, s.chapter_number, s.verse_count
+                FROM structure_chapters s
+                JOIN books b ON b.translation_id = ? AND b.name = s.book_name
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM chapters c
+                    WHERE c.book_id = b.book_id AND c.chapter_number = s.chapter_number
                 )
-                book_id = cursor.lastrowid
-                for idx, verse_count in enumerate(chapters, start=1):
-                    cursor.execute(
-                        "INSERT INTO chapters (book_id, chapter_number, verse_count) VALUES (?, ?, ?)",
-                        (book_id, idx, verse_count)
-                    )
-            logging.info(f"Books and chapters for {translation_code} populated successfully.")
+                ORDER BY b.book_id, s.chapter_number
+            """, (translation_id,))
+            logging.info(f"Books and chapters for {translation_code} populated successfully ({cursor.rowcount} chapters added).")
         
         conn.commit()
     logging.info("Books and chapters population complete for all translations.")
 
 def bootstrap_verses(translation: str) -> None:
-    with sqlite3.connect(DB_NAME) as conn:
+    """Insert placeholder (or "omitted") rows for every verse a translation is missing.
+
+    A single recursive-CTE INSERT ... SELECT generates verse numbers for all
+    chapters and anti-joins them against the existing rows, so only the gaps
+    are filled and no per-chapter query is issued.
+    """
+    with get_connection() as conn:
         cursor = conn.cursor()
         
         # Get translation_id for the specified translation
@@ -460,183 +999,1051 @@ def bootstrap_verses(translation: str) -> None:
             logging.error(f"No books found for {translation}. Please populate books and chapters first.")
             return
 
-        # Get all chapters for this translation
-        cursor.execute("""
-            SELECT chapters.chapter_id, books.name, chapters.chapter_number, chapters.verse_count
-            FROM chapters 
-            JOIN books ON chapters.book_id = books.book_id
-            WHERE books.translation_id = ?
-        """, (translation_id,))
-        chapters = cursor.fetchall()
-
         logging.info(f"Ensuring all chapters have contiguous placeholder verses for {translation}...")
-        missing_records = []
-        for chapter_id, book_name, chapter_number, verse_count in chapters:
-            cursor.execute("SELECT verse_number FROM verses WHERE chapter_id = ?", (chapter_id,))
-            existing = {row[0] for row in cursor.fetchall()}
-            missing = [i for i in range(1, verse_count + 1) if i not in existing]
-            if missing:
-                for v in missing:
-                    if is_omitted(book_name, chapter_number, v, translation):
-                        missing_records.append((chapter_id, v, f"omitted in {translation}"))
-                    else:
-                        missing_records.append((chapter_id, v, PLACEHOLDER))
-                logging.info(f"Chapter {book_name} {chapter_number} is missing verses: {missing}")
-
-        if missing_records:
-            cursor.executemany(
-                "INSERT INTO verses (chapter_id, verse_number, text) VALUES (?, ?, ?)",
-                missing_records
+
+        # Stage the translation's omitted verses so the insert can mark them in SQL.
+        omitted_verses = TRANSLATION_DATA.get(translation, {}).get('omitted_verses', {})
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS omitted_verses (book_name TEXT, chapter_number INTEGER, verse_number INTEGER)")
+        cursor.execute("DELETE FROM omitted_verses")
+        cursor.executemany(
+            "INSERT INTO omitted_verses (book_name, chapter_number, verse_number) VALUES (?, ?, ?)",
+            [(book, chapter, verse)
+             for book, chapters in omitted_verses.items()
+             for chapter, verses in chapters.items()
+             for verse in verses]
+        )
+        stage_book_numbers(cursor)
+
+        cursor.execute("""
+            WITH RECURSIVE verse_numbers(n) AS (
+                SELECT 1
+                UNION ALL
+                SELECT n + 1 FROM verse_numbers
+                WHERE n < (SELECT MAX(verse_count) FROM chapters)
+            )
+            INSERT INTO verses (chapter_id, verse_number, text, canonical_id)
+            SELECT c.chapter_id, n.n,
+                   CASE WHEN o.verse_number IS NULL THEN ? ELSE ? END,
+                   bn.book_number * 1000000 + c.chapter_number * 1000 + n.n
+            FROM books b
+            JOIN chapters c ON c.book_id = b.book_id
+            JOIN verse_numbers n ON n.n <= c.verse_count
+            LEFT JOIN book_numbers bn ON bn.book_name = b.name
+            LEFT JOIN omitted_verses o
+                ON o.book_name = b.name AND o.chapter_number = c.chapter_number AND o.verse_number = n.n
+            WHERE b.translation_id = ? AND NOT EXISTS (
+                SELECT 1 FROM verses v
+                WHERE v.chapter_id = c.chapter_id AND v.verse_number = n.n
             )
-            logging.info(f"Inserted {len(missing_records)} missing placeholder verses for {translation}.")
+            ORDER BY c.chapter_id, n.n
+        """, (PLACEHOLDER, f"omitted in {translation}", translation_id))
+        inserted = cursor.rowcount
+
+        if inserted > 0:
+            logging.info(f"Inserted {inserted} missing placeholder verses for {translation}.")
         else:
             logging.info(f"No missing placeholder verses found for {translation}.")
         conn.commit()
     logging.info(f"Bootstrap complete: All chapters now have contiguous placeholder verses for {translation}.")
 
 
-def check_rate_limit(conn: sqlite3.Connection, translation: str) -> bool:
-    """Check API rate limits for a specific translation."""
-    if translation not in RATE_LIMITS:
-        logging.error(f"No rate limits defined for {translation}.")
-        return False
-    
-    limits = RATE_LIMITS[translation]
-    minute_limit = limits.get('minute', float('inf'))
-    hourly_limit = limits.get('hourly', float('inf'))
-    daily_limit = limits.get('daily', float('inf'))
-    
-    current_minute = int(time.time() // 60)
-    current_hour = int(time.time() // 3600)
-    current_day = int(time.time() // 86400)
-    cursor = conn.cursor()
-    
-    # Get translation_id
-    cursor.execute('SELECT translation_id FROM translations WHERE abbreviation = ?', (translation,))
-    result = cursor.fetchone()
-    if not result:
-        logging.error(f"Translation {translation} not found in the database.")
-        return False
-    translation_id = result[0]
-    
-    # Check if we need to alter the api_tracking table to add the minute tracking column
-    cursor.execute("PRAGMA table_info(api_tracking)")
-    columns = [col[1] for col in cursor.fetchall()]
-    if 'last_request_minute' not in columns:
-        cursor.execute('ALTER TABLE api_tracking ADD COLUMN last_request_minute INTEGER DEFAULT 0')
-        cursor.execute('ALTER TABLE api_tracking ADD COLUMN minute_request_count INTEGER DEFAULT 0')
-        conn.commit()
-        logging.info("Added minute-based rate limit tracking columns to api_tracking table")
-    
-    # Check if there is a record for this translation
-    cursor.execute('SELECT COUNT(*) FROM api_tracking WHERE translation_id = ?', (translation_id,))
-    if cursor.fetchone()[0] == 0:
-        # Insert a new record for this translation
+# Upper bounds (seconds) of the latency histogram buckets kept for every pipeline stage.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Prefix of every exported metric name.
+METRICS_PREFIX = 'bible_loader'
+# Help text and type of each exported metric.
+METRIC_DEFINITIONS = {
+    'requests_total': ('counter', 'API requests sent, by HTTP status code ("error" if none was received).'),
+    'response_bytes_total': ('counter', 'Bytes of successful API response bodies received.'),
+    'verses_written_total': ('counter', 'Verse rows written to the database.'),
+    'throttle_waits_total': ('counter', 'Requests held back by the local rate limiter or an HTTP 429.'),
+    'retries_total': ('counter', 'Requests retried after a transient error or a rejected key.'),
+    'stage_seconds': ('histogram', 'Time spent in each loader stage.'),
+}
+# Repeats of the same sampled log message within this many seconds are counted, not logged.
+LOG_SAMPLE_SECONDS = 30
+
+class Metrics:
+    """Thread-safe counters and latency histograms for the loading pipeline.
+
+    Counters are keyed by metric name and label values; stage timings go into
+    the stage_seconds histogram labelled by stage and translation. The
+    values can be rendered in the Prometheus text format (written to a file
+    on every checkpoint, or served over HTTP) and summarized as a table at
+    the end of a run.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = collections.defaultdict(float)
+        # (stage, translation) -> [bucket counts..., +Inf count, sum]
+        self.histograms = {}
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] += amount
+
+    def observe(self, stage: str, translation: str, seconds: float) -> None:
+        with self.lock:
+            histogram = self.histograms.get((stage, translation))
+            if histogram is None:
+                histogram = self.histograms[(stage, translation)] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    break
+            else:
+                index = len(LATENCY_BUCKETS)
+            histogram[index] += 1
+            histogram[-1] += seconds
+
+    @contextlib.contextmanager
+    def timed(self, stage: str, translation: str):
+        """Record how long the enclosed block takes as one observation of `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, translation, time.perf_counter() - start)
+
+    def counter(self, name: str, **labels: str) -> float:
+        """Sum of a counter over every label set that includes `labels`."""
+        wanted = set(labels.items())
+        with self.lock:
+            return sum(value for (key_name, key_labels), value in self.counters.items()
+                       if key_name == name and wanted <= set(key_labels))
+
+    def reset(self) -> None:
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def prometheus_text(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, list(values)) for key, values in self.histograms.items())
+        lines = []
+        for name, (kind, help_text) in METRIC_DEFINITIONS.items():
+            full_name = f"{METRICS_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            if kind == 'counter':
+                for (key_name, labels), value in counters:
+                    if key_name == name:
+                        lines.append(f"{full_name}{format_labels(labels)} {value:.17g}")
+                continue
+            for (stage, translation), values in histograms:
+                labels = (('stage', stage), ('translation', translation))
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), values):
+                    cumulative += count
+                    lines.append(f"{full_name}_bucket{format_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{full_name}_sum{format_labels(labels)} {values[-1]:.6f}")
+                lines.append(f"{full_name}_count{format_labels(labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically write the metrics to `path`, e.g. for node_exporter's textfile collector."""
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write metrics to {path}: {e}")
+
+    def stage_summary(self, translations: List[str]) -> List[Tuple[str, str, int, float, float]]:
+        """(translation, stage, count, total seconds, approximate p95 seconds) for each recorded stage."""
+        with self.lock:
+            histograms = sorted((key, list(values)) for key, values in self.histograms.items()
+                                if key[1] in translations)
+        rows = []
+        for (stage, translation), values in histograms:
+            count = sum(values[:-1])
+            # Upper bound of the bucket holding the 95th percentile observation.
+            cumulative = 0
+            p95 = float('inf')
+            for bound, bucket_count in zip(LATENCY_BUCKETS, values):
+                cumulative += bucket_count
+                if cumulative >= 0.95 * count:
+                    p95 = bound
+                    break
+            rows.append((translation, stage, count, values[-1], p95))
+        return rows
+
+def format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+METRICS = Metrics()
+# Where checkpoints write the Prometheus text file, if anywhere (see configure_metrics).
+metrics_file = None
+
+class MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves METRICS at /metrics for a Prometheus scraper."""
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = METRICS.prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def configure_metrics(textfile: Optional[str] = None, port: Optional[int] = None) -> None:
+    """Export metrics to a Prometheus text file on every checkpoint and/or over HTTP on localhost."""
+    global metrics_file
+    metrics_file = textfile
+    if port is not None:
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', port), MetricsRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logging.info(f"Serving metrics at http://127.0.0.1:{server.server_port}/metrics")
+
+def export_metrics() -> None:
+    if metrics_file:
+        METRICS.write_textfile(metrics_file)
+
+def print_metrics_summary(translations: List[str]) -> None:
+    """Print request counters and per-stage timings for the given translations."""
+    print(f"{'translation':<12}{'requests':>10}{'retries':>9}{'throttled':>11}{'verses':>9}{'MiB':>8}")
+    for translation in translations:
+        print(f"{translation:<12}{METRICS.counter('requests_total', translation=translation):>10.0f}"
+              f"{METRICS.counter('retries_total', translation=translation):>9.0f}"
+              f"{METRICS.counter('throttle_waits_total', translation=translation):>11.0f}"
+              f"{METRICS.counter('verses_written_total', translation=translation):>9.0f}"
+              f"{METRICS.counter('response_bytes_total', translation=translation) / 1048576:>8.1f}")
+    rows = METRICS.stage_summary(translations + ['all'])
+    if not rows:
+        return
+    print(f"\n{'translation':<12}{'stage':<14}{'count':>8}{'total s':>10}{'mean ms':>10}{'p95 ms <=':>11}")
+    for translation, stage, count, total, p95 in rows:
+        mean = total / count * 1000 if count else 0.0
+        print(f"{translation:<12}{stage:<14}{count:>8}{total:>10.2f}{mean:>10.2f}{p95 * 1000:>11.0f}")
+
+_sampled_logs = {}
+_sampled_logs_lock = threading.Lock()
+
+def log_sampled(key: str, level: int, message: str) -> None:
+    """Log `message` at most once per LOG_SAMPLE_SECONDS for `key`, noting how many repeats were dropped."""
+    now = time.monotonic()
+    with _sampled_logs_lock:
+        last, suppressed = _sampled_logs.get(key, (None, 0))
+        if last is not None and now - last < LOG_SAMPLE_SECONDS:
+            _sampled_logs[key] = (last, suppressed + 1)
+            return
+        _sampled_logs[key] = (now, 0)
+    if suppressed:
+        message = f"{message} ({suppressed} similar messages suppressed)"
+    logging.log(level, message)
+
+# Columns added to api_tracking after the original schema, with their definitions.
+API_TRACKING_MIGRATIONS = {
+    'last_request_minute': 'INTEGER DEFAULT 0',
+    'minute_request_count': 'INTEGER DEFAULT 0',
+    'minute_tokens': 'REAL',
+    'hourly_tokens': 'REAL',
+    'daily_tokens': 'REAL',
+    'tokens_updated_at': 'REAL',
+    'blocked_until': 'REAL',
+    'request_windows': 'TEXT'
+}
+
+# Length in seconds of each rate limit window in RATE_LIMITS.
+RATE_LIMIT_PERIODS = {
+    'minute': 60,
+    'hourly': 3600,
+    'daily': 86400
+}
+
+# Number of slots each rate limit window is counted in. A request counts
+# against its window until the end of its slot plus the period, so requests
+# may wait up to 1/RATE_WINDOW_SLOTS of a period longer than strictly needed.
+RATE_WINDOW_SLOTS = 60
+
+def migrate_api_tracking(cursor: sqlite3.Cursor) -> None:
+    """Add any api_tracking (and api_key_usage) columns missing from databases created by older versions."""
+    for table in ('api_tracking', 'api_key_usage'):
+        cursor.execute(f"PRAGMA table_info({table})")
+        columns = {col[1] for col in cursor.fetchall()}
+        if not columns:
+            continue
+        for column, definition in API_TRACKING_MIGRATIONS.items():
+            if column not in columns:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+                logging.info(f"Added {column} column to {table} table")
+
+class TokenBucket:
+    """A token bucket refilled continuously at `limit` tokens per `period` seconds.
+
+    A full bucket plus one period of refill would allow up to twice `limit`
+    requests within `period` seconds, so requests are also counted in a
+    sliding window of the period (kept as RATE_WINDOW_SLOTS slot counts) and
+    a token is only available while that window is below `limit`.
+    """
+
+    def __init__(self, limit: int, period: float, tokens: Optional[float] = None,
+                 updated_at: Optional[float] = None):
+        self.capacity = float(limit)
+        self.period = period
+        self.rate = limit / period
+        self.tokens = self.capacity if tokens is None else min(float(tokens), self.capacity)
+        self.updated_at = time.time() if updated_at is None else updated_at
+        self.slot_length = period / RATE_WINDOW_SLOTS
+        self.window = collections.deque()  # [slot, requests], oldest first
+        self.window_count = 0
+
+    def refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+        while self.window and self.slot_expiry(self.window[0][0]) <= now:
+            self.window_count -= self.window.popleft()[1]
+
+    def slot_expiry(self, slot: int) -> float:
+        """When requests counted in `slot` leave the sliding window."""
+        return (slot + 1) * self.slot_length + self.period
+
+    @property
+    def available(self) -> float:
+        """Tokens that may be taken now (after a refill)."""
+        return max(0.0, min(self.tokens, self.capacity - self.window_count))
+
+    def take(self, now: float) -> None:
+        self.tokens -= 1
+        self.record(int(now // self.slot_length), 1)
+
+    def record(self, slot: int, requests: int) -> None:
+        """Count `requests` in the sliding window as made during `slot`."""
+        if self.window and self.window[-1][0] >= slot:
+            # Never reorder the window: counting a request later only delays its expiry.
+            self.window[-1][1] += requests
+        else:
+            self.window.append([slot, requests])
+        self.window_count += requests
+
+    def time_until_token(self) -> float:
+        """Seconds until at least one whole token is available (after a refill)."""
+        return self.time_until(1)
+
+    def time_until(self, count: float) -> float:
+        """Seconds until `count` tokens (capped at capacity) are available at once (after a refill)."""
+        count = min(count, self.capacity)
+        wait_time = max(0.0, (count - self.tokens) / self.rate)
+        excess = self.window_count + count - self.capacity
+        for slot, requests in self.window:
+            if excess <= 0:
+                break
+            excess -= requests
+            if excess <= 0:
+                wait_time = max(wait_time, self.slot_expiry(slot) - self.updated_at)
+        return wait_time
+
+def api_key_id(api_key: str) -> str:
+    """Stable identifier for an API key, so usage can be stored without the key itself."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+class RateLimiter:
+    """In-memory minute/hour/day token buckets for one translation or one API key.
+
+    Decisions are made without touching the database. State is loaded from
+    api_tracking (or api_key_usage for a per-key limiter) once, and written
+    back by persist() from the loader's checkpoints, inside the same commit as
+    the verses. All methods are safe to call from concurrent fetch workers.
+    """
+
+    def __init__(self, translation: str, api_key: Optional[str] = None):
+        self.translation = translation
+        self.key_id = api_key_id(api_key) if api_key else None
+        self.limits = RATE_LIMITS.get(translation, {})
+        self.buckets = {
+            period: TokenBucket(limit, RATE_LIMIT_PERIODS[period])
+            for period, limit in self.limits.items()
+        }
+        self.translation_id = None
+        self.blocked_until = 0.0
+        self.unpersisted_requests = 0
+        self._lock = threading.Lock()
+
+    def tracking_row(self) -> Tuple[str, str, tuple]:
+        """Table, WHERE clause and parameters of the row holding this limiter's state."""
+        if self.key_id:
+            return 'api_key_usage', 'translation_id = ? AND key_id = ?', (self.translation_id, self.key_id)
+        return 'api_tracking', 'translation_id = ?', (self.translation_id,)
+
+    def load(self, conn: sqlite3.Connection) -> bool:
+        """Load bucket state from api_tracking or api_key_usage, creating the row if needed."""
+        cursor = conn.cursor()
+        cursor.execute('SELECT translation_id FROM translations WHERE abbreviation = ?', (self.translation,))
+        result = cursor.fetchone()
+        if not result:
+            logging.error(f"Translation {self.translation} not found in the database.")
+            return False
+        self.translation_id = result[0]
+        migrate_api_tracking(cursor)
+
+        table, where, params = self.tracking_row()
         cursor.execute(
-            'INSERT INTO api_tracking (translation_id, request_count, last_request_hour, last_request_day, last_request_minute, minute_request_count) VALUES (?, 0, ?, ?, ?, 0)',
-            (translation_id, current_hour, current_day, current_minute)
+            f'SELECT request_count, last_request_hour, last_request_day, minute_tokens, hourly_tokens, daily_tokens, tokens_updated_at, blocked_until, request_windows FROM {table} WHERE {where}',
+            params
         )
+        row = cursor.fetchone()
+        now = time.time()
+        if row is None:
+            key_column, key_value = (', key_id', (self.key_id,)) if self.key_id else ('', ())
+            cursor.execute(
+                f'INSERT INTO {table} (translation_id{key_column}, request_count, last_request_hour, last_request_day, last_request_minute, minute_request_count) VALUES (?{", ?" * len(key_value)}, 0, ?, ?, ?, 0)',
+                (self.translation_id, *key_value, int(now // 3600), int(now // 86400), int(now // 60))
+            )
+            conn.commit()
+            return True
+
+        (request_count, last_hour, last_day, minute_tokens, hourly_tokens, daily_tokens, updated_at,
+         blocked_until, request_windows) = row
+        with self._lock:
+            self.blocked_until = blocked_until or 0.0
+            if updated_at is not None:
+                saved = {'minute': minute_tokens, 'hourly': hourly_tokens, 'daily': daily_tokens}
+                for period, bucket in self.buckets.items():
+                    if saved.get(period) is not None:
+                        bucket.tokens = min(saved[period], bucket.capacity)
+                        bucket.updated_at = updated_at
+            else:
+                # Rows written by the old counter-based tracking only know how many
+                # requests were made in the current hour/day.
+                if 'hourly' in self.buckets and last_hour == int(now // 3600):
+                    self.buckets['hourly'].tokens = max(0.0, self.buckets['hourly'].capacity - request_count)
+                if 'daily' in self.buckets and last_day == int(now // 86400):
+                    self.buckets['daily'].tokens = max(0.0, self.buckets['daily'].capacity - request_count)
+            if request_windows:
+                for period, slots in json.loads(request_windows).items():
+                    if period in self.buckets:
+                        for slot, requests in slots:
+                            self.buckets[period].record(slot, requests)
+            else:
+                # Without saved windows, count today's requests as just made in the
+                # hour and day windows they may still belong to.
+                for period, current in (('hourly', last_hour == int(now // 3600)), ('daily', last_day == int(now // 86400))):
+                    if period in self.buckets and current and request_count:
+                        bucket = self.buckets[period]
+                        bucket.record(int(now // bucket.slot_length), request_count)
+            for bucket in self.buckets.values():
+                bucket.refill(now)
+        return True
+
+    def defer(self, seconds: float) -> None:
+        """Refuse all requests for the next `seconds` seconds (e.g. after an HTTP 429)."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.time() + seconds)
+
+    def try_acquire(self) -> bool:
+        """Take one token from every bucket, or none if any bucket is empty."""
+        with self._lock:
+            now = time.time()
+            if now < self.blocked_until:
+                return False
+            for bucket in self.buckets.values():
+                bucket.refill(now)
+            if any(bucket.available < 1 for bucket in self.buckets.values()):
+                return False
+            for bucket in self.buckets.values():
+                bucket.take(now)
+            self.unpersisted_requests += 1
+            return True
+
+    def time_until_available(self) -> float:
+        """Exact number of seconds until a request would be allowed."""
+        with self._lock:
+            now = time.time()
+            for bucket in self.buckets.values():
+                bucket.refill(now)
+            wait_time = max((bucket.time_until_token() for bucket in self.buckets.values()), default=0.0)
+            return max(wait_time, self.blocked_until - now)
+
+    def time_until_tokens(self, count: float) -> float:
+        """Seconds until `count` tokens (capped at each bucket's capacity) are available at once."""
+        with self._lock:
+            now = time.time()
+            wait_time = max(0.0, self.blocked_until - now)
+            for bucket in self.buckets.values():
+                bucket.refill(now)
+                wait_time = max(wait_time, bucket.time_until(count))
+            return wait_time
+
+    def remaining_fraction(self) -> float:
+        """Share of the tightest window's quota that is still unused (1.0 when unlimited)."""
+        with self._lock:
+            now = time.time()
+            for bucket in self.buckets.values():
+                bucket.refill(now)
+            return min((bucket.available / bucket.capacity for bucket in self.buckets.values()), default=1.0)
+
+    def spare_tokens(self, share: float) -> int:
+        """Requests that fit in `share` of the widest window's quota and could all be sent now."""
+        with self._lock:
+            now = time.time()
+            if now < self.blocked_until:
+                return 0
+            for bucket in self.buckets.values():
+                bucket.refill(now)
+            if not self.buckets:
+                return 0
+            widest = max(bucket.capacity for bucket in self.buckets.values())
+            return int(min([share * widest] + [bucket.available for bucket in self.buckets.values()]))
+
+    def exhausted_period(self) -> Optional[str]:
+        """Name of the widest window that is currently out of tokens, if any."""
+        with self._lock:
+            now = time.time()
+            for period in ('daily', 'hourly', 'minute'):
+                bucket = self.buckets.get(period)
+                if bucket:
+                    bucket.refill(now)
+                    if bucket.available < 1:
+                        return period
+        return None
+
+    def estimate_duration(self, request_count: int) -> float:
+        """Seconds needed to make `request_count` requests back to back under these limits."""
+        with self._lock:
+            now = time.time()
+            seconds = 0.0
+            for bucket in self.buckets.values():
+                bucket.refill(now)
+                seconds = max(seconds, (request_count - bucket.available) / bucket.rate)
+            return seconds
+
+    def wait_until_available(self) -> None:
+        """Sleep exactly as long as needed for a token to become available."""
+        wait_time = self.time_until_available()
+        while wait_time > 0:
+            time.sleep(wait_time)
+            wait_time = self.time_until_available()
+
+    def persist(self, conn: sqlite3.Connection) -> None:
+        """Write the bucket state and request counters back to api_tracking.
+
+        Does not commit: the caller commits, so limiter state never lands in
+        the middle of the writer's transaction.
+        """
+        if self.translation_id is None:
+            return
+        with self._lock:
+            now = time.time()
+            for bucket in self.buckets.values():
+                bucket.refill(now)
+            tokens = {period: bucket.tokens for period, bucket in self.buckets.items()}
+            windows = {period: list(bucket.window) for period, bucket in self.buckets.items()}
+            requests_made = self.unpersisted_requests
+            self.unpersisted_requests = 0
+
+            blocked_until = self.blocked_until
+
+        cursor = conn.cursor()
+        current_day = int(now // 86400)
+        table, where, params = self.tracking_row()
+        cursor.execute(f"""
+            UPDATE {table}
+            SET request_count = CASE WHEN last_request_day = ? THEN request_count + ? ELSE ? END,
+                last_request_day = ?, last_request_hour = ?, last_request_minute = ?,
+                minute_tokens = ?, hourly_tokens = ?, daily_tokens = ?, tokens_updated_at = ?,
+                blocked_until = ?, request_windows = ?
+            WHERE {where}
+        """, (current_day, requests_made, requests_made, current_day, int(now // 3600), int(now // 60),
+              tokens.get('minute'), tokens.get('hourly'), tokens.get('daily'), now, blocked_until,
+              json.dumps(windows), *params))
+
+# Shared limiters keyed by (translation, API key), so concurrent fetchers draw from
+# the same quota. The key is None for the translation-wide limiter used when a
+# translation has a single key; per-key limiters exist only for key pools.
+RATE_LIMITERS: Dict[Tuple[str, Optional[str]], RateLimiter] = {}
+
+def get_rate_limiter(conn: sqlite3.Connection, translation: str,
+                     api_key: Optional[str] = None) -> Optional[RateLimiter]:
+    """Return the shared rate limiter for a translation, loading it on first use.
+
+    If `api_key` has its own limiter (see get_key_rate_limiter) that one is
+    returned; otherwise the translation-wide limiter is.
+    """
+    with DB_LOCK:
+        limiter = RATE_LIMITERS.get((translation, api_key)) if api_key else None
+        if limiter is None:
+            limiter = RATE_LIMITERS.get((translation, None))
+        if limiter is None:
+            limiter = RateLimiter(translation)
+            if not limiter.load(conn):
+                return None
+            RATE_LIMITERS[(translation, None)] = limiter
+        return limiter
+
+def get_key_rate_limiter(conn: sqlite3.Connection, translation: str, api_key: str) -> Optional[RateLimiter]:
+    """Return the limiter tracking one key of a translation's key pool, loading it on first use."""
+    with DB_LOCK:
+        limiter = RATE_LIMITERS.get((translation, api_key))
+        if limiter is None:
+            limiter = RateLimiter(translation, api_key)
+            if not limiter.load(conn):
+                return None
+            RATE_LIMITERS[(translation, api_key)] = limiter
+        return limiter
+
+def persist_rate_limiters(conn: sqlite3.Connection) -> None:
+    """Write every loaded limiter's state to api_tracking and commit (used at shutdown)."""
+    with DB_LOCK:
+        for limiter in RATE_LIMITERS.values():
+            limiter.persist(conn)
         conn.commit()
-        
-    cursor.execute(
-        'SELECT request_count, last_request_hour, last_request_day, minute_request_count, last_request_minute FROM api_tracking WHERE translation_id = ?',
-        (translation_id,)
-    )
-    request_count, last_hour, last_day, minute_count, last_minute = cursor.fetchone()
-
-    # Reset counters if time periods have changed
-    if current_day != last_day:
-        cursor.execute(
-            'UPDATE api_tracking SET request_count = 0, last_request_day = ?, last_request_hour = ?, last_request_minute = ?, minute_request_count = 0 WHERE translation_id = ?',
-            (current_day, current_hour, current_minute, translation_id)
-        )
-        request_count = 0
-        minute_count = 0
-    elif current_hour != last_hour:
-        # Reset the hourly counter when the hour changes.
-        cursor.execute(
-            'UPDATE api_tracking SET request_count = 0, last_request_hour = ?, last_request_minute = ?, minute_request_count = 0 WHERE translation_id = ?',
-            (current_hour, current_minute, translation_id)
-        )
-        request_count = 0
-        minute_count = 0
-    elif current_minute != last_minute:
-        # Reset the minute counter when the minute changes.
-        cursor.execute(
-            'UPDATE api_tracking SET last_request_minute = ?, minute_request_count = 0 WHERE translation_id = ?',
-            (current_minute, translation_id)
-        )
-        minute_count = 0
 
-    # Check all rate limits
-    if request_count >= daily_limit:
-        logging.warning(f"Daily API request limit ({daily_limit}) reached for {translation}. Please try again tomorrow.")
-        return False
-    elif request_count >= hourly_limit:
-        logging.warning(f"Hourly API request limit ({hourly_limit}) reached for {translation}. Please try again later.")
-        return False
-    elif minute_count >= minute_limit:
-        logging.warning(f"Per-minute API request limit ({minute_limit}) reached for {translation}. Please try again in a minute.")
+def check_rate_limit(conn: sqlite3.Connection, translation: str, api_key: Optional[str] = None) -> bool:
+    """Check API rate limits for a specific translation (and key, for key pools).
+
+    The decision is made in memory by the RateLimiter and never touches the
+    database; limiter state is persisted by the loader's checkpoints and at
+    shutdown. Safe to call from concurrent fetch workers sharing one connection.
+    """
+    if translation not in RATE_LIMITS:
+        logging.error(f"No rate limits defined for {translation}.")
         return False
 
-    # Increment all counters
-    cursor.execute(
-        'UPDATE api_tracking SET request_count = request_count + 1, minute_request_count = minute_request_count + 1 WHERE translation_id = ?',
-        (translation_id,)
-    )
-    conn.commit()
-    return True
+    with METRICS.timed('rate_limit', translation):
+        limiter = get_rate_limiter(conn, translation, api_key)
+        if limiter is None:
+            return False
 
-# Create a session to reuse HTTP connections for performance.
-session = requests.Session()
+        if not limiter.try_acquire():
+            METRICS.inc('throttle_waits_total', translation=translation, source='local')
+            period = limiter.exhausted_period()
+            if period:
+                log_sampled(f"limit:{translation}:{period}", logging.WARNING,
+                            f"{period.capitalize()} request limit ({RATE_LIMITS[translation][period]}) reached for {translation}. "
+                            f"Next request allowed in {limiter.time_until_available():.1f} seconds.")
+            else:
+                log_sampled(f"paused:{translation}", logging.WARNING,
+                            f"Requests for {translation} are paused by the API for another {limiter.time_until_available():.1f} seconds.")
+            return False
+        return True
 
-# Registry for translation-specific response processors
-RESPONSE_PROCESSORS = {}
+# How long a pooled key that the API rejects as unauthorized (401/403) is kept
+# out of rotation.
+UNAUTHORIZED_KEY_COOLDOWN = 3600
 
-def register_response_processor(translation_code: str):
-    """Decorator to register a translation-specific response processor."""
-    def decorator(func):
-        RESPONSE_PROCESSORS[translation_code] = func
-        return func
-    return decorator
+# Environment variable holding a comma-separated key pool for a translation.
+API_KEYS_ENV = '{translation}_API_KEYS'
 
-@register_response_processor('ESV')
-def process_esv_response(data: Dict[str, Any], translation: str) -> Dict[str, Any]:
-    """Process ESV API response into a list of individual verse texts with metadata.
-    
-    ESV API response is structured with:
-    - passages: List of text passages with verse numbers in brackets
-    - passage_meta: Metadata about the passages
-    - parsed: Parsed verse references
-    - query: Original query text
-    - canonical: Canonical reference
-    
-    Returns a dictionary containing:
-    - texts: List of individual verse texts with verse indicators removed
-    - metadata: Dictionary with verse IDs and other metadata from the API
+class ApiKeyPool:
+    """The API keys available for one translation, each drawing on its own quota.
+
+    A single key uses the translation-wide limiter in api_tracking, exactly
+    as before pools existed. With several keys every key gets its own
+    RateLimiter persisted in api_key_usage, and select_key() hands out the
+    key with the most budget left, so throughput grows with the number of
+    keys. A key that is throttled (429) or rejected (401/403) is put into
+    cooldown through its limiter's defer().
+
+    The pool offers the same waiting interface as RateLimiter, aggregated
+    over its keys, so the scheduler and fetch workers can treat it as one.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, translation: str, keys: List[str]):
+        self.translation = translation
+        keys = list(dict.fromkeys(key for key in keys if key))
+        self.limiters = {}
+        for key in keys:
+            limiter = (get_key_rate_limiter(conn, translation, key) if len(keys) > 1
+                       else get_rate_limiter(conn, translation))
+            if limiter is not None:
+                self.limiters[key] = limiter
+
+    def __len__(self) -> int:
+        return len(self.limiters)
+
+    def select_key(self) -> Optional[str]:
+        """The key with the most remaining budget that may send a request now, if any."""
+        ready = [key for key, limiter in self.limiters.items() if limiter.time_until_available() <= 0]
+        if not ready:
+            return None
+        return max(ready, key=lambda key: self.limiters[key].remaining_fraction())
+
+    def cooldown(self, api_key: str, seconds: float) -> None:
+        """Keep a key out of rotation for `seconds` seconds."""
+        self.limiters[api_key].defer(seconds)
+
+    def describe_key(self, api_key: str) -> str:
+        return f"key {api_key_id(api_key)[:8]}" if len(self.limiters) > 1 else "key"
+
+    def time_until_available(self) -> float:
+        return min((limiter.time_until_available() for limiter in self.limiters.values()), default=float('inf'))
+
+    def time_until_tokens(self, count: float) -> float:
+        share = math.ceil(count / max(1, len(self.limiters)))
+        return min((limiter.time_until_tokens(share) for limiter in self.limiters.values()), default=float('inf'))
+
+    def remaining_fraction(self) -> float:
+        fractions = [limiter.remaining_fraction() for limiter in self.limiters.values()]
+        return sum(fractions) / len(fractions) if fractions else 0.0
+
+    def spare_tokens(self, share: float) -> int:
+        return sum(limiter.spare_tokens(share) for limiter in self.limiters.values())
+
+    def estimate_duration(self, request_count: int) -> float:
+        share = math.ceil(request_count / max(1, len(self.limiters)))
+        return max((limiter.estimate_duration(share) for limiter in self.limiters.values()), default=0.0)
+
+    def wait_until_available(self) -> None:
+        wait_time = self.time_until_available()
+        while wait_time > 0:
+            with METRICS.timed('throttle_wait', self.translation):
+                time.sleep(wait_time)
+            wait_time = self.time_until_available()
+
+    def persist(self, conn: sqlite3.Connection) -> None:
+        for limiter in self.limiters.values():
+            limiter.persist(conn)
+
+def load_api_keys(translation: str, keys_file: Optional[str] = None) -> List[str]:
+    """Collect the key pool for a translation from a keys file and the environment.
+
+    The keys file is JSON mapping translation codes to a key or a list of
+    keys, e.g. {"ESV": ["key1", "key2"], "NIV": "key3"}. Keys from the
+    <TRANSLATION>_API_KEYS environment variable (comma-separated) are added.
+    """
+    keys = []
+    if keys_file:
+        try:
+            with open(keys_file, 'r', encoding='utf-8') as f:
+                configured = json.load(f).get(translation, [])
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not read API keys from {keys_file}: {e}")
+            configured = []
+        keys.extend([configured] if isinstance(configured, str) else configured)
+    keys.extend(os.environ.get(API_KEYS_ENV.format(translation=translation), '').split(','))
+    return list(dict.fromkeys(key.strip() for key in keys if key and key.strip()))
+
+# Create a session to reuse HTTP connections for performance.
+session = requests.Session()
+
+# Cap on the API calls this process may make (see limit_requests); None means no cap.
+max_requests = None
+requests_sent = 0
+requests_sent_lock = threading.Lock()
+
+def limit_requests(count: Optional[int]) -> None:
+    """Stop sending API calls after `count` more (None removes the cap)."""
+    global max_requests, requests_sent
+    with requests_sent_lock:
+        max_requests = count
+        requests_sent = 0
+
+def claim_request() -> bool:
+    """Count one API call against the cap; False if the cap has been reached."""
+    global requests_sent
+    with requests_sent_lock:
+        if max_requests is not None and requests_sent >= max_requests:
+            return False
+        requests_sent += 1
+        return True
+
+def requests_remaining() -> float:
+    with requests_sent_lock:
+        return float('inf') if max_requests is None else max_requests - requests_sent
+
+# (connect, read) timeout in seconds for every API request, so a stuck socket cannot hang a worker.
+REQUEST_TIMEOUT = (5, 30)
+
+# Retry policy for transient failures (5xx, timeouts, dropped connections).
+MAX_TRANSIENT_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+# HTTP statuses worth retrying; anything else that is not 200 or 429 is fatal.
+TRANSIENT_STATUS_CODES = {408, 500, 502, 503, 504}
+
+# On-disk cache of raw API responses, used to rebuild verses without spending quota.
+RESPONSE_CACHE_DIR = 'response_cache'
+RESPONSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RESPONSE_CACHE_MAX_AGE_DAYS = 180
+
+# Request parameters that carry credentials and must not affect (or be stored in) cache keys.
+CACHE_EXCLUDED_PARAMS = {'apiKey'}
+
+class ResponseCache:
+    """Content-addressed store of raw API response bodies.
+
+    Entries are keyed by the SHA-256 of the translation, endpoint and
+    normalized request parameters, and stored gzip-compressed as
+    <directory>/<translation>/<key[:2]>/<key>.json.gz together with the
+    reference they answer. evict() enforces a maximum age and total size,
+    dropping the oldest entries first.
+    """
+
+    def __init__(self, directory: str = RESPONSE_CACHE_DIR, max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 max_age_days: float = RESPONSE_CACHE_MAX_AGE_DAYS, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.enabled = enabled
+
+    @staticmethod
+    def normalize_params(params: Dict[str, Any]) -> Dict[str, str]:
+        return {key: str(value).strip() for key, value in sorted(params.items())
+                if key not in CACHE_EXCLUDED_PARAMS}
+
+    def key(self, translation: str, endpoint: str, params: Dict[str, Any]) -> str:
+        identity = json.dumps([translation, endpoint.rstrip('/'), self.normalize_params(params)], sort_keys=True)
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def path(self, translation: str, key: str) -> str:
+        return os.path.join(self.directory, translation, key[:2], f"{key}.json.gz")
+
+    def put(self, translation: str, endpoint: str, params: Dict[str, Any], reference: str, body: str) -> None:
+        """Store a raw response body; safe to call from concurrent fetch workers."""
+        if not self.enabled:
+            return
+        key = self.key(translation, endpoint, params)
+        path = self.path(translation, key)
+        entry = {
+            'translation': translation,
+            'endpoint': endpoint,
+            'params': self.normalize_params(params),
+            'reference': reference,
+            'fetched_at': time.time(),
+            'body': body
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not cache response for {reference} ({translation}): {e}")
+
+    def entries(self, translation: str):
+        """Yield cached entries for a translation, oldest first."""
+        paths = glob.glob(os.path.join(self.directory, translation, '*', '*.json.gz'))
+        for path in sorted(paths, key=os.path.getmtime):
+            try:
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    yield json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Skipping unreadable cache entry {path}: {e}")
+
+    def evict(self) -> None:
+        """Remove entries older than max_age, then the oldest entries until under max_bytes."""
+        files = []
+        for path in glob.glob(os.path.join(self.directory, '*', '*', '*.json.gz')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        now = time.time()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            logging.info(f"Evicted {removed} cached responses; cache now holds {total / 1048576:.1f} MiB.")
+
+response_cache = ResponseCache()
+
+def configure_response_cache(directory: str = RESPONSE_CACHE_DIR, enabled: bool = True) -> None:
+    """Point the shared response cache at a directory, or disable it."""
+    global response_cache
+    response_cache = ResponseCache(directory, enabled=enabled)
+
+class FetchResult(NamedTuple):
+    """Outcome of one API request.
+
+    status is one of 'ok', 'not_modified' (HTTP 304 to a conditional
+    request), 'throttled' (local limiter or HTTP 429), 'transient' (worth
+    retrying with backoff) or 'fatal' (retrying will not help). retry_after,
+    when set, is how many seconds to wait before the next attempt.
+    validators holds the response's ETag and Last-Modified headers, if any.
+    """
+    status: str
+    data: Optional[Dict[str, Any]] = None
+    retry_after: Optional[float] = None
+    error: Optional[str] = None
+    validators: Optional[Dict[str, str]] = None
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def throttled_result(conn: sqlite3.Connection, translation: str, api_key: Optional[str] = None) -> FetchResult:
+    """Result for a request the local rate limiter refused, with the exact wait."""
+    limiter = get_rate_limiter(conn, translation, api_key)
+    wait_time = limiter.time_until_available() if limiter else None
+    return FetchResult('throttled', retry_after=wait_time, error='local rate limit reached')
+
+# Response headers kept to make later requests for the same range conditional,
+# with the request header each one is sent back in.
+CONDITIONAL_HEADERS = {'ETag': 'If-None-Match', 'Last-Modified': 'If-Modified-Since'}
+
+def send_request(translation: str, reference: str, endpoint: str, params: Dict[str, Any],
+                 headers: Optional[Dict[str, str]] = None,
+                 validators: Optional[Dict[str, str]] = None) -> FetchResult:
+    """Send one API request and classify the response.
+
+    Successful responses are passed through the translation's registered
+    response processor. With validators from an earlier response the request
+    is made conditional (If-None-Match / If-Modified-Since), and an
+    unchanged range comes back as 'not_modified' without a body.
+    """
+    if validators:
+        headers = dict(headers or {})
+        headers.update({CONDITIONAL_HEADERS[name]: value for name, value in validators.items()
+                        if name in CONDITIONAL_HEADERS})
+    if not claim_request():
+        return FetchResult('fatal', error=f"request limit ({max_requests}) reached")
+    try:
+        with METRICS.timed('http', translation):
+            response = session.get(endpoint, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+    except (requests.Timeout, requests.ConnectionError) as e:
+        METRICS.inc('requests_total', translation=translation, code='error')
+        logging.warning(f"Transient error fetching {reference} ({translation}): {e}")
+        return FetchResult('transient', error=str(e))
+    except Exception as e:
+        METRICS.inc('requests_total', translation=translation, code='error')
+        logging.error(f"Exception occurred while fetching {translation} text: {e}")
+        return FetchResult('fatal', error=str(e))
+
+    METRICS.inc('requests_total', translation=translation, code=str(response.status_code))
+    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+    response_validators = {name: response.headers[name] for name in CONDITIONAL_HEADERS if response.headers.get(name)}
+    if response.status_code == 304:
+        return FetchResult('not_modified', validators=response_validators or validators)
+    if response.status_code == 200:
+        METRICS.inc('response_bytes_total', len(response.content), translation=translation)
+        response_cache.put(translation, endpoint, params, reference, response.text)
+        try:
+            with METRICS.timed('decode', translation):
+                data = response.json()
+            with METRICS.timed('process', translation):
+                return FetchResult('ok', data=RESPONSE_PROCESSORS[translation](data, translation),
+                                   validators=response_validators)
+        except Exception as e:
+            logging.error(f"Could not process response for {reference} ({translation}): {e}")
+            return FetchResult('fatal', error=str(e))
+    if response.status_code == 429:
+        METRICS.inc('throttle_waits_total', translation=translation, source='http')
+        log_sampled(f"429:{translation}", logging.WARNING,
+                    f"Throttled by the {translation} API for {reference}; retry after {retry_after if retry_after is not None else 'unknown'} seconds.")
+        return FetchResult('throttled', retry_after=retry_after, error='HTTP 429')
+    if response.status_code in TRANSIENT_STATUS_CODES:
+        logging.warning(f"Transient error fetching {reference} ({translation}): {response.status_code}")
+        return FetchResult('transient', retry_after=retry_after, error=f"HTTP {response.status_code}")
+    logging.error(f"Error fetching {reference} ({translation}): {response.status_code}")
+    return FetchResult('fatal', error=f"HTTP {response.status_code}")
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given (1-based) retry attempt."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+# Registry for translation-specific response processors
+RESPONSE_PROCESSORS = {}
+
+def register_response_processor(translation_code: str):
+    """Decorator to register a translation-specific response processor."""
+    def decorator(func):
+        RESPONSE_PROCESSORS[translation_code] = func
+        return func
+    return decorator
+
+def esv_verse_ids(start_id: int, end_id: int) -> Dict[Tuple[int, int], int]:
+    """Expand an ESV parsed range of BBCCCVVV IDs into {(chapter, verse): id}.
+
+    The range may span chapters, so IDs are generated by walking the book's
+    chapter lengths rather than counting up from start_id.
+    """
+    books = list(bible_structure.values())
+    book_index, start_chapter, start_verse = start_id // 1000000, start_id // 1000 % 1000, start_id % 1000
+    end_chapter, end_verse = end_id // 1000 % 1000, end_id % 1000
+    if not 1 <= book_index <= len(books):
+        return {}
+    chapters = books[book_index - 1]
+    verse_ids = {}
+    for chapter in range(start_chapter, min(end_chapter, len(chapters)) + 1):
+        first = start_verse if chapter == start_chapter else 1
+        last = end_verse if chapter == end_chapter else chapters[chapter - 1]
+        for verse in range(first, last + 1):
+            verse_ids[(chapter, verse)] = book_index * 1000000 + chapter * 1000 + verse
+    return verse_ids
+
+# Patterns used by the response processors, compiled once at import.
+ESV_VERSE_MARKER = re.compile(r'\[(\d+)\]')
+HTML_TAG = re.compile(r'<[^>]+>')
+
+@functools.lru_cache(maxsize=None)
+def translation_suffix_pattern(translation: str) -> re.Pattern:
+    """Compiled pattern for the trailing " (ESV)"-style marker, built once per translation."""
+    return re.compile(r'\s*\(' + re.escape(translation) + r'\)\s*$')
+
+def collapse_whitespace(text: str) -> str:
+    return ' '.join(text.split())
+
+def iter_esv_verses(passage: str, translation: str) -> Iterator[Tuple[int, str]]:
+    """Split an ESV passage into (verse_number, text) pairs in a single scan.
+
+    Anything before the first bracketed verse number (the passage header) is
+    skipped, and the trailing "(ESV)" marker is removed from the last verse.
     """
-    full_text = data['passages'][0].strip()
+    passage = translation_suffix_pattern(translation).sub('', passage)
+    markers = ESV_VERSE_MARKER.finditer(passage)
+    current = next(markers, None)
+    while current is not None:
+        following = next(markers, None)
+        end = following.start() if following else len(passage)
+        yield int(current.group(1)), collapse_whitespace(passage[current.end():end])
+        current = following
+
+@register_response_processor('ESV')
+def process_esv_response(data: Dict[str, Any], translation: str) -> Dict[str, Any]:
+    """Process ESV API response into a list of individual verse texts with metadata.
     
-    # Remove header if present.
-    lines = full_text.splitlines()
-    if lines and not re.match(r'^\s*\[', lines[0]):
-        lines = lines[1:]
-    cleaned_text = "\n".join(lines).strip()
+    ESV API response is structured with:
+    - passages: List of text passages with verse numbers in brackets
+    - passage_meta: Metadata about the passages
+    - parsed: Parsed verse references
+    - query: Original query text
+    - canonical: Canonical reference
     
-    # Split the text into verse segments based on leading bracketed numbers.
-    verse_segments = re.split(r'(?=\[\d+\])', cleaned_text)
+    Returns a dictionary containing:
+    - texts: List of individual verse texts with verse indicators removed
+    - verse_numbers: The bracketed verse number of each text
+    - metadata: Dictionary with verse IDs and other metadata from the API
+    """
+    verse_numbers = []
     verse_texts = []
-    for segment in verse_segments:
-        segment = segment.strip()
-        if not segment:
-            continue
-        # Remove leading verse indicator (e.g. "[35]")
-        cleaned_line = re.sub(r'^\[\d+\]\s*', '', segment)
-        # Remove trailing e.g. " (ESV)" if present.
-        cleaned_line = re.sub(r'\s*\(' + translation + r'\)$', '', cleaned_line)
-        # Collapse any internal newlines/extra whitespace.
-        cleaned_line = re.sub(r'\s+', ' ', cleaned_line).strip()
-        verse_texts.append(cleaned_line)
+    for verse_number, verse_text in iter_esv_verses(data['passages'][0], translation):
+        verse_numbers.append(verse_number)
+        verse_texts.append(verse_text)
     
     # Extract metadata from the API response
     metadata = {
@@ -657,12 +2064,12 @@ def process_esv_response(data: Dict[str, Any], translation: str) -> Dict[str, An
             # Map the start and end verse IDs to the verses
             if len(parsed) >= 2:
                 start_id, end_id = parsed
-                verse_range = range(start_id, end_id + 1)
-                verse_ids = {v+1: id for v, id in enumerate(verse_range)}
+                verse_ids = esv_verse_ids(start_id, end_id)
         metadata['verse_ids'] = verse_ids
     
     return {
         'texts': verse_texts,
+        'verse_numbers': verse_numbers,
         'metadata': metadata
     }
 
@@ -678,20 +2085,19 @@ def process_kjv_response(data: Dict[str, Any], translation: str) -> Dict[str, An
     
     Returns a dictionary containing:
     - texts: List of individual verse texts
+    - verse_numbers: The verse number of each text
     - metadata: Dictionary with reference information
     """
     # Extract individual verses from the response
     verse_texts = []
+    verse_numbers = []
     verse_ids = {}
     
     # The KJV API returns individual verses already separated
-    for i, verse in enumerate(data['verses']):
+    for verse in data['verses']:
         verse_number = verse['number']
-        verse_text = verse['text']
-        
-        # Clean up the verse text
-        verse_text = re.sub(r'\s+', ' ', verse_text).strip()
-        verse_texts.append(verse_text)
+        verse_texts.append(collapse_whitespace(verse['text']))
+        verse_numbers.append(verse_number)
         
         # Store verse ID if available
         if 'id' in verse:
@@ -707,6 +2113,7 @@ def process_kjv_response(data: Dict[str, Any], translation: str) -> Dict[str, An
     
     return {
         'texts': verse_texts,
+        'verse_numbers': verse_numbers,
         'metadata': metadata
     }
 
@@ -721,10 +2128,12 @@ def process_niv_response(data: Dict[str, Any], translation: str) -> Dict[str, An
     
     Returns a dictionary containing:
     - texts: List of individual verse texts
+    - verse_numbers: The verse number of each text (None if the API gave none)
     - metadata: Dictionary with reference information
     """
     # Extract individual verses from the response
     verse_texts = []
+    verse_numbers = []
     metadata = {
         'passage': data.get('metadata', {}).get('passage'),
         'version': data.get('metadata', {}).get('version'),
@@ -737,14 +2146,17 @@ def process_niv_response(data: Dict[str, Any], translation: str) -> Dict[str, An
         verse_text = verse.get('content', '')
         
         # Clean up the verse text - remove HTML tags if present
-        verse_text = re.sub(r'<[^>]+>', '', verse_text)
-        verse_text = re.sub(r'\s+', ' ', verse_text).strip()
+        if '<' in verse_text:
+            verse_text = HTML_TAG.sub('', verse_text)
+        verse_text = collapse_whitespace(verse_text)
         
         if verse_text:
             verse_texts.append(verse_text)
+            verse_numbers.append(verse.get('number'))
     
     return {
         'texts': verse_texts,
+        'verse_numbers': verse_numbers,
         'metadata': metadata
     }
 
@@ -760,7 +2172,9 @@ def register_translation_fetcher(translation_code: str):
 
 @register_translation_fetcher('ESV')
 def fetch_esv_verses(book_name: str, chapter_number: int, verse_start: int, verse_end: int, 
-                   api_key: str, conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+                   api_key: str, conn: sqlite3.Connection,
+                   end_chapter: Optional[int] = None,
+                   validators: Optional[Dict[str, str]] = None) -> FetchResult:
     """Fetch ESV Bible verses with translation-specific handling.
     
     ESV API has the following characteristics:
@@ -774,18 +2188,20 @@ def fetch_esv_verses(book_name: str, chapter_number: int, verse_start: int, vers
         book_name: Name of the book (e.g., "Genesis")
         chapter_number: Chapter number
         verse_start: Starting verse number
-        verse_end: Ending verse number
+        verse_end: Ending verse number (in end_chapter if given)
         api_key: The ESV API key
         conn: Database connection for tracking API usage
+        end_chapter: Last chapter of a multi-chapter range, if any
+        validators: ETag/Last-Modified of an earlier response, for a conditional request
         
     Returns:
-        Dictionary with verse texts and metadata, or None if failed
+        FetchResult whose data holds the verse texts and metadata
     """
     translation = 'ESV'
     
-    # If rate limit is reached, return None to signal we need to wait.
-    if not check_rate_limit(conn, translation):
-        return None
+    # If rate limit is reached, report how long to wait.
+    if not check_rate_limit(conn, translation, api_key):
+        return throttled_result(conn, translation, api_key)
     
     translation_config = TRANSLATIONS[translation]
     endpoint = translation_config['api_endpoint']
@@ -795,24 +2211,17 @@ def fetch_esv_verses(book_name: str, chapter_number: int, verse_start: int, vers
     # Start with API-specific parameters from config
     params = dict(translation_config.get('params', {}))
     # Add request-specific parameters
-    params["q"] = f"{book_name} {chapter_number}:{verse_start}-{verse_end}"
+    reference = format_reference(book_name, chapter_number, verse_start, verse_end, end_chapter)
+    params["q"] = reference
     
-    try:
-        response = session.get(endpoint, headers=headers, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            # Use the processor for ESV
-            return process_esv_response(data, translation)
-        else:
-            logging.error(f"Error fetching {book_name} {chapter_number}:{verse_start}-{verse_end} ({translation}): {response.status_code}")
-            return None
-    except Exception as e:
-        logging.error(f"Exception occurred while fetching {translation} text: {e}")
-        return None
+    # Responses go through the ESV processor
+    return send_request(translation, reference, endpoint, params, headers, validators)
 
 @register_translation_fetcher('KJV')
 def fetch_kjv_verses(book_name: str, chapter_number: int, verse_start: int, verse_end: int, 
-                    api_key: str, conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+                    api_key: str, conn: sqlite3.Connection,
+                    end_chapter: Optional[int] = None,
+                    validators: Optional[Dict[str, str]] = None) -> FetchResult:
     """Fetch KJV Bible verses with translation-specific handling.
     
     KJV API has the following characteristics:
@@ -826,18 +2235,20 @@ def fetch_kjv_verses(book_name: str, chapter_number: int, verse_start: int, vers
         book_name: Name of the book (e.g., "Genesis")
         chapter_number: Chapter number
         verse_start: Starting verse number
-        verse_end: Ending verse number
+        verse_end: Ending verse number (in end_chapter if given)
         api_key: The KJV API key
         conn: Database connection for tracking API usage
+        end_chapter: Last chapter of a multi-chapter range, if any
+        validators: ETag/Last-Modified of an earlier response, for a conditional request
         
     Returns:
-        Dictionary with verse texts and metadata, or None if failed
+        FetchResult whose data holds the verse texts and metadata
     """
     translation = 'KJV'
     
-    # If rate limit is reached, return None to signal we need to wait.
-    if not check_rate_limit(conn, translation):
-        return None
+    # If rate limit is reached, report how long to wait.
+    if not check_rate_limit(conn, translation, api_key):
+        return throttled_result(conn, translation, api_key)
     
     translation_config = TRANSLATIONS[translation]
     endpoint = translation_config['api_endpoint']
@@ -846,25 +2257,17 @@ def fetch_kjv_verses(book_name: str, chapter_number: int, verse_start: int, vers
     # For KJV API, the API key is passed as a query parameter, not in header
     params = dict(translation_config.get('params', {}))
     params["apiKey"] = api_key
-    params["reference"] = f"{book_name} {chapter_number}:{verse_start}-{verse_end}"
+    reference = format_reference(book_name, chapter_number, verse_start, verse_end, end_chapter)
+    params["reference"] = reference
     
-    try:
-        # KJV API doesn't use auth headers like ESV, so we don't need headers here
-        response = session.get(endpoint, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            # Use the KJV-specific processor
-            return process_kjv_response(data, translation)
-        else:
-            logging.error(f"Error fetching {book_name} {chapter_number}:{verse_start}-{verse_end} ({translation}): {response.status_code}")
-            return None
-    except Exception as e:
-        logging.error(f"Exception occurred while fetching {translation} text: {e}")
-        return None
+    # KJV API doesn't use auth headers like ESV, so we don't need headers here
+    return send_request(translation, reference, endpoint, params, validators=validators)
 
 @register_translation_fetcher('NIV')
 def fetch_niv_verses(book_name: str, chapter_number: int, verse_start: int, verse_end: int, 
-                    api_key: str, conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+                    api_key: str, conn: sqlite3.Connection,
+                    end_chapter: Optional[int] = None,
+                    validators: Optional[Dict[str, str]] = None) -> FetchResult:
     """Fetch NIV Bible verses with translation-specific handling.
     
     NIV API has the following characteristics:
@@ -878,18 +2281,20 @@ def fetch_niv_verses(book_name: str, chapter_number: int, verse_start: int, vers
         book_name: Name of the book (e.g., "Genesis")
         chapter_number: Chapter number
         verse_start: Starting verse number
-        verse_end: Ending verse number
+        verse_end: Ending verse number (in end_chapter if given)
         api_key: The NIV API key (access token)
         conn: Database connection for tracking API usage
+        end_chapter: Last chapter of a multi-chapter range, if any
+        validators: ETag/Last-Modified of an earlier response, for a conditional request
         
     Returns:
-        Dictionary with verse texts and metadata, or None if failed
+        FetchResult whose data holds the verse texts and metadata
     """
     translation = 'NIV'
     
     # NIV has the most restrictive rate limits
-    if not check_rate_limit(conn, translation):
-        return None
+    if not check_rate_limit(conn, translation, api_key):
+        return throttled_result(conn, translation, api_key)
     
     translation_config = TRANSLATIONS[translation]
     endpoint = translation_config['api_endpoint']
@@ -900,238 +2305,2230 @@ def fetch_niv_verses(book_name: str, chapter_number: int, verse_start: int, vers
     
     # NIV API specific parameters
     params = dict(translation_config.get('params', {}))
-    params["passage"] = f"{book_name} {chapter_number}:{verse_start}-{verse_end}"
+    reference = format_reference(book_name, chapter_number, verse_start, verse_end, end_chapter)
+    params["passage"] = reference
     
-    try:
-        response = session.get(endpoint, headers=headers, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            # Use the NIV-specific processor
-            return process_niv_response(data, translation)
-        else:
-            logging.error(f"Error fetching {book_name} {chapter_number}:{verse_start}-{verse_end} ({translation}): {response.status_code}")
-            return None
-    except Exception as e:
-        logging.error(f"Exception occurred while fetching {translation} text: {e}")
-        return None
+    # Responses go through the NIV-specific processor
+    return send_request(translation, reference, endpoint, params, headers, validators)
 
 def fetch_verses_text(book_name: str, chapter_number: int, verse_start: int, verse_end: int, 
-                     translation: str, api_key: str, conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+                     translation: str, api_key: str, conn: sqlite3.Connection,
+                     end_chapter: Optional[int] = None,
+                     validators: Optional[Dict[str, str]] = None) -> FetchResult:
     """Fetch verses text from the appropriate API based on the translation."""
     if translation not in TRANSLATIONS:
         logging.error(f"Translation {translation} not supported.")
-        return None
+        return FetchResult('fatal', error=f"translation {translation} not supported")
     
     if translation not in TRANSLATION_FETCHERS:
         logging.error(f"No fetch function defined for {translation}.")
-        return None
+        return FetchResult('fatal', error=f"no fetch function defined for {translation}")
     
     # Use the registered translation-specific fetcher
     fetcher = TRANSLATION_FETCHERS[translation]
-    return fetcher(book_name, chapter_number, verse_start, verse_end, api_key, conn)
+    return fetcher(book_name, chapter_number, verse_start, verse_end, api_key, conn, end_chapter=end_chapter,
+                   validators=validators)
 
-def populate_translation(translation: str, api_key: str) -> None:
-    """Populate verses for a specific translation using its API."""
-    if translation not in TRANSLATIONS:
-        logging.error(f"Translation {translation} not supported.")
-        return
+def configure_session_pool(pool_size: int) -> None:
+    """Size the shared HTTP session's connection pool for concurrent fetching."""
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+class PlannedRequest(NamedTuple):
+    """One API request produced by the planner.
+
+    The request covers the reference range from (start_chapter, start_verse)
+    to (end_chapter, end_verse) within one book. `slots` lists the
+    (chapter_number, verse_number) pairs expected back in the response, in
+    order, and `missing` the subset of them that are still placeholders.
+    """
+    book_name: str
+    start_chapter: int
+    start_verse: int
+    end_chapter: int
+    end_verse: int
+    slots: List[Tuple[int, int]]
+    missing: List[Tuple[int, int]]
+
+def format_reference(book_name: str, chapter_number: int, verse_start: int, verse_end: int,
+                     end_chapter: Optional[int] = None) -> str:
+    """Build the passage reference sent to the APIs, e.g. "Genesis 1-3" or "John 3:16-4:2"."""
+    if end_chapter is None or end_chapter == chapter_number:
+        return f"{book_name} {chapter_number}:{verse_start}-{verse_end}"
+    chapters = bible_structure.get(book_name, [])
+    if verse_start == 1 and end_chapter <= len(chapters) and verse_end == chapters[end_chapter - 1]:
+        return f"{book_name} {chapter_number}-{end_chapter}"
+    return f"{book_name} {chapter_number}:{verse_start}-{end_chapter}:{verse_end}"
+
+def request_verse_limit(translation: str, book_total: int) -> int:
+    """Largest number of verses (omitted ones included) a single request may span."""
+    max_verses = TRANSLATIONS[translation].get('max_verses_per_request', 500)
+    half_book_limit = max(book_total // 2, 1)
+    return min(max_verses, half_book_limit)
+
+def plan_requests(translation: str, missing: Dict[str, set]) -> List[PlannedRequest]:
+    """Pack the missing verses of a translation into the fewest possible requests.
+
+    For every book, the canonical verse sequence from the translation's
+    structure is walked once. A request starts at the first missing verse and
+    greedily extends as far as the translation's per-request verse limit
+    allows (crossing chapter boundaries when the API accepts multi-chapter
+    references), then is trimmed back to its last missing verse. Greedy
+    covering is optimal for fixed-length windows, so no plan with fewer
+    requests exists under the same limit.
+
+    Args:
+        translation: The translation code
+        missing: {book_name: {(chapter_number, verse_number), ...}} placeholder verses
+
+    Returns:
+        Planned requests in canonical order
+    """
+    structure = TRANSLATION_DATA[translation].get('structure', bible_structure)
+    multi_chapter = TRANSLATIONS[translation].get('multi_chapter', False)
+    plan = []
+
+    for book_name, chapters in structure.items():
+        book_missing = missing.get(book_name)
+        if not book_missing:
+            continue
+        limit = request_verse_limit(translation, sum(chapters))
+        sequence = [(chapter, verse) for chapter, count in enumerate(chapters, start=1)
+                    for verse in range(1, count + 1)]
+
+        position = 0
+        while position < len(sequence):
+            if sequence[position] not in book_missing:
+                position += 1
+                continue
+            start = position
+            window_end = min(start + limit, len(sequence))
+            if not multi_chapter:
+                start_chapter = sequence[start][0]
+                window_end = start + min(window_end - start, chapters[start_chapter - 1] - sequence[start][1] + 1)
+            # Trim the window back to its last missing verse.
+            end = start
+            for index in range(start, window_end):
+                if sequence[index] in book_missing:
+                    end = index
+            span = sequence[start:end + 1]
+            slots = [(c, v) for c, v in span if not is_omitted(book_name, c, v, translation)]
+            plan.append(PlannedRequest(
+                book_name, span[0][0], span[0][1], span[-1][0], span[-1][1],
+                slots, [slot for slot in slots if slot in book_missing]
+            ))
+            position = end + 1
+    return plan
+
+def load_missing_verses(cursor: sqlite3.Cursor, translation_id: int) -> Dict[str, set]:
+    """Return {book_name: {(chapter_number, verse_number), ...}} for placeholder verses."""
+    # The literal PLACEHOLDER lets SQLite answer this from idx_verses_placeholder
+    # instead of scanning every verse of the translation.
+    cursor.execute(f"""
+        SELECT b.name, c.chapter_number, v.verse_number
+        FROM books b
+        JOIN chapters c ON c.book_id = b.book_id
+        JOIN verses v ON v.chapter_id = c.chapter_id
+        WHERE b.translation_id = ? AND v.text = '{PLACEHOLDER}'
+    """, (translation_id,))
+    missing = {}
+    for book_name, chapter_number, verse_number in cursor.fetchall():
+        missing.setdefault(book_name, set()).add((chapter_number, verse_number))
+    return missing
+
+def load_chapter_index(cursor: sqlite3.Cursor, translation_id: int) -> Dict[Tuple[str, int], Tuple]:
+    """Return {(book_name, chapter_number): (chapter_id, book_id, verse_count, metadata)}."""
+    cursor.execute("""
+        SELECT b.name, c.chapter_number, c.chapter_id, b.book_id, c.verse_count, c.metadata
+        FROM chapters c
+        JOIN books b ON c.book_id = b.book_id
+        WHERE b.translation_id = ?
+    """, (translation_id,))
+    return {(book_name, chapter_number): (chapter_id, book_id, verse_count, metadata)
+            for book_name, chapter_number, chapter_id, book_id, verse_count, metadata in cursor.fetchall()}
+
+def load_completed_verses(cursor: sqlite3.Cursor, translation: str, translation_id: int) -> Dict[str, set]:
+    """Return {book_name: {(chapter_number, verse_number), ...}} covered by the progress ledger."""
+    cursor.execute("""
+        SELECT book_name, start_chapter, start_verse, end_chapter, end_verse
+        FROM load_progress WHERE translation_id = ?
+    """, (translation_id,))
+    structure = TRANSLATION_DATA[translation].get('structure', bible_structure)
+    completed = {}
+    for book_name, start_chapter, start_verse, end_chapter, end_verse in cursor.fetchall():
+        chapters = structure.get(book_name, [])
+        slots = completed.setdefault(book_name, set())
+        for chapter_number in range(start_chapter, min(end_chapter, len(chapters)) + 1):
+            first = start_verse if chapter_number == start_chapter else 1
+            last = end_verse if chapter_number == end_chapter else chapters[chapter_number - 1]
+            slots.update((chapter_number, verse) for verse in range(first, last + 1))
+    return completed
+
+def record_progress(writer: 'VerseWriter', translation_id: int, request: PlannedRequest, verses_written: int) -> None:
+    """Queue a completed request for the progress ledger.
+
+    The row is held by the writer and inserted by the same flush as the
+    request's verses, so a committed ledger entry always has its text.
+    """
+    writer.add_progress((translation_id, request.book_name, request.start_chapter, request.start_verse,
+                         request.end_chapter, request.end_verse, verses_written, time.time()))
+
+def reset_progress(translation: str) -> None:
+    """Forget the progress ledger for a translation so every placeholder is requested again."""
+    with get_connection() as conn:
+        cursor = conn.execute("""
+            DELETE FROM load_progress WHERE translation_id =
+                (SELECT translation_id FROM translations WHERE abbreviation = ?)
+        """, (translation,))
+        logging.info(f"Cleared {cursor.rowcount} progress ledger entries for {translation}.")
+
+def build_translation_plan(cursor: sqlite3.Cursor, translation: str,
+                           translation_id: int) -> Tuple[List[PlannedRequest], Dict[Tuple[str, int], Tuple]]:
+    """Plan the remaining requests for a translation from the current database state.
+
+    Placeholders inside ranges the progress ledger already records as
+    completed are left out, so a range the API returned nothing for is not
+    requested again on every pass or restart (see reset_progress).
+    """
+    chapter_index = load_chapter_index(cursor, translation_id)
+    missing = load_missing_verses(cursor, translation_id)
+    completed = load_completed_verses(cursor, translation, translation_id)
+    skipped = 0
+    for book_name, slots in missing.items():
+        done = slots & completed.get(book_name, set())
+        skipped += len(done)
+        slots -= done
+    if skipped:
+        logging.warning(f"{skipped} {translation} verses are still placeholders although their range was already fetched; "
+                        f"use --reset-progress to request them again.")
+    return plan_requests(translation, missing), chapter_index
+
+def align_numbered_texts(slots: List[Tuple[int, int]], verse_numbers: List[int],
+                         verse_texts: List[str]) -> Iterator[Tuple[Tuple[int, int], str]]:
+    """Match texts carrying their own verse numbers to (chapter, verse) slots.
+
+    Verse numbers restart at each chapter, so a number not above the last
+    matched one moves on to the next chapter. Slots the response skips are
+    left unmatched, and texts with no slot (e.g. a verse this translation
+    omits but the API returned) are dropped, so neither shifts the rest.
+    """
+    position = 0
+    last = None
+    for number, text in zip(verse_numbers, verse_texts):
+        index = position
+        if last is None:
+            chapter = slots[index][0] if index < len(slots) else None
+        elif number > last[1]:
+            chapter = last[0]
+        else:
+            while index < len(slots) and slots[index][0] == last[0]:
+                index += 1
+            chapter = slots[index][0] if index < len(slots) else None
+        while index < len(slots) and slots[index][0] == chapter and slots[index][1] < number:
+            index += 1
+        if index < len(slots) and slots[index] == (chapter, number):
+            yield slots[index], text
+            last = slots[index]
+            position = index + 1
 
+def split_response(request: PlannedRequest, result: Dict[str, Any]) -> List[Tuple[int, int, str, Optional[str]]]:
+    """Map a response's texts back onto the request's (chapter, verse) slots.
+
+    When the processor reports each text's verse number the texts are
+    matched by number (see align_numbered_texts); otherwise they are taken
+    to be in canonical order without omitted verses, lining up with
+    request.slots. Only slots that are still placeholders are returned.
+
+    Returns:
+        List of (chapter_number, verse_number, text, verse_metadata_json) tuples
+    """
+    verse_texts = result.get('texts') or []
+    verse_numbers = result.get('verse_numbers')
+    metadata = result.get('metadata', {})
+    verse_ids = metadata.get('verse_ids') or {}
+    single_chapter = request.start_chapter == request.end_chapter
+
+    if len(verse_texts) != len(request.slots):
+        logging.warning(f"Expected {len(request.slots)} verses for {describe_request(request)} but got {len(verse_texts)}.")
+
+    if verse_numbers and len(verse_numbers) == len(verse_texts) and None not in verse_numbers:
+        matched = align_numbered_texts(request.slots, verse_numbers, verse_texts)
+    else:
+        matched = zip(request.slots, verse_texts)
+
+    missing = set(request.missing)
+    rows = []
+    for (chapter_number, verse_number), verse_text in matched:
+        if (chapter_number, verse_number) not in missing:
+            continue
+        # Verse IDs are keyed by (chapter, verse), or by verse number for single-chapter responses.
+        verse_id = verse_ids.get((chapter_number, verse_number))
+        if verse_id is None and single_chapter:
+            verse_id = verse_ids.get(verse_number)
+        verse_metadata = json.dumps({'verse_id': verse_id}) if verse_id is not None else None
+        rows.append((chapter_number, verse_number, verse_text.strip(), verse_metadata))
+    return rows
+
+def describe_request(request: PlannedRequest) -> str:
+    return format_reference(request.book_name, request.start_chapter, request.start_verse,
+                            request.end_verse, request.end_chapter)
+
+def fetch_planned_request(request: PlannedRequest, translation: str, keys: ApiKeyPool,
+                          conn: sqlite3.Connection, validators: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Perform one planned request; runs on a fetch worker thread.
+
+    No rows are written here. The result is handed back to the single writer
+    in populate_translations so SQLite only ever sees one writer.
+
+    Each attempt uses the pool key with the most budget left. Waits are
+    driven by the FetchResult status: throttling (local or HTTP 429) waits
+    exactly as long as the limiter or the Retry-After header requires, as
+    long as that is at most MAX_WORKER_WAIT; transient errors are retried
+    with jittered exponential backoff up to MAX_TRANSIENT_RETRIES times; a
+    pooled key rejected with 401/403 is put into cooldown and the request
+    retried with another key; other fatal errors give up immediately.
+    With validators the request is conditional (see send_request).
+
+    Returns:
+        Dictionary with the processed data (or None), whether the pass should
+        pause for the rate limit, the final FetchResult status and the
+        response's validators
+    """
+    outcome = {'result': None, 'rate_limited': False, 'status': None, 'validators': None}
+    attempt = 0
+    throttles = 0
     while True:
-        with sqlite3.connect(DB_NAME) as conn:
-            cursor = conn.cursor()
-            
-            # Get translation_id
-            cursor.execute("SELECT translation_id FROM translations WHERE abbreviation = ?", (translation,))
-            result = cursor.fetchone()
-            if not result:
-                logging.error(f"Translation {translation} not found in database. Please populate translations first.")
-                return
-            translation_id = result[0]
-            
-            # Check for remaining verses.
-            cursor.execute("""
-                SELECT COUNT(*) FROM verses v
-                JOIN chapters c ON v.chapter_id = c.chapter_id
-                JOIN books b ON c.book_id = b.book_id
-                WHERE b.translation_id = ? AND v.text = ?
-            """, (translation_id, PLACEHOLDER))
-            remaining = cursor.fetchone()[0]
-            if remaining == 0:
-                logging.info(f"All verses for {translation} have been fetched and updated.")
-                break
+        wait_time = keys.time_until_available()
+        if wait_time > MAX_WORKER_WAIT:
+            outcome['rate_limited'] = True
+            return outcome
+        keys.wait_until_available()
+        api_key = keys.select_key()
+        if api_key is None:
+            # Another worker took the last token; wait for the next one.
+            continue
+        fetched = fetch_verses_text(request.book_name, request.start_chapter, request.start_verse,
+                                    request.end_verse, translation, api_key, conn,
+                                    end_chapter=request.end_chapter, validators=validators)
+        outcome['status'] = fetched.status
+        if fetched.status in ('ok', 'not_modified'):
+            outcome['result'] = fetched.data
+            outcome['validators'] = fetched.validators
+            return outcome
+        if fetched.status == 'throttled':
+            if fetched.error == 'HTTP 429':
+                # Make every worker sharing this key honor the server's Retry-After,
+                # or back off exponentially when the server does not send one.
+                throttles += 1
+                keys.cooldown(api_key, fetched.retry_after if fetched.retry_after is not None else backoff_delay(throttles))
+            # Otherwise another worker took the token we waited for; wait for the next one.
+            continue
+        if fetched.status == 'transient':
+            attempt += 1
+            if attempt > MAX_TRANSIENT_RETRIES:
+                logging.error(f"Giving up on {describe_request(request)} ({translation}) after {MAX_TRANSIENT_RETRIES} retries: {fetched.error}")
+                return outcome
+            delay = fetched.retry_after if fetched.retry_after is not None else backoff_delay(attempt)
+            logging.info(f"Retrying {describe_request(request)} ({translation}) in {delay:.1f} seconds (attempt {attempt}).")
+            METRICS.inc('retries_total', translation=translation, reason='transient')
+            with METRICS.timed('backoff', translation):
+                time.sleep(delay)
+            continue
+        if fetched.error in ('HTTP 401', 'HTTP 403') and len(keys) > 1:
+            logging.error(f"{translation} API rejected {keys.describe_key(api_key)} ({fetched.error}); "
+                          f"taking it out of rotation for {UNAUTHORIZED_KEY_COOLDOWN} seconds.")
+            keys.cooldown(api_key, UNAUTHORIZED_KEY_COOLDOWN)
+            METRICS.inc('retries_total', translation=translation, reason='rejected_key')
+            continue
+        logging.error(f"Request for {describe_request(request)} ({translation}) failed: {fetched.error}; leaving it for the next run.")
+        return outcome
 
-            # Compute total verse count per book.
-            book_totals = {}
-            cursor.execute("""
-                SELECT b.name, SUM(c.verse_count)
-                FROM chapters c
-                JOIN books b ON c.book_id = b.book_id
-                WHERE b.translation_id = ?
-                GROUP BY b.name
-            """, (translation_id,))
-            for book_name, total_count in cursor.fetchall():
-                book_totals[book_name] = total_count
+# Registry for translation-specific metadata extractors
+METADATA_EXTRACTORS = {}
 
-            # Select chapters with placeholder verses for this translation.
-            cursor.execute("""
-                SELECT b.name, c.chapter_number, c.verse_count, c.chapter_id, b.book_id
-                FROM chapters c
-                JOIN books b ON c.book_id = b.book_id
-                WHERE b.translation_id = ? AND EXISTS (
-                    SELECT 1 FROM verses v
-                    WHERE v.chapter_id = c.chapter_id AND v.text = ?
-                )
-            """, (translation_id, PLACEHOLDER))
-            chapters = cursor.fetchall()
-            if not chapters:
-                logging.info(f"No chapters with placeholders found for {translation}. Exiting.")
-                break
+def register_metadata_extractor(translation_code: str):
+    """Decorator to register a function that picks chapter-level metadata out of a processed response."""
+    def decorator(func):
+        METADATA_EXTRACTORS[translation_code] = func
+        return func
+    return decorator
 
-            for book_name, chapter_number, verse_count, chapter_id, book_id in chapters:
-                total_in_book = book_totals.get(book_name, verse_count)
-                half_book_limit = max(total_in_book // 2, 1)
-                batch_limit = min(500, half_book_limit)
-
-                # Update chapter metadata if not done already
-                cursor.execute("SELECT metadata FROM chapters WHERE chapter_id = ?", (chapter_id,))
-                chapter_metadata = cursor.fetchone()[0]
-                if not chapter_metadata:
-                    try:
-                        # Fetch the first verse to get chapter metadata
-                        result = fetch_verses_text(book_name, chapter_number, 1, 1, translation, api_key, conn)
-                        if result and 'metadata' in result:
-                            chapter_meta = result['metadata']
-                            # Extract only chapter-related metadata, not verse-specific info
-                            chapter_metadata = {}
-                            if 'passage_meta' in chapter_meta and chapter_meta['passage_meta']:
-                                passage_meta = chapter_meta['passage_meta']
-                                # Just store basic chapter info, not verse navigation
-                                chapter_metadata = {
-                                    'chapter_number': chapter_number,
-                                    'canonical': chapter_meta.get('canonical', ''),
-                                    'book_name': book_name,
-                                    'verse_count': verse_count
-                                }
-                                # Add any chapter-level fields from passage_meta
-                                if isinstance(passage_meta, dict):
-                                    for key in ['chapter_start', 'chapter_end', 'book_start', 'book_end']:
-                                        if key in passage_meta:
-                                            chapter_metadata[key] = passage_meta[key]
-                                
-                                chapter_metadata_json = json.dumps(chapter_metadata)
-                                cursor.execute("UPDATE chapters SET metadata = ? WHERE chapter_id = ?", 
-                                              (chapter_metadata_json, chapter_id))
-                                logging.info(f"Updated chapter metadata for {book_name} {chapter_number}")
-                                
-                                # Also update book metadata if not done already
-                                cursor.execute("SELECT metadata FROM books WHERE book_id = ?", (book_id,))
-                                book_metadata = cursor.fetchone()[0]
-                                if not book_metadata and 'canonical' in chapter_meta:
-                                    book_canonical = chapter_meta['canonical'].split(' ')[0]  # Extract book name
-                                    book_metadata_json = json.dumps({'canonical': book_canonical})
-                                    cursor.execute("UPDATE books SET metadata = ? WHERE book_id = ?", 
-                                                  (book_metadata_json, book_id))
-                                    logging.info(f"Updated book metadata for {book_name}")
-                    except Exception as e:
-                        logging.error(f"Error updating metadata for {book_name} {chapter_number}: {e}")
-
-                for start_verse in range(1, verse_count + 1, batch_limit):
-                    end_verse = min(start_verse + batch_limit - 1, verse_count)
-                    result = fetch_verses_text(book_name, chapter_number, start_verse, end_verse, 
-                                              translation, api_key, conn)
-                    
-                    # If result is None, the rate limit has been reached.
-                    if result is None:
-                        # Calculate time remaining until next hour.
-                        current_time = time.time()
-                        next_hour = ((current_time // 3600) + 1) * 3600
-                        wait_time = next_hour - current_time
-                        logging.info(f"Rate limit reached for {translation}. Pausing processing for {wait_time:.0f} seconds until next hour.")
-                        time.sleep(wait_time)
-                        # After waiting, break out of the inner loop to re-check rate limits.
-                        break
+@register_metadata_extractor('ESV')
+def extract_esv_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the canonical reference and chapter-level passage_meta fields."""
+    chapter_metadata = {'canonical': metadata.get('canonical', '')}
+    passage_meta = metadata.get('passage_meta')
+    # Add any chapter-level fields from passage_meta, not verse navigation
+    if isinstance(passage_meta, dict):
+        for key in ['chapter_start', 'chapter_end', 'book_start', 'book_end']:
+            if key in passage_meta:
+                chapter_metadata[key] = passage_meta[key]
+    return chapter_metadata
 
-                    if not result or 'texts' not in result or not result['texts']:
-                        logging.info(f"No passages returned for {book_name} {chapter_number}:{start_verse}-{end_verse} ({translation}). Skipping.")
-                        continue
+@register_metadata_extractor('KJV')
+def extract_kjv_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the reference, book and chapter information returned by the KJV API."""
+    return {
+        'canonical': metadata.get('reference') or '',
+        'book': metadata.get('book'),
+        'chapter': metadata.get('chapter')
+    }
 
-                    updated_count = 0
-                    verse_texts = result['texts']
-                    metadata = result.get('metadata', {})
-                    
-                    for i, verse_text in enumerate(verse_texts):
-                        verse_num = start_verse + i
-                        verse_text = verse_text.strip()
-                        word_count = len(verse_text.split())
-                        
-                        # Get verse-specific metadata if available
-                        verse_metadata = None
-                        if 'verse_ids' in metadata and verse_num in metadata['verse_ids']:
-                            verse_id = metadata['verse_ids'][verse_num]
-                            verse_metadata = json.dumps({'verse_id': verse_id})
-                        
-                        cursor.execute("""
-                            UPDATE verses 
-                            SET text = ?, word_count = ?, metadata = ?
-                            WHERE chapter_id = ? AND verse_number = ?
-                        """, (verse_text, word_count, verse_metadata, chapter_id, verse_num))
-                        updated_count += 1
-
-                    logging.info(f"API call: Fetched and updated {updated_count} verses for {book_name} {chapter_number} (verses {start_verse}-{end_verse}) in {translation}.")
-                    # Sleep between API calls to ensure we don't exceed the per-minute rate limit
-                    time.sleep(2)
-            conn.commit()
-        # Sleep before checking for more placeholders.
-        time.sleep(30)
+@register_metadata_extractor('NIV')
+def extract_niv_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the passage reference, version and copyright returned by the NIV API."""
+    return {
+        'canonical': metadata.get('passage') or '',
+        'version': metadata.get('version'),
+        'copyright': metadata.get('copyright')
+    }
 
-def process_translation(translation: str, api_key: str) -> None:
-    """Process a specific Bible translation."""
-    if translation not in TRANSLATIONS:
-        logging.error(f"Translation {translation} is not supported.")
-        print(f"Supported translations: {', '.join(TRANSLATIONS.keys())}")
-        return
-    
-    if translation not in TRANSLATION_DATA:
-        logging.error(f"No structure data defined for {translation}.")
-        return
-    
-    # Create database and tables if they don't exist
-    create_database()
-    
-    # Register this translation in the database
-    translation_id = register_translation(translation)
-    if not translation_id:
-        logging.error(f"Failed to register translation {translation}.")
-        return
-    
-    # Process the specific translation
-    populate_books_and_chapters()                # This will only process translations that need it
-    bootstrap_verses(translation)                # Insert placeholder verses for this translation
-    populate_translation(translation, api_key)   # Fetch and update verse texts for this translation
+def extract_default_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Fallback for processors without an extractor: keep the scalar response fields."""
+    return {key: value for key, value in metadata.items()
+            if key != 'verse_ids' and isinstance(value, (str, int, float, bool))}
+
+def canonical_book_name(canonical: str, book_name: str) -> str:
+    """Strip the chapter/verse part from a canonical reference such as "1 Samuel 3:1-21"."""
+    match = re.match(r'^(.*?)\s+\d+(?::\d+)?(?:\s*[-\u2013]\s*[\d:]+)?$', canonical or '')
+    return match.group(1) if match else book_name
+
+def narrow_response_metadata(response_metadata: Dict[str, Any], request: PlannedRequest,
+                             chapter_number: int, verse_count: int) -> Dict[str, Any]:
+    """The metadata of a response narrowed to one chapter of its request.
+
+    A multi-chapter response describes the whole range, so its canonical
+    reference is replaced by the part of the request in this chapter, and
+    chapter_start/chapter_end by this chapter's first and last verse IDs.
+    """
+    metadata = dict(response_metadata)
+    if request.start_chapter == request.end_chapter:
+        return metadata
+    if 'canonical' in metadata:
+        first = request.start_verse if chapter_number == request.start_chapter else 1
+        last = request.end_verse if chapter_number == request.end_chapter else verse_count
+        metadata['canonical'] = format_reference(request.book_name, chapter_number, first, last)
+    chapter_range = [canonical_verse_id(request.book_name, chapter_number, 1),
+                     canonical_verse_id(request.book_name, chapter_number, verse_count)]
+    for key in ('chapter_start', 'chapter_end'):
+        if key in metadata:
+            metadata[key] = chapter_range
+    return metadata
+
+def write_response_metadata(cursor: sqlite3.Cursor, request: PlannedRequest, result: Dict[str, Any],
+                            chapter_index: Dict[Tuple[str, int], Tuple], translation: str) -> None:
+    """Fill chapter and book metadata from a verse response.
+
+    This replaces the old extra request for verse 1 of every chapter: the
+    first real response covering a chapter supplies its metadata (narrowed
+    to that chapter), and the first chapter of a book supplies the book's.
+    It runs in the same transaction as the verse writes for the response.
+    """
+    extractor = METADATA_EXTRACTORS.get(translation, extract_default_metadata)
+    response_metadata = extractor(result.get('metadata') or {})
+    book_metadata_json = json.dumps({
+        'canonical': canonical_book_name(response_metadata.get('canonical', ''), request.book_name)
+    })
+
+    for chapter_number in range(request.start_chapter, request.end_chapter + 1):
+        key = (request.book_name, chapter_number)
+        chapter_id, book_id, verse_count, metadata = chapter_index[key]
+        if metadata:
+            continue
+        chapter_metadata = {
+            'chapter_number': chapter_number,
+            'book_name': request.book_name,
+            'verse_count': verse_count
+        }
+        chapter_metadata.update(narrow_response_metadata(response_metadata, request, chapter_number, verse_count))
+        chapter_metadata_json = json.dumps(chapter_metadata)
+        cursor.execute("UPDATE chapters SET metadata = ? WHERE chapter_id = ?",
+                       (chapter_metadata_json, chapter_id))
+        chapter_index[key] = (chapter_id, book_id, verse_count, chapter_metadata_json)
+        # Also update book metadata if not done already
+        cursor.execute("UPDATE books SET metadata = ? WHERE book_id = ? AND metadata IS NULL",
+                       (book_metadata_json, book_id))
+
+# Key in chapters.metadata under which the last fetch of each chapter is recorded.
+FETCH_METADATA_KEY = 'fetch'
+
+def content_hash(texts: List[str]) -> str:
+    return hashlib.sha256('\n'.join(texts).encode('utf-8')).hexdigest()
+
+def chapter_fetch_info(chapter_index: Dict[Tuple[str, int], Tuple], key: Tuple[str, int]) -> Dict[str, Any]:
+    """The chapter's fetch record: {'fetched_at': ..., 'ranges': {reference: {'content_hash', 'ETag', ...}}}."""
+    metadata = chapter_index[key][3]
+    return (json.loads(metadata).get(FETCH_METADATA_KEY) or {}) if metadata else {}
+
+def update_chapter_fetch(cursor: sqlite3.Cursor, chapter_index: Dict[Tuple[str, int], Tuple],
+                         key: Tuple[str, int], reference: str, range_info: Dict[str, Any]) -> None:
+    """Mark a chapter as fetched now and merge `range_info` into its record for the range `reference`."""
+    chapter_id, book_id, verse_count, metadata = chapter_index[key]
+    chapter_metadata = json.loads(metadata) if metadata else {}
+    fetch_info = chapter_metadata.setdefault(FETCH_METADATA_KEY, {})
+    fetch_info['fetched_at'] = time.time()
+    fetch_info.setdefault('ranges', {}).setdefault(reference, {}).update(range_info)
+    metadata = json.dumps(chapter_metadata)
+    cursor.execute("UPDATE chapters SET metadata = ? WHERE chapter_id = ?", (metadata, chapter_id))
+    chapter_index[key] = (chapter_id, book_id, verse_count, metadata)
+
+def record_chapter_fetches(cursor: sqlite3.Cursor, request: PlannedRequest,
+                           rows: List[Tuple[int, int, str, Optional[str]]],
+                           chapter_index: Dict[Tuple[str, int], Tuple],
+                           validators: Optional[Dict[str, str]] = None) -> None:
+    """Store when each chapter in a response was fetched, a hash of its text and the response's validators.
+
+    The record lives under FETCH_METADATA_KEY in chapters.metadata and is
+    what refresh mode uses to pick stale chapters, skip unchanged ones and
+    make conditional requests. Hashes and validators are kept per fetched
+    range, since a chapter can be split between two requests.
+    """
+    texts = collections.defaultdict(list)
+    for chapter_number, _, verse_text, _ in rows:
+        texts[chapter_number].append(verse_text)
+    reference = describe_request(request)
+    for chapter_number, chapter_texts in texts.items():
+        update_chapter_fetch(cursor, chapter_index, (request.book_name, chapter_number), reference,
+                             {'content_hash': content_hash(chapter_texts), **(validators or {})})
+
+def mark_not_modified(cursor: sqlite3.Cursor, request: PlannedRequest,
+                      chapter_index: Dict[Tuple[str, int], Tuple],
+                      validators: Optional[Dict[str, str]] = None) -> None:
+    """Record a 304 answer: the chapters are current as of now, and their stored text stands."""
+    reference = describe_request(request)
+    for chapter_number in range(request.start_chapter, request.end_chapter + 1):
+        update_chapter_fetch(cursor, chapter_index, (request.book_name, chapter_number), reference, validators or {})
+
+class VerseWriter:
+    """Write-back stage that applies verse updates in batches.
+
+    Rows are buffered as (text, word_count, metadata, chapter_id, verse_number)
+    tuples and applied with a single executemany once `batch_size` rows are
+    pending, or when flush() is called before a commit. Progress ledger rows
+    queued with add_progress() are inserted after the verses of the same flush.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor, batch_size: int = WRITE_BATCH_SIZE):
+        self.cursor = cursor
+        self.batch_size = max(1, batch_size)
+        self.pending = []
+        self.progress = []
+
+    def add(self, text: str, word_count: int, metadata: Optional[str], chapter_id: int, verse_number: int) -> None:
+        self.pending.append((text, word_count, metadata, chapter_id, verse_number))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def add_progress(self, row: tuple) -> None:
+        """Queue a load_progress row; it is written by the next flush, after the pending verses."""
+        self.progress.append(row)
+
+    def flush(self) -> int:
+        """Apply all buffered updates and return how many verse rows were written."""
+        written = len(self.pending)
+        if self.pending:
+            self.cursor.executemany("""
+                UPDATE verses 
+                SET text = ?, word_count = ?, metadata = ?
+                WHERE chapter_id = ? AND verse_number = ?
+            """, self.pending)
+            self.pending = []
+        if self.progress:
+            self.cursor.executemany("""
+                INSERT INTO load_progress (translation_id, book_name, start_chapter, start_verse,
+                                           end_chapter, end_verse, verses_written, completed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, self.progress)
+            self.progress = []
+        return written
+
+def write_planned_request(writer: VerseWriter, request: PlannedRequest, result: Dict[str, Any],
+                          chapter_index: Dict[Tuple[str, int], Tuple], translation: str,
+                          validators: Optional[Dict[str, str]] = None) -> int:
+    """Apply one fetched request to the database: verses, then chapter and book metadata.
+
+    Returns:
+        The number of verses written
+    """
+    if not result or 'texts' not in result or not result['texts']:
+        logging.info(f"No passages returned for {describe_request(request)} ({translation}). Skipping.")
+        return 0
+
+    updated_count = 0
+    with METRICS.timed('write', translation):
+        rows = split_response(request, result)
+        for chapter_number, verse_number, verse_text, verse_metadata in rows:
+            chapter_id = chapter_index[(request.book_name, chapter_number)][0]
+            writer.add(verse_text, len(verse_text.split()), verse_metadata, chapter_id, verse_number)
+            updated_count += 1
+
+        try:
+            write_response_metadata(writer.cursor, request, result, chapter_index, translation)
+            record_chapter_fetches(writer.cursor, request, rows, chapter_index, validators)
+        except Exception as e:
+            logging.error(f"Error updating metadata for {describe_request(request)}: {e}")
+
+    METRICS.inc('verses_written_total', updated_count, translation=translation)
+    # Per-request detail only at debug level; progress is logged once per checkpoint.
+    logging.debug(f"API call: Fetched and updated {updated_count} verses for {describe_request(request)} in {translation}.")
+    return updated_count
+
+def write_refreshed_request(writer: VerseWriter, request: PlannedRequest, result: Dict[str, Any],
+                            chapter_index: Dict[Tuple[str, int], Tuple], translation: str,
+                            validators: Optional[Dict[str, str]] = None) -> int:
+    """Apply a refresh response, rewriting only verses whose text actually changed.
+
+    A chapter whose content hash matches the one recorded at its last fetch
+    is left untouched; otherwise its stored verses are compared one by one.
+
+    Returns:
+        The number of verses rewritten
+    """
+    if not result or not result.get('texts'):
+        logging.info(f"No passages returned for {describe_request(request)} ({translation}). Skipping.")
+        return 0
+
+    changed = 0
+    with METRICS.timed('write', translation):
+        rows = split_response(request, result)
+        by_chapter = collections.defaultdict(list)
+        for row in rows:
+            by_chapter[row[0]].append(row)
+        for chapter_number, chapter_rows in by_chapter.items():
+            key = (request.book_name, chapter_number)
+            stored_range = chapter_fetch_info(chapter_index, key).get('ranges', {}).get(describe_request(request), {})
+            if content_hash([row[2] for row in chapter_rows]) == stored_range.get('content_hash'):
+                continue
+            chapter_id = chapter_index[key][0]
+            writer.cursor.execute("SELECT verse_number, text FROM verses WHERE chapter_id = ?", (chapter_id,))
+            stored = dict(writer.cursor.fetchall())
+            for _, verse_number, verse_text, verse_metadata in chapter_rows:
+                if stored.get(verse_number) != verse_text:
+                    writer.add(verse_text, len(verse_text.split()), verse_metadata, chapter_id, verse_number)
+                    changed += 1
+        record_chapter_fetches(writer.cursor, request, rows, chapter_index, validators)
+
+    METRICS.inc('verses_written_total', changed, translation=translation)
+    if changed:
+        logging.info(f"Refresh: {changed} verses of {describe_request(request)} ({translation}) changed.")
+    return changed
+
+def print_plan(translation: str) -> None:
+    """Dry run: print how many requests a translation still needs and when it would finish."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT translation_id FROM translations WHERE abbreviation = ?", (translation,))
+        result = cursor.fetchone()
+        if not result:
+            logging.error(f"Translation {translation} not found in database. Please populate translations first.")
+            return
+        plan, _ = build_translation_plan(cursor, translation, result[0])
+        limiter = get_rate_limiter(conn, translation)
+        if limiter is None:
+            return
+
+    missing_count = sum(len(request.missing) for request in plan)
+    multi_chapter = sum(1 for request in plan if request.start_chapter != request.end_chapter)
+    seconds = limiter.estimate_duration(len(plan))
+    finish = time.strftime('%Y-%m-%d %H:%M', time.localtime(time.time() + seconds))
+
+    print(f"Plan for {translation} ({TRANSLATIONS[translation]['name']}):")
+    print(f"  Missing verses:      {missing_count}")
+    print(f"  Requests:            {len(plan)} ({multi_chapter} spanning chapters)")
+    print(f"  Estimated duration:  {seconds / 3600:.1f} hours (rate limits only)")
+    print(f"  Estimated finish:    {finish}")
+
+def request_from_reference(translation: str, reference: str) -> Optional[PlannedRequest]:
+    """Rebuild the PlannedRequest for a reference produced by format_reference."""
+    chapters_of = TRANSLATION_DATA[translation].get('structure', bible_structure)
+    match = re.match(r'^(.+?) (\d+):(\d+)-(\d+):(\d+)$', reference)
+    if match:
+        book_name, start_chapter, start_verse, end_chapter, end_verse = match.group(1), *map(int, match.groups()[1:])
+    else:
+        match = re.match(r'^(.+?) (\d+):(\d+)-(\d+)$', reference)
+        if match:
+            book_name, start_chapter, start_verse, end_verse = match.group(1), *map(int, match.groups()[1:])
+            end_chapter = start_chapter
+        else:
+            match = re.match(r'^(.+?) (\d+)-(\d+)$', reference)
+            if not match or match.group(1) not in chapters_of:
+                return None
+            book_name, start_chapter, end_chapter = match.group(1), int(match.group(2)), int(match.group(3))
+            start_verse, end_verse = 1, chapters_of[book_name][end_chapter - 1]
+    chapters = chapters_of.get(book_name)
+    if not chapters or end_chapter > len(chapters):
+        return None
+
+    slots = []
+    for chapter_number in range(start_chapter, end_chapter + 1):
+        first = start_verse if chapter_number == start_chapter else 1
+        last = end_verse if chapter_number == end_chapter else chapters[chapter_number - 1]
+        slots.extend((chapter_number, verse) for verse in range(first, last + 1)
+                     if not is_omitted(book_name, chapter_number, verse, translation))
+    return PlannedRequest(book_name, start_chapter, start_verse, end_chapter, end_verse, slots, slots)
+
+def replay_translation(translation: str, write_batch_size: int = WRITE_BATCH_SIZE) -> None:
+    """Rebuild a translation's verses purely from cached responses, without any API call.
+
+    Every cached body is run through the translation's registered response
+    processor and written over the matching verse rows, oldest response
+    first, so the newest cached text wins.
+    """
+    if translation not in RESPONSE_PROCESSORS:
+        logging.error(f"No response processor defined for {translation}.")
+        return
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT translation_id FROM translations WHERE abbreviation = ?", (translation,))
+        result = cursor.fetchone()
+        if not result:
+            logging.error(f"Translation {translation} not found in database. Please populate translations first.")
+            return
+        chapter_index = load_chapter_index(cursor, result[0])
+        writer = VerseWriter(cursor, write_batch_size)
+        processor = RESPONSE_PROCESSORS[translation]
+
+        replayed = 0
+        verses = 0
+        for entry in response_cache.entries(translation):
+            # Each replayed response stands in for one API call under --max-requests.
+            if not claim_request():
+                logging.info(f"Stopping replay after {max_requests} responses (request limit reached).")
+                break
+            request = request_from_reference(translation, entry.get('reference', ''))
+            if request is None:
+                logging.warning(f"Skipping cached response with unrecognized reference {entry.get('reference')!r}.")
+                continue
+            try:
+                data = processor(json.loads(entry['body']), translation)
+            except Exception as e:
+                logging.error(f"Could not process cached response for {entry['reference']} ({translation}): {e}")
+                continue
+            verses += write_planned_request(writer, request, data, chapter_index, translation)
+            replayed += 1
+        writer.flush()
+    clear_passage_caches()
+    logging.info(f"Replayed {replayed} cached responses ({verses} verses) for {translation}.")
+
+# Refresh mode defaults: re-check chapters last fetched this many days ago, using at
+# most this share of the widest rate limit window per run.
+REFRESH_MIN_AGE_DAYS = 30
+REFRESH_QUOTA_SHARE = 0.05
+
+class RefreshPolicy(NamedTuple):
+    """How populate_translations re-checks already loaded text instead of filling placeholders.
+
+    budget caps the requests spent per translation; None means
+    REFRESH_QUOTA_SHARE of the quota that is spare right now.
+    """
+    budget: Optional[int] = None
+    min_age_days: float = REFRESH_MIN_AGE_DAYS
+
+def build_refresh_plan(cursor: sqlite3.Cursor, translation: str, translation_id: int,
+                       budget: int, min_age_days: float) -> Tuple[List[PlannedRequest], Dict[Tuple[str, int], Tuple]]:
+    """Plan requests re-fetching the least recently fetched fully loaded chapters, up to `budget` requests.
+
+    Chapters still holding placeholders are left to the normal load, and
+    chapters fetched less than `min_age_days` ago are skipped. Chapters with
+    no fetch record (loaded before records were kept) count as oldest.
+    """
+    chapter_index = load_chapter_index(cursor, translation_id)
+    unfinished = {(book_name, chapter_number)
+                  for book_name, slots in load_missing_verses(cursor, translation_id).items()
+                  for chapter_number, _ in slots}
+    cutoff = time.time() - min_age_days * 86400
+    fetched_at = {key: chapter_fetch_info(chapter_index, key).get('fetched_at', 0.0)
+                  for key in chapter_index if key not in unfinished}
+    stale = {}
+    for (book_name, chapter_number), when in fetched_at.items():
+        if when <= cutoff:
+            verse_count = chapter_index[(book_name, chapter_number)][2]
+            stale.setdefault(book_name, set()).update((chapter_number, verse) for verse in range(1, verse_count + 1))
+    plan = plan_requests(translation, stale)
+    plan.sort(key=lambda request: min(fetched_at[(request.book_name, chapter)]
+                                      for chapter in range(request.start_chapter, request.end_chapter + 1)))
+    return plan[:budget], chapter_index
+
+def request_validators(request: PlannedRequest, chapter_index: Dict[Tuple[str, int], Tuple]) -> Optional[Dict[str, str]]:
+    """Validators from the last fetch of exactly this range, if the API sent any."""
+    fetch_info = chapter_fetch_info(chapter_index, (request.book_name, request.start_chapter))
+    range_info = fetch_info.get('ranges', {}).get(describe_request(request), {})
+    return {name: range_info[name] for name in CONDITIONAL_HEADERS if range_info.get(name)} or None
+
+class TranslationJob:
+    """Scheduler state for one translation loaded (or refreshed) by populate_translations."""
+
+    def __init__(self, translation: str, translation_id: int, keys: ApiKeyPool,
+                 refresh: Optional[RefreshPolicy] = None):
+        self.translation = translation
+        self.translation_id = translation_id
+        self.keys = keys
+        self.refresh = refresh
+        # Refresh outcomes: ranges answered 304, fetched, and verses found changed.
+        self.not_modified = 0
+        self.refetched = 0
+        self.verses_changed = 0
+        self.pending = collections.deque()
+        self.chapter_index = {}
+        self.in_flight = 0
+        self.requests_written = 0
+        self.verses_written = 0
+        self.requests_logged = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.passes = 0
+        self.done = False
+
+    def wait_time(self) -> float:
+        """Seconds until another request of this job could start without waiting on a worker.
+
+        Requests already on a worker hold a claim on the tokens they will
+        take, so the job needs in_flight + 1 tokens to be worth scheduling.
+        """
+        if self.done or not self.pending:
+            return float('inf')
+        return self.keys.time_until_tokens(self.in_flight + 1)
+
+def start_refresh_pass(job: TranslationJob, cursor: sqlite3.Cursor) -> None:
+    """Plan a refresh job's only pass; whatever is not re-checked now waits for the next run."""
+    if job.passes:
+        job.done = True
+        return
+    budget = job.refresh.budget
+    if budget is None:
+        budget = job.keys.spare_tokens(REFRESH_QUOTA_SHARE)
+    plan, job.chapter_index = build_refresh_plan(cursor, job.translation, job.translation_id,
+                                                 budget, job.refresh.min_age_days)
+    job.passes += 1
+    if not plan:
+        logging.info(f"Nothing to refresh for {job.translation} (budget {budget} requests).")
+        job.done = True
+        return
+    logging.info(f"Refreshing {len(plan)} ranges of {job.translation} (budget {budget} requests).")
+    job.pending.extend(plan)
+
+def start_pass(job: TranslationJob, cursor: sqlite3.Cursor) -> None:
+    """Plan the next pass of a job, or mark it done when nothing is left to request."""
+    if job.refresh:
+        start_refresh_pass(job, cursor)
+        return
+    if job.passes and job.failed and not job.succeeded:
+        logging.error(f"All {job.failed} requests for {job.translation} failed in this pass; stopping. Run again to resume.")
+        job.done = True
+        return
+    if not job.passes:
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(verses_written), 0) FROM load_progress WHERE translation_id = ?",
+                       (job.translation_id,))
+        completed_requests, completed_verses = cursor.fetchone()
+        if completed_requests:
+            logging.info(f"Resuming {job.translation}: {completed_requests} requests ({completed_verses} verses) already completed.")
+
+    plan, job.chapter_index = build_translation_plan(cursor, job.translation, job.translation_id)
+    job.passes += 1
+    job.succeeded = job.failed = 0
+    if not plan:
+        # Nothing left to request: finish straight away instead of idling.
+        logging.info(f"No requests left for {job.translation}; loading is complete.")
+        job.done = True
+        return
+    logging.info(f"Planned {len(plan)} requests for {job.translation}.")
+    job.pending.extend(plan)
+
+def next_job(jobs: List[TranslationJob]) -> Optional[TranslationJob]:
+    """Pick the job to hand the next free worker to.
+
+    Only jobs whose quota allows a request right now are eligible; among
+    them the one with the largest unused share of its tightest quota wins,
+    so fast translations soak up spare workers while slow ones wait.
+    """
+    ready = [job for job in jobs if job.wait_time() <= 0]
+    if not ready:
+        return None
+    return max(ready, key=lambda job: job.keys.remaining_fraction())
+
+def populate_translations(api_keys: Dict[str, Union[str, List[str]]], workers: int = DEFAULT_WORKERS,
+                          write_batch_size: int = WRITE_BATCH_SIZE,
+                          commit_every: int = COMMIT_EVERY_REQUESTS,
+                          commit_seconds: float = COMMIT_EVERY_SECONDS,
+                          refresh: Optional[RefreshPolicy] = None) -> None:
+    """Populate verses for one or more translations under a single scheduler.
+
+    Each translation is planned into the fewest requests that cover its
+    remaining placeholder verses. One pool of `workers` threads (and one HTTP
+    connection pool) runs requests from every translation through the
+    registered TRANSLATION_FETCHERS; whenever a worker frees up it goes to
+    the translation whose rate limiter allows a request now and has the
+    most quota left (see next_job), so one translation waiting out its
+    hourly limit does not leave the others idle. This thread is the only
+    one writing to SQLite, applying verse updates in batches of
+    `write_batch_size`.
+
+    Every completed request is recorded in the load_progress ledger in the
+    same transaction as its verses, and the transaction is committed after
+    `commit_every` requests or `commit_seconds` seconds, whichever comes
+    first, so a crash loses at most one checkpoint interval of work and a
+    restart resumes where the ledger left off.
+
+    With a RefreshPolicy the same machinery re-checks already loaded text
+    instead: a budgeted set of stale ranges is re-fetched once (see
+    build_refresh_plan), conditionally where an ETag or Last-Modified was
+    recorded, and only verses whose text changed are rewritten.
+
+    Args:
+        api_keys: API key, or pool of keys (see ApiKeyPool), for each translation to load
+        refresh: Refresh already loaded text under this policy instead of loading placeholders
+    """
+    workers = max(1, workers)
+    configure_session_pool(workers)
+
+    # The connection is shared with the fetch workers for rate-limit tracking,
+    # so every use of it goes through DB_LOCK.
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        jobs = []
+        for translation, api_key in api_keys.items():
+            if translation not in TRANSLATIONS:
+                logging.error(f"Translation {translation} not supported.")
+                continue
+            cursor.execute("SELECT translation_id FROM translations WHERE abbreviation = ?", (translation,))
+            result = cursor.fetchone()
+            if not result:
+                logging.error(f"Translation {translation} not found in database. Please populate translations first.")
+                continue
+            keys = ApiKeyPool(conn, translation, [api_key] if isinstance(api_key, str) else api_key)
+            if not keys:
+                logging.error(f"No usable API key for {translation}.")
+                continue
+            if len(keys) > 1:
+                logging.info(f"Using a pool of {len(keys)} API keys for {translation}.")
+            jobs.append(TranslationJob(translation, result[0], keys, refresh))
+
+        writer = VerseWriter(cursor, write_batch_size)
+        uncommitted = 0
+        last_commit = time.monotonic()
+        in_flight = {}
+
+        def checkpoint() -> None:
+            nonlocal uncommitted, last_commit
+            with DB_LOCK, METRICS.timed('commit', 'all'):
+                writer.flush()
+                # Save limiter state so a restart does not forget the quota already used;
+                # it is committed together with the verses and ledger rows.
+                for job in jobs:
+                    job.keys.persist(conn)
+                conn.commit()
+            uncommitted = 0
+            last_commit = time.monotonic()
+            # One progress line per checkpoint instead of one per request.
+            for job in jobs:
+                if job.requests_written != job.requests_logged:
+                    logging.info(f"{job.translation}: {job.requests_written} requests ({job.verses_written} verses) "
+                                 f"written this run, {len(job.pending)} left in this pass.")
+                    job.requests_logged = job.requests_written
+            export_metrics()
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                while True:
+                    # Re-plan jobs whose pass has drained; failed requests are planned
+                    # again, completed ones are in the ledger.
+                    for job in jobs:
+                        if not job.done and not job.pending and not job.in_flight:
+                            with DB_LOCK:
+                                writer.flush()
+                                start_pass(job, cursor)
+
+                    # Keep one request in flight per worker, without starting more
+                    # requests than the --max-requests cap has left.
+                    while len(in_flight) < min(workers, requests_remaining()):
+                        job = next_job(jobs)
+                        if job is None:
+                            break
+                        request = job.pending.popleft()
+                        validators = request_validators(request, job.chapter_index) if job.refresh else None
+                        future = executor.submit(profiled(fetch_planned_request), request, job.translation,
+                                                 job.keys, conn, validators)
+                        in_flight[future] = (job, request)
+                        job.in_flight += 1
+
+                    active = [job for job in jobs if not job.done]
+                    if not active:
+                        break
+                    if requests_remaining() <= 0 and not in_flight:
+                        logging.info(f"Stopping after {max_requests} API calls (request limit reached).")
+                        break
+                    wait_time = min(job.wait_time() for job in active)
+                    if not in_flight:
+                        # Every translation is waiting for its quota: sleep exactly until
+                        # the first one may send its next request.
+                        waiting = min(active, key=TranslationJob.wait_time)
+                        checkpoint()
+                        logging.info(f"Rate limit reached for {', '.join(job.translation for job in active)}. "
+                                     f"Pausing processing for {wait_time:.0f} seconds until the next {waiting.translation} request is allowed.")
+                        with METRICS.timed('throttle_wait', waiting.translation):
+                            time.sleep(wait_time)
+                        continue
+
+                    # Wake up when a request finishes, or when a waiting job's quota
+                    # allows it to use a free worker. Once the request cap is spent
+                    # nothing new can start, so only a finishing request matters.
+                    can_start = len(in_flight) < workers and requests_remaining() > 0
+                    timeout = wait_time if can_start and wait_time != float('inf') else None
+                    done, _ = concurrent.futures.wait(in_flight, timeout=timeout,
+                                                      return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        job, request = in_flight.pop(future)
+                        job.in_flight -= 1
+                        try:
+                            outcome = future.result()
+                        except Exception as e:
+                            logging.error(f"Error fetching {describe_request(request)} ({job.translation}): {e}")
+                            job.failed += 1
+                            continue
+
+                        if outcome['status'] == 'not_modified' or outcome['result'] is not None:
+                            with DB_LOCK:
+                                if outcome['status'] == 'not_modified':
+                                    mark_not_modified(cursor, request, job.chapter_index, outcome['validators'])
+                                    job.not_modified += 1
+                                elif job.refresh:
+                                    job.verses_changed += write_refreshed_request(writer, request, outcome['result'],
+                                                                                  job.chapter_index, job.translation,
+                                                                                  outcome['validators'])
+                                    job.refetched += 1
+                                else:
+                                    written = write_planned_request(writer, request, outcome['result'],
+                                                                    job.chapter_index, job.translation,
+                                                                    outcome['validators'])
+                                    record_progress(writer, job.translation_id, request, written)
+                                    job.requests_written += 1
+                                    job.verses_written += written
+                            job.succeeded += 1
+                            uncommitted += 1
+                            if uncommitted >= commit_every or time.monotonic() - last_commit >= commit_seconds:
+                                checkpoint()
+                        elif outcome['rate_limited']:
+                            # Put it back; the job is rescheduled once its limiter allows.
+                            job.pending.appendleft(request)
+                        else:
+                            job.failed += 1
+        finally:
+            checkpoint()
+        for job in jobs:
+            if job.refresh and (job.not_modified or job.refetched):
+                logging.info(f"Refresh of {job.translation}: {job.not_modified} ranges not modified, "
+                             f"{job.refetched} re-fetched, {job.verses_changed} verses changed.")
+
+def populate_translation(translation: str, api_key: Union[str, List[str]], workers: int = DEFAULT_WORKERS,
+                         write_batch_size: int = WRITE_BATCH_SIZE,
+                         commit_every: int = COMMIT_EVERY_REQUESTS,
+                         commit_seconds: float = COMMIT_EVERY_SECONDS,
+                         refresh: Optional[RefreshPolicy] = None) -> None:
+    """Populate verses for a specific translation using its API (see populate_translations)."""
+    populate_translations({translation: api_key}, workers, write_batch_size, commit_every, commit_seconds, refresh)
+
+def prepare_translation(translation: str) -> bool:
+    """Create the schema and placeholder rows a translation needs; no API calls are made."""
+    if translation not in TRANSLATIONS:
+        logging.error(f"Translation {translation} is not supported.")
+        print(f"Supported translations: {', '.join(TRANSLATIONS.keys())}")
+        return False
+    
+    if translation not in TRANSLATION_DATA:
+        logging.error(f"No structure data defined for {translation}.")
+        return False
+    
+    # Create database and tables if they don't exist
+    create_database()
+    
+    # Register this translation in the database
+    translation_id = register_translation(translation)
+    if not translation_id:
+        logging.error(f"Failed to register translation {translation}.")
+        return False
+    
+    populate_books_and_chapters()                # This will only process translations that need it
+    bootstrap_verses(translation)                # Insert placeholder verses for this translation
+    return True
+
+def process_translation(translation: str, api_key: Union[str, List[str]], workers: int = DEFAULT_WORKERS,
+                        write_batch_size: int = WRITE_BATCH_SIZE,
+                        commit_every: int = COMMIT_EVERY_REQUESTS,
+                        commit_seconds: float = COMMIT_EVERY_SECONDS,
+                        refresh: Optional[RefreshPolicy] = None) -> None:
+    """Process a specific Bible translation (or refresh its loaded text, given a RefreshPolicy)."""
+    if not prepare_translation(translation):
+        return
+    # Fetch and update verse texts for this translation
+    populate_translation(translation, api_key, workers, write_batch_size, commit_every, commit_seconds, refresh)
+    response_cache.evict()
+    clear_passage_caches()
+    print_metrics_summary([translation])
+
+def process_translations(api_keys: Dict[str, Union[str, List[str]]], workers: int = DEFAULT_WORKERS,
+                         write_batch_size: int = WRITE_BATCH_SIZE,
+                         commit_every: int = COMMIT_EVERY_REQUESTS,
+                         commit_seconds: float = COMMIT_EVERY_SECONDS,
+                         refresh: Optional[RefreshPolicy] = None) -> None:
+    """Process several translations at once, sharing one worker pool and one writer."""
+    api_keys = {translation: key for translation, key in api_keys.items() if prepare_translation(translation)}
+    if not api_keys:
+        return
+    populate_translations(api_keys, workers, write_batch_size, commit_every, commit_seconds, refresh)
+    response_cache.evict()
+    clear_passage_caches()
+    print_metrics_summary(list(api_keys))
+
+PASSAGE_CACHE_SIZE = 1024
+
+class Verse(NamedTuple):
+    chapter_number: int
+    verse_number: int
+    text: str
+
+class Passage(NamedTuple):
+    """The loaded verses of a reference in one translation, in order."""
+    reference: Reference
+    translation: str
+    verses: Tuple[Verse, ...]
+
+    @property
+    def text(self) -> str:
+        return ' '.join(verse.text for verse in self.verses)
+
+@functools.lru_cache(maxsize=PASSAGE_CACHE_SIZE)
+def load_passage(reference: Reference, translation: str) -> Passage:
+    """Read a parsed reference from the database with one range query (cached).
+
+    CROSS JOIN pins verses as the outer loop so SQLite walks idx_verses_canonical
+    for the range instead of scanning the translation's chapters.
+    """
+    conn = get_read_connection()
+    rows = conn.execute(f"""
+        SELECT c.chapter_number, v.verse_number, v.text
+        FROM verses v
+        CROSS JOIN chapters c ON c.chapter_id = v.chapter_id
+        CROSS JOIN books b ON b.book_id = c.book_id
+        CROSS JOIN translations t ON t.translation_id = b.translation_id
+        WHERE v.canonical_id BETWEEN ? AND ?
+          AND t.abbreviation = ?
+          AND {SEARCHABLE_TEXT_SQL.format(alias='v')}
+        ORDER BY v.canonical_id
+    """, (reference.start_id, reference.end_id, translation))
+    return Passage(reference, translation, tuple(Verse(*row) for row in rows))
+
+def get_passage(reference: Union[str, Reference], translation: str) -> Passage:
+    """Look up a passage such as "John 3:16-18" or "Ps 23" in a translation.
+
+    Results are served from an LRU cache keyed on the parsed reference, so
+    "Jn 3:16" and "John 3:16" share an entry. The cache is dropped whenever
+    the database has changed since the last lookup, including commits by a
+    loader running in another process; verses that are still placeholders
+    or omitted in the translation are left out.
+
+    Args:
+        reference: Reference string or an already parsed Reference
+        translation: Translation code (e.g., 'ESV')
+
+    Returns:
+        The passage with its verses in order (empty if not loaded yet)
+
+    Raises:
+        ValueError: If the reference cannot be parsed or is out of range
+    """
+    if isinstance(reference, str):
+        reference = parse_reference(reference)
+    sync_passage_caches()
+    return load_passage(reference, translation)
+
+class ParallelVerse(NamedTuple):
+    """One canonical verse position with each translation's text (None for a gap)."""
+    canonical_id: int
+    chapter_number: int
+    verse_number: int
+    texts: Tuple[Optional[str], ...]
+
+class ParallelPassage(NamedTuple):
+    """A reference in several translations, one row per canonical verse position."""
+    reference: Reference
+    translations: Tuple[str, ...]
+    verses: Tuple[ParallelVerse, ...]
+
+@functools.lru_cache(maxsize=PASSAGE_CACHE_SIZE)
+def load_parallel_passage(reference: Reference, translations: Tuple[str, ...]) -> ParallelPassage:
+    """Read a reference for several translations with one query, pivoted on canonical_id (cached)."""
+    columns = ', '.join(f"MAX(CASE WHEN t.abbreviation = ? THEN v.text END)" for _ in translations)
+    conn = get_read_connection()
+    rows = conn.execute(f"""
+        SELECT v.canonical_id, {columns}
+        FROM verses v
+        CROSS JOIN chapters c ON c.chapter_id = v.chapter_id
+        CROSS JOIN books b ON b.book_id = c.book_id
+        CROSS JOIN translations t ON t.translation_id = b.translation_id
+        WHERE v.canonical_id BETWEEN ? AND ?
+          AND t.abbreviation IN ({', '.join('?' for _ in translations)})
+          AND {SEARCHABLE_TEXT_SQL.format(alias='v')}
+        GROUP BY v.canonical_id
+    """, (*translations, reference.start_id, reference.end_id, *translations))
+    texts_by_id = {row[0]: row[1:] for row in rows}
+
+    # Walk every canonical position so omitted or unloaded verses become gaps
+    # instead of shifting the rows of the other translations.
+    empty = (None,) * len(translations)
+    verses = []
+    for ordinal in range(VERSIFICATION.ordinal(reference.start_id), VERSIFICATION.ordinal(reference.end_id) + 1):
+        canonical_id = VERSIFICATION.canonical_ids[ordinal]
+        chapter_number, verse_number = divmod(canonical_id % 1000000, 1000)
+        verses.append(ParallelVerse(canonical_id, chapter_number, verse_number,
+                                    texts_by_id.get(canonical_id, empty)))
+    return ParallelPassage(reference, translations, tuple(verses))
+
+def get_parallel_passage(reference: Union[str, Reference], translations: List[str]) -> ParallelPassage:
+    """Look up a passage side by side in several translations, aligned on canonical verse IDs.
+
+    Every verse position in the range gets a row; a translation that omits
+    the verse (see TRANSLATION_DATA['omitted_verses']) or has not loaded it
+    yet has None in its column. Cached like get_passage.
+
+    Args:
+        reference: Reference string or an already parsed Reference
+        translations: Translation codes, in column order
+
+    Returns:
+        The aligned passage
+
+    Raises:
+        ValueError: If the reference cannot be parsed or is out of range
+    """
+    if isinstance(reference, str):
+        reference = parse_reference(reference)
+    sync_passage_caches()
+    return load_parallel_passage(reference, tuple(translations))
+
+# Hits and misses of load_passage from before the last cache clear; cache_clear()
+# resets cache_info(), and the caches are cleared whenever the database changes.
+_passage_cache_totals = {'hits': 0, 'misses': 0}
+_passage_cache_lock = threading.Lock()
+
+def clear_passage_caches() -> None:
+    """Drop cached passages, e.g. after verses have been written."""
+    with _passage_cache_lock:
+        info = load_passage.cache_info()
+        _passage_cache_totals['hits'] += info.hits
+        _passage_cache_totals['misses'] += info.misses
+        load_passage.cache_clear()
+        load_parallel_passage.cache_clear()
+
+def sync_passage_caches() -> None:
+    """Drop cached passages if any connection has committed since this thread last checked.
+
+    PRAGMA data_version on the thread's read connection changes on every
+    commit made through another connection, in this process or any other,
+    so passages cached while a load was in progress are not served after it
+    writes more verses. Values are only comparable on one connection, so a
+    thread's first check clears the caches too.
+    """
+    conn = get_read_connection()
+    version = conn.execute('PRAGMA data_version').fetchone()[0]
+    if version != _read_connections.data_version:
+        clear_passage_caches()
+        _read_connections.data_version = version
+
+def passage_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the passage cache since the process started."""
+    with _passage_cache_lock:
+        info = load_passage.cache_info()
+        hits = _passage_cache_totals['hits'] + info.hits
+        misses = _passage_cache_totals['misses'] + info.misses
+    lookups = hits + misses
+    return {'hits': hits, 'misses': misses, 'size': info.currsize,
+            'max_size': info.maxsize, 'hit_rate': hits / lookups if lookups else 0.0}
+
+def print_passage(reference: str, translations: List[str]) -> None:
+    """CLI helper: print a passage one verse per line, side by side for several translations."""
+    try:
+        passage = get_parallel_passage(reference, translations)
+    except ValueError as e:
+        logging.error(str(e))
+        return
+    print(f"{passage.reference} ({', '.join(translations)})")
+    for verse in passage.verses:
+        for translation, text in zip(translations, verse.texts):
+            label = f"{translation} " if len(translations) > 1 else ''
+            print(f"  {verse.chapter_number}:{verse.verse_number} {label}{text if text is not None else '-'}")
+
+class SearchResult(NamedTuple):
+    """One verse matched by search(), with its bm25 rank (lower is better)."""
+    translation: str
+    book_name: str
+    chapter_number: int
+    verse_number: int
+    text: str
+    snippet: str
+    highlighted: str
+    rank: float
+
+    @property
+    def reference(self) -> str:
+        return f"{self.book_name} {self.chapter_number}:{self.verse_number}"
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query that matches verses containing every word.
+
+    Each word is quoted so punctuation in user input cannot be read as FTS5
+    syntax; a trailing * on a word is kept as a prefix search.
+    """
+    terms = []
+    for word, prefix in re.findall(r"(\w+)(\*?)", text, flags=re.UNICODE):
+        terms.append(f'"{word}"{prefix}')
+    return ' '.join(terms)
+
+def search(query: str, translations: Optional[List[str]] = None, limit: int = 20,
+           raw: bool = False) -> List[SearchResult]:
+    """Full-text search over verse text, best matches first.
+
+    Args:
+        query: Words to search for (all must match), or an FTS5 expression if raw is set
+        translations: Translation codes to search, or None for all
+        limit: Maximum number of results
+        raw: Pass query to FTS5 unchanged (phrases, OR, NEAR, column filters)
+
+    Returns:
+        Matching verses with book/chapter/verse references, snippets and bm25 ranks
+    """
+    match = query if raw else fts_query(query)
+    if not match:
+        return []
+    sql = """
+        SELECT t.abbreviation, b.name, c.chapter_number, v.verse_number, v.text,
+               snippet(verses_fts, 0, '[', ']', '...', 12),
+               highlight(verses_fts, 0, '[', ']'),
+               bm25(verses_fts)
+        FROM verses_fts
+        JOIN verses v ON v.verse_id = verses_fts.rowid
+        JOIN chapters c ON c.chapter_id = v.chapter_id
+        JOIN books b ON b.book_id = c.book_id
+        JOIN translations t ON t.translation_id = b.translation_id
+        WHERE verses_fts MATCH ?
+    """
+    params = [match]
+    if translations:
+        sql += f" AND t.abbreviation IN ({', '.join('?' for _ in translations)})"
+        params.extend(translations)
+    sql += " ORDER BY bm25(verses_fts) LIMIT ?"
+    params.append(limit)
+    conn = get_read_connection()
+    return [SearchResult(*row) for row in conn.execute(sql, params)]
+
+def print_search_results(query: str, translations: Optional[List[str]], limit: int, raw: bool) -> None:
+    """CLI helper: run a search and print one line per matching verse."""
+    start = time.perf_counter()
+    try:
+        results = search(query, translations, limit, raw)
+    except sqlite3.OperationalError as e:
+        logging.error(f"Search failed: {e}")
+        return
+    elapsed = (time.perf_counter() - start) * 1000
+    for result in results:
+        print(f"{result.translation:<4} {result.reference:<24} {result.snippet}")
+    print(f"{len(results)} results in {elapsed:.1f} ms")
+
+# Book codes used by USFM \id lines and OSIS osisIDs, in BOOK_NAMES order.
+USFM_BOOK_CODES = [
+    'GEN', 'EXO', 'LEV', 'NUM', 'DEU', 'JOS', 'JDG', 'RUT', '1SA', '2SA', '1KI', '2KI',
+    '1CH', '2CH', 'EZR', 'NEH', 'EST', 'JOB', 'PSA', 'PRO', 'ECC', 'SNG', 'ISA', 'JER',
+    'LAM', 'EZK', 'DAN', 'HOS', 'JOL', 'AMO', 'OBA', 'JON', 'MIC', 'NAM', 'HAB', 'ZEP',
+    'HAG', 'ZEC', 'MAL', 'MAT', 'MRK', 'LUK', 'JHN', 'ACT', 'ROM', '1CO', '2CO', 'GAL',
+    'EPH', 'PHP', 'COL', '1TH', '2TH', '1TI', '2TI', 'TIT', 'PHM', 'HEB', 'JAS', '1PE',
+    '2PE', '1JN', '2JN', '3JN', 'JUD', 'REV'
+]
+OSIS_BOOK_CODES = [
+    'Gen', 'Exod', 'Lev', 'Num', 'Deut', 'Josh', 'Judg', 'Ruth', '1Sam', '2Sam', '1Kgs', '2Kgs',
+    '1Chr', '2Chr', 'Ezra', 'Neh', 'Esth', 'Job', 'Ps', 'Prov', 'Eccl', 'Song', 'Isa', 'Jer',
+    'Lam', 'Ezek', 'Dan', 'Hos', 'Joel', 'Amos', 'Obad', 'Jonah', 'Mic', 'Nah', 'Hab', 'Zeph',
+    'Hag', 'Zech', 'Mal', 'Matt', 'Mark', 'Luke', 'John', 'Acts', 'Rom', '1Cor', '2Cor', 'Gal',
+    'Eph', 'Phil', 'Col', '1Thess', '2Thess', '1Tim', '2Tim', 'Titus', 'Phlm', 'Heb', 'Jas', '1Pet',
+    '2Pet', '1John', '2John', '3John', 'Jude', 'Rev'
+]
+USFM_BOOKS = dict(zip(USFM_BOOK_CODES, BOOK_NAMES))
+OSIS_BOOKS = dict(zip(OSIS_BOOK_CODES, BOOK_NAMES))
+# Verse updates per executemany, and per commit, when importing files.
+IMPORT_BATCH_SIZE = 5000
+IMPORT_COMMIT_ROWS = 100000
+# Structure mismatches reported individually before they are only counted.
+IMPORT_WARNING_LIMIT = 20
+# Bytes read from an import file at a time.
+IMPORT_CHUNK_SIZE = 1 << 16
+
+class ImportedVerse(NamedTuple):
+    book_name: str
+    chapter_number: int
+    verse_number: int
+    text: str
+
+# Registry for import file readers: each yields ImportedVerse tuples from an open text file.
+IMPORT_READERS = {}
+# File extensions recognized by detect_import_format.
+IMPORT_EXTENSIONS = {'.usfm': 'usfm', '.sfm': 'usfm', '.xml': 'osis', '.osis': 'osis',
+                     '.json': 'json', '.jsonl': 'json'}
+
+def register_import_reader(format_name: str):
+    """Decorator to register a reader for an import file format."""
+    def decorator(func):
+        IMPORT_READERS[format_name] = func
+        return func
+    return decorator
+
+def detect_import_format(path: str) -> Optional[str]:
+    return IMPORT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+def resolve_book(name: str) -> Optional[str]:
+    """Map a USFM or OSIS book code, or any name parse_reference accepts, to its BOOK_NAMES entry."""
+    name = str(name).strip()
+    return (USFM_BOOKS.get(name.upper()) or OSIS_BOOKS.get(name)
+            or BOOK_ALIASES.get(normalize_book_name(name)))
+
+# Footnotes and cross references, then the attributes of \w word|strong="H7225"\w*,
+# then every remaining marker.
+USFM_NOTE = re.compile(r'\\(f|fe|x)\s.*?\\\1\*', re.DOTALL)
+USFM_ATTRIBUTES = re.compile(r'\|[^\\]*(?=\\\+?\w+\*)')
+USFM_MARKER = re.compile(r'\\\+?[a-z]+\d*\*?')
+USFM_VERSE = re.compile(r'\\v\s+(\d+)\S*\s?')
+
+def clean_usfm_text(text: str) -> str:
+    text = USFM_NOTE.sub('', text)
+    text = USFM_ATTRIBUTES.sub('', text)
+    return collapse_whitespace(USFM_MARKER.sub('', text))
+
+@register_import_reader('usfm')
+def read_usfm(file) -> Iterator[ImportedVerse]:
+    """Stream verses from a USFM file (one or more books).
+
+    Only the current verse's text is held in memory. Headings and other
+    paragraph-level content between verses (\\s, \\d, \\r, ...) are dropped;
+    footnotes, cross references and word-level attributes are stripped.
+    """
+    book = None
+    chapter = 0
+    verse = None
+    parts = []
+
+    def finish():
+        if book and verse is not None:
+            return ImportedVerse(book, chapter, verse, clean_usfm_text(' '.join(parts)))
+        return None
+
+    for line in file:
+        line = line.strip()
+        if not line.startswith('\\'):
+            if verse is not None:
+                parts.append(line)
+            continue
+        marker = line.split(None, 1)[0]
+        if marker in ('\\id', '\\c'):
+            completed = finish()
+            if completed:
+                yield completed
+            verse = None
+            parts = []
+            value = line[len(marker):].strip().split(None, 1)
+            if marker == '\\id':
+                book = resolve_book(value[0]) if value else None
+                chapter = 0
+                if book is None:
+                    logging.warning(f"Skipping unrecognized USFM book {line!r}.")
+            else:
+                chapter = int(value[0]) if value and value[0].isdigit() else 0
+            continue
+        if marker in ('\\s', '\\s1', '\\s2', '\\s3', '\\d', '\\r', '\\ms', '\\mt', '\\mt1', '\\mt2',
+                      '\\h', '\\toc1', '\\toc2', '\\toc3', '\\ide', '\\rem', '\\cl', '\\cp'):
+            continue
+        # A line may open several verses ("\q1 \v 3 ... \v 4 ...").
+        position = 0
+        for match in USFM_VERSE.finditer(line):
+            if verse is not None:
+                parts.append(line[position:match.start()])
+            completed = finish()
+            if completed:
+                yield completed
+            verse = int(match.group(1))
+            parts = []
+            position = match.end()
+        if verse is not None:
+            parts.append(line[position:])
+    completed = finish()
+    if completed:
+        yield completed
+
+class OsisHandler(xml.sax.handler.ContentHandler):
+    """SAX handler collecting verses from OSIS, for both container and milestone <verse> elements.
+
+    Text inside notes and titles is skipped. Completed verses accumulate in
+    `verses` until the reader drains them after each chunk.
+    """
+
+    SKIPPED_ELEMENTS = {'note', 'title', 'header', 'rdg'}
+
+    def __init__(self):
+        super().__init__()
+        self.verses = []
+        self.current = None
+        self.parts = []
+        self.skipping = 0
+        self.in_container = False
+
+    def startElement(self, name, attrs):
+        name = name.rsplit(':', 1)[-1]
+        if name in self.SKIPPED_ELEMENTS:
+            self.skipping += 1
+        elif name == 'verse':
+            if attrs.get('eID'):
+                self.finish()
+            elif attrs.get('osisID') or attrs.get('sID'):
+                self.finish()
+                self.current = (attrs.get('osisID') or attrs.get('sID')).split()[0]
+                self.parts = []
+                self.in_container = not attrs.get('sID')
+
+    def endElement(self, name):
+        name = name.rsplit(':', 1)[-1]
+        if name in self.SKIPPED_ELEMENTS:
+            self.skipping -= 1
+        elif name == 'verse' and self.in_container:
+            # Milestone verses run on until their eID marker instead.
+            self.in_container = False
+            self.finish()
+
+    def characters(self, content):
+        if self.current and not self.skipping:
+            self.parts.append(content)
+
+    def finish(self):
+        if self.current is None:
+            return
+        osis_id, self.current = self.current, None
+        book_code, _, rest = osis_id.partition('.')
+        chapter, _, verse = rest.partition('.')
+        book = resolve_book(book_code)
+        if book and chapter.isdigit() and verse.isdigit():
+            self.verses.append(ImportedVerse(book, int(chapter), int(verse), collapse_whitespace(''.join(self.parts))))
+        else:
+            logging.warning(f"Skipping OSIS verse with unrecognized osisID {osis_id!r}.")
+
+@register_import_reader('osis')
+def read_osis(file) -> Iterator[ImportedVerse]:
+    """Stream verses from an OSIS XML file with an incremental SAX parser."""
+    handler = OsisHandler()
+    parser = xml.sax.make_parser()
+    parser.setContentHandler(handler)
+    for chunk in iter(lambda: file.read(IMPORT_CHUNK_SIZE), ''):
+        parser.feed(chunk)
+        yield from handler.verses
+        handler.verses.clear()
+    parser.close()
+    yield from handler.verses
+
+def imported_verse_from_json(item: Dict[str, Any]) -> Optional[ImportedVerse]:
+    """Build an ImportedVerse from {"book", "chapter", "verse", "text"} (book_name etc. also accepted)."""
+    try:
+        book_name = item.get('book') or item.get('book_name')
+        book = resolve_book(book_name) if book_name else None
+        if book is None:
+            logging.warning(f"Skipping JSON verse with unrecognized book {book_name!r}.")
+            return None
+        return ImportedVerse(book, int(item.get('chapter', item.get('chapter_number'))),
+                             int(item.get('verse', item.get('verse_number'))), str(item['text']).strip())
+    except (AttributeError, KeyError, TypeError, ValueError):
+        logging.warning(f"Skipping malformed JSON verse {item!r:.100}.")
+        return None
+
+def iter_json_array(file) -> Iterator[Any]:
+    """Decode the elements of a top-level JSON array one at a time, reading the file in chunks."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(IMPORT_CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError("expected a JSON array")
+    position = 1
+    while True:
+        while True:
+            # Skip separators; make sure a complete element is buffered before decoding it.
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                break
+            except json.JSONDecodeError:
+                chunk = file.read(IMPORT_CHUNK_SIZE)
+                if not chunk:
+                    raise
+                buffer = buffer[position:] + chunk
+                position = 0
+        yield item
+        position = end
+
+@register_import_reader('json')
+def read_json(file) -> Iterator[ImportedVerse]:
+    """Stream verses from JSON: a top-level array of verse objects, or JSON Lines (one object per line)."""
+    first = file.read(1)
+    while first and first.isspace():
+        first = file.read(1)
+    file.seek(0)
+    items = iter_json_array(file) if first == '[' else (json.loads(line) for line in file if line.strip())
+    for item in items:
+        verse = imported_verse_from_json(item)
+        if verse:
+            yield verse
+
+def import_translation(translation: str, paths: List[str], file_format: Optional[str] = None) -> int:
+    """Load a translation's verses from local USFM, OSIS or JSON files instead of its API.
+
+    Files are streamed through the registered IMPORT_READERS, so memory use
+    does not grow with file size. Each verse is matched against the rows
+    bootstrap_verses created and written through a VerseWriter in large
+    batches, committing every IMPORT_COMMIT_ROWS rows. Verses that do not
+    fit TRANSLATION_DATA (unknown chapter or verse, or one the translation
+    omits) are skipped with a warning; the structure's verses the files did
+    not supply are reported at the end.
+
+    Returns:
+        The number of verses written
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT translation_id FROM translations WHERE abbreviation = ?", (translation,))
+        result = cursor.fetchone()
+        if not result:
+            logging.error(f"Translation {translation} not found in database. Please populate translations first.")
+            return 0
+        chapter_index = load_chapter_index(cursor, result[0])
+        writer = VerseWriter(cursor, IMPORT_BATCH_SIZE)
+        seen = set()
+        mismatches = 0
+        written = 0
+        start = time.perf_counter()
+
+        def mismatch(message: str) -> None:
+            nonlocal mismatches
+            mismatches += 1
+            if mismatches <= IMPORT_WARNING_LIMIT:
+                logging.warning(message)
+
+        for path in paths:
+            reader_format = file_format or detect_import_format(path)
+            if reader_format not in IMPORT_READERS:
+                logging.error(f"Cannot tell the format of {path}; pass --format ({', '.join(IMPORT_READERS)}).")
+                continue
+            try:
+                with open(path, encoding='utf-8-sig') as f:
+                    for verse in IMPORT_READERS[reader_format](f):
+                        chapter = chapter_index.get((verse.book_name, verse.chapter_number))
+                        if chapter is None:
+                            mismatch(f"{path}: {verse.book_name} {verse.chapter_number} is not a chapter of {translation}.")
+                            continue
+                        if not 1 <= verse.verse_number <= chapter[2]:
+                            mismatch(f"{path}: {verse.book_name} {verse.chapter_number}:{verse.verse_number} is beyond "
+                                     f"the {chapter[2]} verses {translation} has in that chapter.")
+                            continue
+                        if is_omitted(verse.book_name, verse.chapter_number, verse.verse_number, translation):
+                            mismatch(f"{path}: {verse.book_name} {verse.chapter_number}:{verse.verse_number} is omitted in {translation}.")
+                            continue
+                        if not verse.text:
+                            mismatch(f"{path}: {verse.book_name} {verse.chapter_number}:{verse.verse_number} has no text.")
+                            continue
+                        seen.add(canonical_verse_id(verse.book_name, verse.chapter_number, verse.verse_number))
+                        writer.add(verse.text, len(verse.text.split()), None, chapter[0], verse.verse_number)
+                        written += 1
+                        if written % IMPORT_COMMIT_ROWS == 0:
+                            writer.flush()
+                            conn.commit()
+            except (OSError, UnicodeDecodeError, ValueError, xml.sax.SAXException) as e:
+                logging.error(f"Could not import {path}: {e}")
+        writer.flush()
+        conn.commit()
+
+    elapsed = time.perf_counter() - start
+    if mismatches > IMPORT_WARNING_LIMIT:
+        logging.warning(f"{mismatches - IMPORT_WARNING_LIMIT} more verses did not match the {translation} structure.")
+    expected = VERSIFICATION.size - len(omitted_canonical_ids(translation))
+    if written and len(seen) < expected:
+        logging.warning(f"The imported files did not supply {expected - len(seen)} of the {expected} verses in {translation}.")
+    METRICS.inc('verses_written_total', written, translation=translation)
+    clear_passage_caches()
+    logging.info(f"Imported {written} verses of {translation} in {elapsed:.1f} seconds "
+                 f"({written / max(elapsed, 1e-9):.0f} verses/s, {mismatches} structure mismatches).")
+    return written
+
+# Compact read-only export for serving nodes. Layout (little-endian):
+#   header   EXPORT_HEADER: magic, format version, structure checksum,
+#            verse count N (VERSIFICATION.size), text blob size, reserved,
+#            translation code (16 bytes); 40 bytes in all, so the offsets
+#            that follow are 8-byte aligned
+#   offsets  N + 1 uint32 byte offsets into the blob, indexed by verse ordinal
+#   blob     UTF-8 verse texts concatenated in canonical order
+# Verse i is blob[offsets[i]:offsets[i + 1]]; an empty slice means the verse
+# is omitted or not loaded. Because ordinals follow reading order, any
+# passage is one contiguous slice of the blob.
+EXPORT_DIR = 'export'
+EXPORT_MAGIC = b'BIBLTXT\0'
+EXPORT_VERSION = 1
+EXPORT_HEADER = struct.Struct('<8sHHIII16s')
+
+def structure_checksum() -> int:
+    """CRC of bible_structure, so readers can reject files built for another versification."""
+    return zlib.crc32(json.dumps(bible_structure).encode('utf-8')) & 0xFFFF
+
+def export_translation(translation: str, output_dir: str = EXPORT_DIR) -> Optional[str]:
+    """Write a translation's loaded verses to <output_dir>/<translation>.verses.
+
+    Args:
+        translation: Translation code (e.g., 'ESV')
+        output_dir: Directory for the export file
+
+    Returns:
+        Path of the written file, or None if the translation has no loaded verses
+    """
+    conn = get_read_connection()
+    rows = conn.execute(f"""
+        SELECT v.canonical_id, v.text
+        FROM verses v
+        JOIN chapters c ON c.chapter_id = v.chapter_id
+        JOIN books b ON b.book_id = c.book_id
+        JOIN translations t ON t.translation_id = b.translation_id
+        WHERE t.abbreviation = ? AND v.canonical_id IS NOT NULL
+          AND {SEARCHABLE_TEXT_SQL.format(alias='v')}
+        ORDER BY v.canonical_id
+    """, (translation,))
+
+    lengths = array.array('I', bytes(4 * VERSIFICATION.size))
+    blob = bytearray()
+    exported = 0
+    for canonical_id, text in rows:
+        ordinal = VERSIFICATION.ordinal(canonical_id)
+        if ordinal is None:
+            continue
+        encoded = text.encode('utf-8')
+        lengths[ordinal] = len(encoded)
+        blob += encoded
+        exported += 1
+    if not exported:
+        logging.warning(f"No loaded verses to export for {translation}.")
+        return None
+
+    offsets = array.array('I', [0])
+    for length in lengths:
+        offsets.append(offsets[-1] + length)
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{translation}.verses")
+    header = EXPORT_HEADER.pack(EXPORT_MAGIC, EXPORT_VERSION, structure_checksum(),
+                                VERSIFICATION.size, len(blob), 0, translation.encode('ascii'))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(offsets.tobytes())
+        f.write(blob)
+    os.replace(tmp_path, path)
+    logging.info(f"Exported {exported} verses of {translation} to {path} "
+                 f"({os.path.getsize(path) / 1024 / 1024:.1f} MiB).")
+    return path
+
+class VerseTextFile:
+    """Zero-copy reader for files written by export_translation.
+
+    The file is mmapped read-only, so opening it costs no parsing and every
+    process reading the same file shares one copy in the page cache. Lookups
+    return memoryview slices of the mapping; call bytes()/str() only when a
+    copy is actually needed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = view = memoryview(self.mmap)
+        magic, version, checksum, verse_count, blob_size, _, translation = EXPORT_HEADER.unpack_from(view)
+        if magic != EXPORT_MAGIC or version != EXPORT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {EXPORT_VERSION} verse export")
+        if checksum != structure_checksum() or verse_count != VERSIFICATION.size:
+            self.close()
+            raise ValueError(f"{path} was exported for a different versification")
+        self.translation = translation.rstrip(b'\0').decode('ascii')
+        offsets_start = EXPORT_HEADER.size
+        blob_start = offsets_start + 4 * (verse_count + 1)
+        if sys.byteorder == 'little':
+            self.offsets = view[offsets_start:blob_start].cast('I')
+        else:
+            self.offsets = array.array('I', view[offsets_start:blob_start])
+            self.offsets.byteswap()
+        self.blob = view[blob_start:blob_start + blob_size]
+
+    def verse(self, canonical_id: int) -> memoryview:
+        """UTF-8 bytes of one verse (empty if omitted, not loaded or not in the structure)."""
+        ordinal = VERSIFICATION.ordinal(canonical_id)
+        if ordinal is None:
+            return self.blob[0:0]
+        return self.blob[self.offsets[ordinal]:self.offsets[ordinal + 1]]
+
+    def text(self, canonical_id: int) -> str:
+        return str(self.verse(canonical_id), 'utf-8')
+
+    def passage(self, reference: Union[str, Reference]) -> List[Tuple[int, memoryview]]:
+        """(canonical_id, UTF-8 bytes) for each present verse of a reference, in order."""
+        if isinstance(reference, str):
+            reference = parse_reference(reference)
+        first = VERSIFICATION.ordinal(reference.start_id)
+        last = VERSIFICATION.ordinal(reference.end_id)
+        offsets, blob, canonical_ids = self.offsets, self.blob, VERSIFICATION.canonical_ids
+        return [(canonical_ids[ordinal], blob[offsets[ordinal]:offsets[ordinal + 1]])
+                for ordinal in range(first, last + 1)
+                if offsets[ordinal + 1] > offsets[ordinal]]
+
+    def close(self) -> None:
+        # Views into the mapping must be released before it can be closed, so
+        # callers must not hold on to slices returned by verse()/passage().
+        for name in ('blob', 'offsets', 'view'):
+            view = self.__dict__.pop(name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        self.mmap.close()
+
+    def __enter__(self) -> 'VerseTextFile':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+# Streaming export formats (the "binary" format is export_translation's .verses file).
+EXPORT_FORMATS = ['binary', 'jsonl', 'csv', 'parquet']
+EXPORT_COLUMNS = ['translation', 'canonical_id', 'book', 'chapter', 'verse', 'text']
+# Rows fetched from SQLite, and written as one Parquet row group, at a time.
+EXPORT_FETCH_SIZE = 10000
+# Compressed file openers for the text formats, with their file suffixes.
+EXPORT_COMPRESSORS = {
+    # Level 6 instead of gzip's default 9: about twice as fast for a few percent more bytes.
+    'gzip': (functools.partial(gzip.open, compresslevel=6), '.gz'),
+    'bz2': (bz2.open, '.bz2'),
+    'xz': (lzma.open, '.xz'),
+}
+
+def parse_book_range(text: str) -> Tuple[int, int]:
+    """Parse "Genesis-Deuteronomy", "Gen-Deut" or "Psalms" into first and last book numbers.
+
+    Raises:
+        ValueError: If a book name is not recognized or the range is reversed
+    """
+    first_name, _, last_name = text.partition('-')
+    first = resolve_book(first_name)
+    last = resolve_book(last_name) if last_name else first
+    if first is None or last is None:
+        raise ValueError(f"Unrecognized book range: {text!r}")
+    if BOOK_NUMBERS[first] > BOOK_NUMBERS[last]:
+        raise ValueError(f"Book range runs backwards: {text!r}")
+    return BOOK_NUMBERS[first], BOOK_NUMBERS[last]
+
+def iter_export_batches(translation: str, books: Optional[Tuple[int, int]] = None) -> Iterator[List[Tuple]]:
+    """Yield a translation's loaded verses in canonical order, EXPORT_FETCH_SIZE rows at a time.
+
+    Rows are (canonical_id, book, chapter, verse, text) and are pulled from
+    the read connection's cursor with fetchmany, so only one batch is in
+    memory at once.
+    """
+    first, last = books or (1, len(BOOK_NAMES))
+    cursor = get_read_connection().cursor()
+    cursor.execute(f"""
+        SELECT v.canonical_id, b.name, c.chapter_number, v.verse_number, v.text
+        FROM verses v
+        JOIN chapters c ON c.chapter_id = v.chapter_id
+        JOIN books b ON b.book_id = c.book_id
+        JOIN translations t ON t.translation_id = b.translation_id
+        WHERE t.abbreviation = ? AND v.canonical_id BETWEEN ? AND ?
+          AND {SEARCHABLE_TEXT_SQL.format(alias='v')}
+        ORDER BY v.canonical_id
+    """, (translation, canonical_verse_id(BOOK_NAMES[first - 1], 0, 0),
+          canonical_verse_id(BOOK_NAMES[last - 1], 999, 999)))
+    while True:
+        rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+        if not rows:
+            return
+        yield rows
+
+def write_jsonl_export(f, translation: str, batches: Iterator[List[Tuple]]) -> int:
+    exported = 0
+    for rows in batches:
+        f.writelines(json.dumps(dict(zip(EXPORT_COLUMNS, (translation,) + row)), ensure_ascii=False) + '\n'
+                     for row in rows)
+        exported += len(rows)
+    return exported
+
+def write_csv_export(f, translation: str, batches: Iterator[List[Tuple]]) -> int:
+    writer = csv.writer(f)
+    writer.writerow(EXPORT_COLUMNS)
+    exported = 0
+    for rows in batches:
+        writer.writerows((translation,) + row for row in rows)
+        exported += len(rows)
+    return exported
+
+def write_parquet_export(path: str, translation: str, batches: Iterator[List[Tuple]],
+                         compression: Optional[str]) -> int:
+    """Write batches as Parquet row groups; each batch is converted and released before the next."""
+    schema = pyarrow.schema([('translation', pyarrow.string()), ('canonical_id', pyarrow.int64()),
+                             ('book', pyarrow.string()), ('chapter', pyarrow.int32()),
+                             ('verse', pyarrow.int32()), ('text', pyarrow.string())])
+    exported = 0
+    with pyarrow.parquet.ParquetWriter(path, schema, compression=compression or 'snappy') as writer:
+        for rows in batches:
+            columns = [[translation] * len(rows)] + [list(column) for column in zip(*rows)]
+            writer.write_table(pyarrow.Table.from_arrays(columns, schema=schema))
+            exported += len(rows)
+    return exported
+
+def stream_export(translation: str, output_dir: str = EXPORT_DIR, export_format: str = 'jsonl',
+                  compression: Optional[str] = None, books: Optional[Tuple[int, int]] = None) -> Optional[str]:
+    """Stream a translation's loaded verses to a JSONL, CSV or Parquet file in canonical order.
+
+    Rows go straight from the SQLite cursor to disk (through gzip, bz2 or xz
+    for the text formats; Parquet uses its own column compression), so
+    memory use does not depend on the size of the export. The file is
+    written under a temporary name and renamed into place when complete.
+
+    Args:
+        translation: Translation code (e.g., 'ESV')
+        output_dir: Directory for the export file
+        export_format: 'jsonl', 'csv' or 'parquet'
+        compression: 'gzip', 'bz2' or 'xz', or None for uncompressed text
+        books: (first, last) book numbers to limit the export to, as from parse_book_range
+
+    Returns:
+        Path of the written file, or None if nothing was exported
+    """
+    if export_format == 'parquet' and pyarrow is None:
+        logging.error("Parquet export needs pyarrow (pip install pyarrow).")
+        return None
+    if export_format == 'parquet' and compression in ('bz2', 'xz'):
+        logging.error(f"Parquet files cannot be {compression}-compressed; use gzip or no --compress.")
+        return None
+
+    name = translation
+    if books:
+        name += f".{BOOK_NAMES[books[0] - 1]}" + (f"-{BOOK_NAMES[books[1] - 1]}" if books[1] != books[0] else '')
+    name = f"{name.replace(' ', '')}.{export_format}"
+    if compression and export_format != 'parquet':
+        name += EXPORT_COMPRESSORS[compression][1]
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, name)
+    tmp_path = f"{path}.tmp"
+
+    start = time.perf_counter()
+    batches = iter_export_batches(translation, books)
+    try:
+        if export_format == 'parquet':
+            exported = write_parquet_export(tmp_path, translation, batches, compression)
+        else:
+            opener = EXPORT_COMPRESSORS[compression][0] if compression else open
+            with opener(tmp_path, 'wt', encoding='utf-8', newline='') as f:
+                writer = write_csv_export if export_format == 'csv' else write_jsonl_export
+                exported = writer(f, translation, batches)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if not exported:
+        os.remove(tmp_path)
+        logging.warning(f"No loaded verses to export for {translation}.")
+        return None
+    os.replace(tmp_path, path)
+    elapsed = time.perf_counter() - start
+    logging.info(f"Exported {exported} verses of {translation} to {path} in {elapsed:.2f} seconds "
+                 f"({exported / max(elapsed, 1e-9):.0f} rows/s, {os.path.getsize(path) / 1048576:.1f} MiB).")
+    return path
+
+# Default output file for --profile, and how many functions it prints.
+PROFILE_FILE = 'bible_loader.prof'
+PROFILE_TOP_FUNCTIONS = 25
+
+# Before Python 3.12 each thread can run its own cProfile.Profile. From 3.12 on
+# cProfile is built on sys.monitoring, which allows one profiler per
+# interpreter, and that profiler sees every thread.
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+class ThreadProfiler:
+    """cProfile across the main thread and every fetch worker, timed in thread CPU time.
+
+    Each thread gets its own cProfile.Profile using time.thread_time as the
+    clock, so time a thread spends asleep (rate-limit waits, backoff) or
+    blocked on the network does not count and the profile shows where CPU
+    actually goes. The per-thread profiles are merged by stats().
+
+    On Python 3.12+ a second active cProfile.Profile raises ValueError, so a
+    single interpreter-wide profile is enabled by start() instead, timed in
+    process CPU time: sleeps and network waits are still excluded, though a
+    function may be charged CPU that other threads used while it ran.
+    """
+
+    def __init__(self):
+        self.profiles = []
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.shared = None if PER_THREAD_PROFILES else cProfile.Profile(time.process_time)
+        if self.shared:
+            self.profiles.append(self.shared)
+
+    def start(self) -> None:
+        """Enable the interpreter-wide profile (Python 3.12+; per-thread profiles start in wrap())."""
+        if self.shared:
+            self.shared.enable()
+
+    def stop(self) -> None:
+        if self.shared:
+            self.shared.disable()
+
+    def profile(self) -> cProfile.Profile:
+        if self.shared:
+            return self.shared
+        profile = getattr(self.local, 'profile', None)
+        if profile is None:
+            profile = self.local.profile = cProfile.Profile(time.thread_time)
+            with self.lock:
+                self.profiles.append(profile)
+        return profile
+
+    def wrap(self, func):
+        """Return func profiled whenever it runs, on whatever thread runs it."""
+        if self.shared:
+            # The interpreter-wide profile already covers every thread.
+            return func
+
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            profile = self.profile()
+            profile.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+        return run
+
+    def stats(self) -> pstats.Stats:
+        with self.lock:
+            profiles = list(self.profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+# The active profiler while running under --profile, else None.
+profiler = None
+
+def profiled(func):
+    """func wrapped for the active profiler, or func itself when not profiling."""
+    return profiler.wrap(func) if profiler else func
+
+def run_profiled(func, output: str, *args) -> None:
+    """Run func(*args) under a ThreadProfiler, save the pstats file and print the hottest functions."""
+    global profiler
+    profiler = ThreadProfiler()
+    profiler.start()
+    try:
+        profiler.wrap(func)(*args)
+    finally:
+        profiler.stop()
+        stats = profiler.stats()
+        profiler = None
+        stats.dump_stats(output)
+        print(f"\nCPU profile saved to {output} (view with: python -m pstats {output})")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(PROFILE_TOP_FUNCTIONS)
+
+def main() -> None:
+    """Command-line entry point with support for arguments or interactive prompts."""
+    parser = argparse.ArgumentParser(description='Bible Translation Text Fetcher')
+    parser.add_argument('-t', '--translation', 
+                        choices=list(TRANSLATIONS.keys()),
+                        default='',
+                        help='Bible translation to process')
+    parser.add_argument('-k', '--key', 
+                        help='API key for the translation service')
+    parser.add_argument('--keys-file',
+                        help='JSON file mapping translations to one or more API keys, '
+                             'e.g. {"ESV": ["key1", "key2"]}; <TRANSLATION>_API_KEYS is also read')
+    parser.add_argument('-a', '--all', 
+                        action='store_true',
+                        help='Process all supported translations (requires API keys for all)')
+    parser.add_argument('--plan',
+                        action='store_true',
+                        help='Print the remaining request count and estimated completion time, then exit')
+    parser.add_argument('-w', '--workers',
+                        type=int,
+                        default=DEFAULT_WORKERS,
+                        help=f'Number of requests to keep in flight concurrently (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--write-batch-size',
+                        type=int,
+                        default=WRITE_BATCH_SIZE,
+                        help=f'Verse updates applied per database batch (default: {WRITE_BATCH_SIZE})')
+    parser.add_argument('--commit-every',
+                        type=int,
+                        default=COMMIT_EVERY_REQUESTS,
+                        help=f'Commit progress after this many requests (default: {COMMIT_EVERY_REQUESTS})')
+    parser.add_argument('--commit-seconds',
+                        type=float,
+                        default=COMMIT_EVERY_SECONDS,
+                        help=f'Commit progress at least this often, in seconds (default: {COMMIT_EVERY_SECONDS})')
+    parser.add_argument('--replay',
+                        action='store_true',
+                        help='Rebuild verses from cached API responses only, without calling any API')
+    parser.add_argument('--cache-dir',
+                        default=RESPONSE_CACHE_DIR,
+                        help=f'Directory for cached API responses (default: {RESPONSE_CACHE_DIR})')
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help='Do not store API responses in the response cache')
+    parser.add_argument('--reset-progress',
+                        action='store_true',
+                        help='Clear the progress ledger so ranges that returned no text are requested again')
+    parser.add_argument('--refresh',
+                        action='store_true',
+                        help='Re-check already loaded text for publisher revisions instead of loading placeholders, '
+                             'using conditional requests and rewriting only changed verses')
+    parser.add_argument('--refresh-budget',
+                        type=int,
+                        help=f'Most requests a refresh may spend per translation '
+                             f'(default: {REFRESH_QUOTA_SHARE * 100:g}%% of the daily quota, if unused)')
+    parser.add_argument('--refresh-age',
+                        type=float,
+                        default=REFRESH_MIN_AGE_DAYS,
+                        help=f'Only refresh chapters fetched at least this many days ago (default: {REFRESH_MIN_AGE_DAYS})')
+    parser.add_argument('--metrics-file',
+                        help='Write loader metrics in the Prometheus text format to this file at every checkpoint')
+    parser.add_argument('--metrics-port',
+                        type=int,
+                        help='Serve loader metrics for Prometheus at http://127.0.0.1:PORT/metrics while loading')
+    parser.add_argument('--profile',
+                        nargs='?',
+                        const=PROFILE_FILE,
+                        metavar='FILE',
+                        help=f'Profile CPU time (sleeps and network waits excluded), save pstats to FILE '
+                             f'(default: {PROFILE_FILE}) and print the hottest functions')
+    parser.add_argument('--max-requests',
+                        type=int,
+                        help='Stop after this many API calls (or replayed responses with --replay)')
+    
+    subparsers = parser.add_subparsers(dest='command')
+    search_parser = subparsers.add_parser('search', help='Full-text search over loaded verses')
+    search_parser.add_argument('query', help='Words to search for (all must match)')
+    search_parser.add_argument('-t', '--translation', dest='translations', action='append',
+                               choices=list(TRANSLATIONS.keys()),
+                               help='Limit to a translation (repeatable; default: all)')
+    search_parser.add_argument('-n', '--limit', type=int, default=20, help='Maximum results (default: 20)')
+    search_parser.add_argument('--raw', action='store_true', help='Treat the query as an FTS5 expression')
+    passage_parser = subparsers.add_parser('passage', help='Print a passage such as "John 3:16-18" or "Ps 23"')
+    passage_parser.add_argument('reference', help='Passage reference; book names may be abbreviated')
+    passage_parser.add_argument('-t', '--translation', dest='translations', action='append',
+                                choices=list(TRANSLATIONS.keys()),
+                                help='Translation to read (repeatable for side-by-side columns; default: ESV)')
+    export_parser = subparsers.add_parser('export', help='Write translations as compact memory-mappable files, '
+                                                         'or stream them to JSONL, CSV or Parquet')
+    export_parser.add_argument('-t', '--translation', dest='translations', action='append',
+                               choices=list(TRANSLATIONS.keys()),
+                               help='Translation to export (repeatable; default: all)')
+    export_parser.add_argument('-o', '--output-dir', default=EXPORT_DIR,
+                               help=f'Directory for the exported files (default: {EXPORT_DIR})')
+    export_parser.add_argument('-f', '--format', dest='export_format', choices=EXPORT_FORMATS, default='binary',
+                               help='binary: memory-mappable .verses file; jsonl, csv, parquet: one row per '
+                                    'verse in canonical order (parquet needs pyarrow) (default: binary)')
+    export_parser.add_argument('--compress', choices=sorted(EXPORT_COMPRESSORS),
+                               help='Compress jsonl/csv output; parquet supports gzip only')
+    export_parser.add_argument('--books',
+                               help='Only export a book or book range, e.g. "Matthew-John" (not for binary)')
+    import_parser = subparsers.add_parser('import', help='Load a translation from local USFM, OSIS or JSON files')
+    import_parser.add_argument('files', nargs='+', help='Files to import, e.g. one USFM file per book')
+    import_parser.add_argument('-t', '--translation', dest='import_translation', required=True,
+                               choices=list(TRANSLATIONS.keys()), help='Translation the files contain')
+    import_parser.add_argument('--format', choices=sorted(IMPORT_READERS),
+                               help='File format (default: from each file extension)')
+    
+    args = parser.parse_args()
+    configure_response_cache(args.cache_dir, enabled=not args.no_cache)
+    configure_metrics(args.metrics_file, args.metrics_port)
+    limit_requests(args.max_requests)
+
+    if args.profile:
+        run_profiled(run_command, args.profile, args)
+    else:
+        run_command(args)
+
+def run_command(args: argparse.Namespace) -> None:
+    """Carry out the command parsed by main()."""
+    if args.command == 'search':
+        print_search_results(args.query, args.translations, args.limit, args.raw)
+        return
+    if args.command == 'passage':
+        print_passage(args.reference, args.translations or ['ESV'])
+        return
+    if args.command == 'export':
+        if args.export_format == 'binary':
+            if args.books or args.compress:
+                logging.error("--books and --compress apply to the jsonl, csv and parquet formats only.")
+                return
+            for trans in args.translations or list(TRANSLATIONS.keys()):
+                export_translation(trans, args.output_dir)
+            return
+        try:
+            books = parse_book_range(args.books) if args.books else None
+        except ValueError as e:
+            logging.error(str(e))
+            return
+        for trans in args.translations or list(TRANSLATIONS.keys()):
+            stream_export(trans, args.output_dir, args.export_format, args.compress, books)
+        return
+    if args.command == 'import':
+        if prepare_translation(args.import_translation):
+            import_translation(args.import_translation, args.files, args.format)
+        return
+    
+    if args.reset_progress:
+        create_database()
+        for trans in (list(TRANSLATIONS.keys()) if args.all else [args.translation or 'ESV']):
+            reset_progress(trans)
+    
+    # Dry run: report the request plan without calling any API
+    if args.plan:
+        translations = list(TRANSLATIONS.keys()) if args.all else [args.translation or 'ESV']
+        for trans in translations:
+            if prepare_translation(trans):
+                print_plan(trans)
+        return
+    
+    # Rebuild from the response cache without an API key
+    if args.replay:
+        translations = list(TRANSLATIONS.keys()) if args.all else [args.translation or 'ESV']
+        for trans in translations:
+            if prepare_translation(trans):
+                replay_translation(trans, args.write_batch_size)
+        return
+    
+    refresh = RefreshPolicy(args.refresh_budget, args.refresh_age) if args.refresh else None
 
-def main() -> None:
-    """Command-line entry point with support for arguments or interactive prompts."""
-    parser = argparse.ArgumentParser(description='Bible Translation Text Fetcher')
-    parser.add_argument('-t', '--translation', 
-                        choices=list(TRANSLATIONS.keys()),
-                        default='',
-                        help='Bible translation to process')
-    parser.add_argument('-k', '--key', 
-                        help='API key for the translation service')
-    parser.add_argument('-a', '--all', 
-                        action='store_true',
-                        help='Process all supported translations (requires API keys for all)')
-    
-    args = parser.parse_args()
-    
     # If processing all translations
     if args.all:
+        api_keys = {}
         for trans in TRANSLATIONS.keys():
-            key = input(f"Enter API Key for {trans} ({TRANSLATIONS[trans]['name']}): ").strip()
-            if key:
-                process_translation(trans, key)
+            keys = load_api_keys(trans, args.keys_file)
+            if not keys:
+                key = input(f"Enter API Key for {trans} ({TRANSLATIONS[trans]['name']}): ").strip()
+                keys = [key] if key else []
+            if keys:
+                api_keys[trans] = keys
             else:
                 logging.warning(f"Skipping {trans} due to missing API key")
+        process_translations(api_keys, args.workers, args.write_batch_size,
+                             args.commit_every, args.commit_seconds, refresh)
         return
     
     # Get translation from argument or prompt
@@ -1139,16 +4536,18 @@ def main() -> None:
     if not translation:
         translation = input(f"Enter the Bible translation abbreviation [{', '.join(TRANSLATIONS.keys())}] (default: ESV): ").strip() or "ESV"
     
-    # Get API key from argument or prompt
-    api_key = args.key
-    if not api_key:
-        api_key = input(f"Enter your API Key for {translation} ({TRANSLATIONS[translation]['name']}): ").strip()
+    # Get API keys from argument, keys file/environment or prompt
+    api_keys = [args.key] if args.key else load_api_keys(translation, args.keys_file)
+    if not api_keys:
+        key = input(f"Enter your API Key for {translation} ({TRANSLATIONS[translation]['name']}): ").strip()
+        api_keys = [key] if key else []
     
-    if not api_key:
+    if not api_keys:
         logging.error("API key is required")
         return
         
-    process_translation(translation, api_key)
+    process_translation(translation, api_keys, args.workers, args.write_batch_size,
+                        args.commit_every, args.commit_seconds, refresh)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
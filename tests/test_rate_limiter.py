@@ -0,0 +1,83 @@
+"""RateLimiter must never allow more than a window's quota, simulated with a fake clock."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import init  # noqa: E402
+
+START = 1_700_000_123.0
+
+class FakeClock:
+    def __init__(self, now: float = START):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(init.time, 'time', clock)
+    return clock
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(init, 'DB_NAME', str(tmp_path / 'bible.db'))
+    init.create_database()
+    conn = init.get_connection()
+    for translation in init.RATE_LIMITS:
+        conn.execute("INSERT INTO translations (abbreviation, name) VALUES (?, ?)", (translation, translation))
+    conn.commit()
+    yield conn
+    init.close_connection()
+
+def greedy(limiter: init.RateLimiter, clock: FakeClock, until: float, step: float) -> list:
+    """Take every token the limiter grants, checking every `step` seconds, and return the grant times."""
+    granted = []
+    while clock.now < until:
+        while limiter.try_acquire():
+            granted.append(clock.now)
+        clock.now += step
+    return granted
+
+def assert_within_limits(granted: list, translation: str) -> None:
+    for period, limit in init.RATE_LIMITS[translation].items():
+        length = init.RATE_LIMIT_PERIODS[period]
+        first = 0
+        for last, moment in enumerate(granted):
+            while granted[first] <= moment - length:
+                first += 1
+            assert last - first + 1 <= limit, f"{last - first + 1} {translation} requests within one {period} window"
+
+@pytest.mark.parametrize('translation, period, step', [('NIV', 'hourly', 1.0), ('KJV', 'hourly', 1.0),
+                                                       ('ESV', 'daily', 10.0)])
+def test_greedy_caller_stays_within_every_window(clock, translation, period, step):
+    limiter = init.RateLimiter(translation)
+    length = init.RATE_LIMIT_PERIODS[period]
+    granted = greedy(limiter, clock, START + 2 * length, step)
+    assert_within_limits(granted, translation)
+    in_first_period = sum(1 for moment in granted if moment < START + length)
+    assert in_first_period == init.RATE_LIMITS[translation][period]
+
+def test_restart_keeps_the_window(clock, conn):
+    limiter = init.RateLimiter('NIV')
+    assert limiter.load(conn)
+    granted = greedy(limiter, clock, START + 1800, 1.0)
+    limiter.persist(conn)
+    conn.commit()
+
+    restarted = init.RateLimiter('NIV')
+    assert restarted.load(conn)
+    granted += greedy(restarted, clock, START + 7200, 1.0)
+    assert_within_limits(granted, 'NIV')
+
+def test_wait_time_matches_the_window(clock):
+    limiter = init.RateLimiter('NIV')
+    greedy(limiter, clock, START + 1, 1.0)
+    wait_time = limiter.time_until_available()
+    clock.now += wait_time - 1
+    assert not limiter.try_acquire()
+    clock.now += 1
+    assert limiter.try_acquire()
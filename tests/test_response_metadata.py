@@ -0,0 +1,47 @@
+"""Chapter metadata written from a multi-chapter response describes each chapter, not the whole range."""
+import json
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, os.path.join(HERE, '..', 'benchmarks'))
+import init  # noqa: E402
+from fake_api_server import BODIES  # noqa: E402
+
+@pytest.fixture
+def esv_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(init, 'DB_NAME', str(tmp_path / 'bible.db'))
+    assert init.prepare_translation('ESV')
+    yield init.get_connection()
+    init.close_connection()
+
+def chapter_metadata(conn, book_name: str, chapter_number: int) -> dict:
+    row = conn.execute("""
+        SELECT c.metadata FROM chapters c
+        JOIN books b ON b.book_id = c.book_id
+        JOIN translations t ON t.translation_id = b.translation_id
+        WHERE t.abbreviation = 'ESV' AND b.name = ? AND c.chapter_number = ?
+    """, (book_name, chapter_number)).fetchone()
+    return json.loads(row[0])
+
+def test_multi_chapter_response_metadata_is_per_chapter(esv_database):
+    cursor = esv_database.cursor()
+    translation_id = cursor.execute("SELECT translation_id FROM translations WHERE abbreviation = 'ESV'").fetchone()[0]
+    chapter_index = init.load_chapter_index(cursor, translation_id)
+    reference = 'Genesis 1:1-3:24'
+    request = init.request_from_reference('ESV', reference)
+    result = init.RESPONSE_PROCESSORS['ESV'](BODIES['ESV'](request, reference), 'ESV')
+
+    writer = init.VerseWriter(cursor)
+    assert init.write_planned_request(writer, request, result, chapter_index, 'ESV') == 80
+    writer.flush()
+
+    metadata = chapter_metadata(esv_database, 'Genesis', 2)
+    assert metadata['canonical'] == 'Genesis 2:1-25'
+    assert metadata['chapter_start'] == [1002001, 1002025]
+    assert metadata['chapter_end'] == [1002001, 1002025]
+    assert chapter_metadata(esv_database, 'Genesis', 1)['canonical'] == 'Genesis 1:1-31'
+    assert chapter_metadata(esv_database, 'Genesis', 3)['chapter_end'] == [1003001, 1003024]